@@ -1,6 +1,6 @@
 # Register your models here.
 from django.contrib import admin
-from .models import Post, Like, Follow
+from .models import Post, Like, Follow, PostEngagement, AuthorEngagement, Tag
 
 
 @admin.register(Follow)
@@ -19,3 +19,21 @@ class PostAdmin(admin.ModelAdmin):
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
     list_display = ["id", "post", "liked_by"]
+
+
+@admin.register(PostEngagement)
+class PostEngagementAdmin(admin.ModelAdmin):
+    list_display = ["id", "post", "resolution", "bucket", "likes", "unlikes"]
+    list_filter = ["resolution"]
+
+
+@admin.register(AuthorEngagement)
+class AuthorEngagementAdmin(admin.ModelAdmin):
+    list_display = ["id", "author", "resolution", "bucket", "likes", "unlikes"]
+    list_filter = ["resolution"]
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "posts_count"]
+    search_fields = ["name"]
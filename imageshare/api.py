@@ -1,27 +1,52 @@
 # Standard Library Imports
 import logging
+import uuid
+from datetime import timedelta
 
 # Django Imports
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
+from django.urls import reverse
+from django.db.models import Count, Exists, OuterRef, QuerySet, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 # Django Rest Framework Imports
 from rest_framework import status, viewsets, permissions, generics, filters
-from rest_framework.exceptions import PermissionDenied, ParseError, NotFound
+from rest_framework.exceptions import PermissionDenied, ParseError
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 # Project-Specific Imports
-from .utils.pagination import PostsPagination
-from .models import Post, Follow, Like
+from .utils.pagination import PostsPagination, LikersPagination
+from .models import Post, Follow, Like, EngagementBucket, Tag
+from .rollups import post_engagement_series
 from .serializers import PostSerializer, FollowSerializer
+from .relationships import relationship_statuses
+from .tags import decode_cursor, encode_cursor, tagged_posts, trending_tags
+from .tasks import process_post_image
+from isa.caching import (
+    cached_response,
+    request_key,
+    stale_while_revalidate,
+    viewer_key,
+)
+from isa.serializers import SAFE_METHODS, only_fields, selected_fields
+from isa.viewsets import BatchRetrieveMixin, parse_ids
+from isa.sharding import (
+    ScatterGatherList,
+    get_sharded_object_or_404,
+    shard_for_user,
+    shard_union,
+    sharding_enabled,
+)
 from users.models import User
 
 # Logger Initialization
 logger = logging.getLogger(__name__)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
     """
     List only posts by the authenticated user and their followed users
     (sort by most recent and the number of likes)
@@ -34,33 +59,90 @@ class PostViewSet(viewsets.ModelViewSet):
     search_fields = ["caption"]  # Specify fields for search
 
     def get_queryset(self):
-        # Return posts by all users sorted by the number of post likes
-        queryset = (
-            Post.objects.prefetch_related("likes", "created_by")
-            .all()
-            .annotate(likes_count=Count("likes"))
-            .order_by("-likes_count")
+        # Return posts by all users, freshest popular posts first (post_hot_idx).
+        # Likes are never loaded: the count is stored on the post and whether
+        # the viewer liked it is a single EXISTS subquery per page.
+        queryset = Post.objects.order_by("-hot_score", "-created_at")
+        fields = selected_fields(self.request, PostSerializer)
+        if "liked_by_me" in fields and self.action == "list":
+            # The hot feed page is cached for everyone; list() fills this in
+            queryset = queryset.annotate(liked_by_me=Value(False))
+        elif "liked_by_me" in fields:
+            queryset = queryset.annotate(
+                liked_by_me=Exists(
+                    Like.objects.filter(post=OuterRef("pk"), liked_by=self.request.user)
+                )
+            )
+        if self.request.method not in SAFE_METHODS:
+            return queryset.select_related("created_by")
+        # Reads load only the columns behind the requested fields (?fields=,
+        # ?omit=), plus the ordering columns the shard merge compares
+        only, related = only_fields(self.request, PostSerializer)
+        return queryset.select_related(*related).only(*only, "hot_score", "created_at")
+
+    @stale_while_revalidate(
+        request_key("hot-feed"),
+        ttl=lambda: settings.FEED_CACHE_SECONDS,
+        stale_ttl=lambda: settings.FEED_CACHE_SECONDS,
+    )
+    def _hot_feed_page(self, request, *args, **kwargs):
+        """
+        The page's response data and its post ids, which ?fields= may leave
+        out of the data.
+        """
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        return (
+            self.get_paginated_response(serializer.data).data,
+            [post.id for post in page],
         )
-        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # The ranked page is the same for every viewer and cached once, so a
+        # crowd opening the feed costs one computation; only which of its
+        # posts the viewer liked is looked up per request
+        data, post_ids = self._hot_feed_page(request, *args, **kwargs)
+        if "liked_by_me" not in selected_fields(request, PostSerializer):
+            return Response(data)
+        liked = shard_union(
+            Like.objects.filter(post_id__in=post_ids, liked_by=request.user)
+            .order_by()
+            .values_list("post_id", flat=True)
+        )
+        results = [
+            {**item, "liked_by_me": post_id in liked}
+            for item, post_id in zip(data["results"], post_ids)
+        ]
+        return Response({**data, "results": results})
 
     def perform_create(self, serializer):
         # Set the created_by field to the current user when creating a post
-        serializer.save(created_by=self.request.user)
+        post = serializer.save(created_by=self.request.user)
+        self._process_image(post)
 
     def get_object(self):
-        post = Post.objects.prefetch_related("likes", "created_by").get(
-            id=self.kwargs.get("pk")
-        )
+        return get_sharded_object_or_404(self.get_queryset(), id=self.kwargs.get("pk"))
 
-        if not post:
-            raise NotFound()
-        return post
+    def paginate_queryset(self, queryset):
+        # Posts live on their authors' shards: merge the ordered pages of all shards
+        if sharding_enabled() and isinstance(queryset, QuerySet):
+            queryset = ScatterGatherList.across_shards(queryset)
+        return super().paginate_queryset(queryset)
 
     def perform_update(self, serializer):
         # Ensure only the post owner can update the post
         if self.get_object().created_by != self.request.user:
             raise PermissionDenied("You do not have permission to update this post.")
-        serializer.save()
+        post = serializer.save()
+        if "image" in serializer.validated_data:
+            self._process_image(post)
+
+    def _process_image(self, post):
+        process_post_image.enqueue(
+            post_id=post.id,
+            using=post._state.db,
+            idempotency_key=f"post-image:{post.id}:{post.image.name}",
+        )
 
     def perform_destroy(self, instance):
         # Ensure only the post owner can delete the post
@@ -69,14 +151,19 @@ class PostViewSet(viewsets.ModelViewSet):
         instance.delete()
 
     @action(methods=["GET"], detail=False)
+    @cached_response(
+        viewer_key("followed"),
+        ttl=lambda: settings.FEED_CACHE_SECONDS,
+        stale_ttl=lambda: settings.FEED_CACHE_SECONDS,
+    )
     def followed(self, request):
+        # Cached per user like the hot feed: the user's own posts, likes and
+        # follows bypass it, new posts of followed users show within the TTL
         search_query = request.query_params.get("search", None)
 
         # Retrieve the following users' posts in a single query
         followings_list = list(
-            Follow.objects.filter(created_by=self.request.user).values_list(
-                "following", flat=True
-            )
+            self.request.user.followings.order_by().values_list("following", flat=True)
         )
         followings_list.append(self.request.user.id)  # Add the current user to the list
 
@@ -90,8 +177,11 @@ class PostViewSet(viewsets.ModelViewSet):
         if search_query:
             queryset = queryset.filter(caption__icontains=search_query)
 
-        # Optimize by prefetching and selecting related fields
-        queryset = queryset.select_related("created_by").prefetch_related("likes")
+        if sharding_enabled():
+            # Only gather from the shards holding the followed authors
+            queryset = ScatterGatherList.across_shards(
+                queryset, {shard_for_user(user_id) for user_id in followings_list}
+            )
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -104,16 +194,58 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(methods=["GET"], detail=False, pagination_class=None)
     def publish(self, request):
         post_id = self.request.query_params.get("post_id")
-        post = Post.objects.prefetch_related("created_by").get(id=post_id)
+        post = get_sharded_object_or_404(Post.objects.all(), id=post_id)
 
-        if not post:
-            raise NotFound()
         if post.created_by != self.request.user:
             raise PermissionDenied("You do not have permission to delete this post.")
 
         data = {"shareable_link": str(post.sharable_link)}
         return Response(data)
 
+    @action(methods=["GET"], detail=True, pagination_class=None)
+    def stats(self, request, pk=None):
+        """
+        Likes and unlikes per hour (default: last 24 hours) or per day
+        (default: last 30 days) for a post
+        """
+        post = get_sharded_object_or_404(Post.objects.only("id", "likes_count"), id=pk)
+        resolution = request.query_params.get("resolution", EngagementBucket.HOUR)
+        if resolution not in (EngagementBucket.HOUR, EngagementBucket.DAY):
+            raise ParseError("resolution must be 'hour' or 'day'")
+
+        until = self._datetime_param("until") or timezone.now()
+        window = (
+            timedelta(hours=24)
+            if resolution == EngagementBucket.HOUR
+            else timedelta(days=30)
+        )
+        since = self._datetime_param("since") or until - window
+
+        series = post_engagement_series(
+            post.id, resolution, since, until, using=post._state.db
+        )
+        data = {
+            "post_id": post.id,
+            "resolution": resolution,
+            "total_likes": post.likes_count,
+            "series": [
+                {"bucket": bucket, "likes": likes, "unlikes": unlikes}
+                for bucket, likes, unlikes in series
+            ],
+        }
+        return Response(data)
+
+    def _datetime_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ParseError(f"{name} must be an ISO 8601 datetime")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
 
 class PostLikeView(viewsets.ViewSet):
 
@@ -123,12 +255,12 @@ class PostLikeView(viewsets.ViewSet):
         """
         Like a post
         """
-        post = get_object_or_404(Post, id=self.kwargs.get("post_id"))
-
-        # Check if the user already liked the post
-        like, created = Like.objects.get_or_create(
-            post=post, liked_by=self.request.user
+        post = get_sharded_object_or_404(
+            Post.objects.all(), id=self.kwargs.get("post_id")
         )
+
+        # Check if the user already liked the post (on the post's shard)
+        like, created = post.likes.get_or_create(liked_by=self.request.user)
         if created:
             return Response({"message": "Post liked successfully"}, status=201)
         else:
@@ -136,23 +268,37 @@ class PostLikeView(viewsets.ViewSet):
 
     def list(self, request, *args, **kwargs):
         """
-        List all users who liked a post
+        List users who liked a post, oldest like first, one cursor page at a time.
+        With ?followed_first=true, likers the authenticated user follows are
+        listed separately on the first page.
         """
-        queryset = Post.objects.prefetch_related("likes").get(
-            id=self.kwargs.get("post_id")
+        post = get_sharded_object_or_404(
+            Post.objects.only("id", "likes_count"), id=self.kwargs.get("post_id")
         )
-        # post = get_object_or_404(Post, id=self.kwargs.get('post_id'))
-        likes = queryset.likes.select_related("liked_by").all()
-
-        # Prepare data for response
-        liked_by_users = [like.liked_by.username for like in likes]
-        data = {
-            "post_id": queryset.id,
-            "total_likes": queryset.likes.count(),
-            "liked_by": liked_by_users,
-        }
-
-        return Response(data)
+        likes = post.likes.select_related("liked_by")
+        data = {"post_id": post.id, "total_likes": post.likes_count}
+
+        if request.query_params.get("followed_first", "").lower() in ("1", "true"):
+            # Probe the (post, liked_by) unique index once per followed user
+            following_ids = list(
+                self.request.user.followings.order_by().values_list(
+                    "following_id", flat=True
+                )
+            )
+            likes = likes.exclude(liked_by_id__in=following_ids)
+            if not request.query_params.get(LikersPagination.cursor_query_param):
+                data["followed_liked_by"] = list(
+                    post.likes.filter(liked_by_id__in=following_ids)
+                    .order_by("created_at", "id")
+                    .values_list("liked_by__username", flat=True)[
+                        : LikersPagination.page_size
+                    ]
+                )
+
+        paginator = LikersPagination()
+        page = paginator.paginate_queryset(likes, request, view=self)
+        data["liked_by"] = [like.liked_by.username for like in page]
+        return paginator.get_paginated_response(data)
 
 
 class PostUnlikeView(viewsets.ViewSet):
@@ -160,14 +306,85 @@ class PostUnlikeView(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def destroy(self, request, *args, **kwargs):
-        post = get_object_or_404(Post, id=self.kwargs.get("post_id"))
-        like = Like.objects.filter(post=post, liked_by=self.request.user).first()
+        post = get_sharded_object_or_404(
+            Post.objects.all(), id=self.kwargs.get("post_id")
+        )
+        like = post.likes.filter(liked_by=self.request.user).first()
         if not like:
             raise PermissionDenied("You do not have permission to unlike this post.")
         like.delete()
         return Response({"message": "Post unliked successfully"}, status=204)
 
 
+class TagViewSet(viewsets.ViewSet):
+    """
+    Posts by hashtag, and the trending hashtags
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = "name"
+    page_size = 20
+    max_page_size = 100
+
+    @action(methods=["GET"], detail=True)
+    def posts(self, request, name=None):
+        """
+        Newest posts with the tag, one keyset page at a time (?cursor=).
+        """
+        tag = get_object_or_404(Tag, name=name.lstrip("#").casefold())
+        after = None
+        if cursor := request.query_params.get("cursor"):
+            after = decode_cursor(cursor)
+            if after is None:
+                raise ParseError("Invalid cursor")
+        try:
+            limit = min(
+                int(request.query_params.get("page_size", self.page_size)),
+                self.max_page_size,
+            )
+        except ValueError:
+            raise ParseError("page_size must be a number")
+
+        # One extra post tells whether there is a next page
+        posts = tagged_posts(tag, self.request.user, after, limit + 1)
+        next_link = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            path = reverse("tags-posts", kwargs={"name": tag.name})
+            next_link = request.build_absolute_uri(
+                f"{path}?cursor={encode_cursor(posts[-1])}&page_size={limit}"
+            )
+        serializer = PostSerializer(posts, many=True, context={"request": request})
+        data = {
+            "tag": tag.name,
+            "posts_count": tag.posts_count,
+            "next": next_link,
+            "results": serializer.data,
+        }
+        return Response(data)
+
+    @action(methods=["GET"], detail=False)
+    @cached_response(
+        lambda view, request: f"trending-tags:{request.query_params.get('hours')}",
+        ttl=lambda: settings.TRENDING_TAGS_CACHE_SECONDS,
+        stale_ttl=lambda: settings.TRENDING_TAGS_CACHE_SECONDS,
+    )
+    def trending(self, request):
+        """
+        Tags used the most in the last ?hours= (default 24, at most a week).
+        """
+        hours = request.query_params.get("hours", "24")
+        if not hours.isdigit() or not 1 <= int(hours) <= 168:
+            raise ParseError("hours must be between 1 and 168")
+        data = {
+            "hours": int(hours),
+            "trending": [
+                {"tag": name, "uses": uses} for name, uses in trending_tags(int(hours))
+            ],
+        }
+        return Response(data)
+
+
 class FollowViewSet(viewsets.ModelViewSet):
     """
     Follow or unfollow a user
@@ -178,8 +395,8 @@ class FollowViewSet(viewsets.ModelViewSet):
     http_method_names = ["post", "delete"]  # Allow only POST and DELETE methods
 
     def get_queryset(self):
-        # Return follow details for a given user
-        return Follow.objects.filter(created_by=self.request.user)
+        # Return follow details for a given user (stored on their shard)
+        return self.request.user.followings.all()
 
     def perform_create(self, serializer):
         # Get the user the authenticated user wants to follow using the following_id
@@ -212,8 +429,8 @@ class MutualFollowersViewSet(viewsets.ViewSet):
         user_id = self.kwargs.get("pk")  # Get user_id from URL
         user = get_object_or_404(User, id=user_id)
 
-        # mutual followers query
-        mutuals = (
+        # mutual followers query; a follower's follows all live on one shard
+        mutuals = shard_union(
             Follow.objects.filter(following__in=[self.request.user, user])
             .values("created_by__username")
             .annotate(follow_count=Count("following"))
@@ -228,6 +445,38 @@ class MutualFollowersViewSet(viewsets.ViewSet):
         return Response(data)
 
 
+class RelationshipsViewSet(viewsets.ViewSet):
+    """
+    Whether the authenticated user follows, and is followed by, each of the
+    users listed in ?ids=, in the order they were listed.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        try:
+            ids = [
+                uuid.UUID(value)
+                for value in parse_ids(request.query_params.get("ids", ""))
+            ]
+        except ValueError:
+            raise ParseError("ids must be user ids")
+
+        statuses = relationship_statuses(self.request.user, ids)
+        data = {
+            "relationships": [
+                {
+                    "id": user_id,
+                    "following": statuses[user_id][0],
+                    "followed_by": statuses[user_id][1],
+                    "mutual": all(statuses[user_id]),
+                }
+                for user_id in ids
+            ]
+        }
+        return Response(data)
+
+
 class FollowSuggestionsViewSet(viewsets.ViewSet):
     """
     View to show suggested users for the authenticated user to follow.
@@ -235,51 +484,58 @@ class FollowSuggestionsViewSet(viewsets.ViewSet):
 
     permission_classes = [permissions.IsAuthenticated]
 
+    @cached_response(
+        viewer_key("suggestions"),
+        ttl=lambda: settings.SUGGESTIONS_CACHE_SECONDS,
+        stale_ttl=lambda: settings.SUGGESTIONS_CACHE_SECONDS,
+    )
     def list(self, request, *args, **kwargs):
         # TO DO: improve algorithm later
 
         user = self.request.user
 
-        # Get IDs of users the current user is following
-        user_following_ids = Follow.objects.filter(created_by=user).values_list(
-            "following_id", flat=True
+        # Get IDs of users the current user is following (stored on their shard)
+        user_following_ids = list(
+            user.followings.order_by().values_list("following_id", flat=True)
         )
 
         # Find second-degree connections (followings of followings) that the user does not follow
-        followings_of_followings = (
+        followings_of_followings = shard_union(
             Follow.objects.filter(created_by__in=user_following_ids)
             .exclude(following__in=user_following_ids)
             .exclude(following=user)
-            .select_related("following")
+            .order_by()
             .values_list("following", flat=True)
         )
 
         # Find followers of those the user is following
-        followers_of_followings = (
+        followers_of_followings = shard_union(
             Follow.objects.filter(following__in=user_following_ids)
             .exclude(created_by__in=user_following_ids)
             .exclude(created_by=user)
-            .select_related("created_by")
+            .order_by()
             .values_list("created_by", flat=True)
         )
 
         # Get mutual followers of the user's followers
-        user_follower_ids = Follow.objects.filter(following=user).values_list(
-            "created_by_id", flat=True
+        user_follower_ids = shard_union(
+            Follow.objects.filter(following=user)
+            .order_by()
+            .values_list("created_by_id", flat=True)
         )
-        mutual_followers_of_followers = (
+        mutual_followers_of_followers = shard_union(
             Follow.objects.filter(created_by__in=user_follower_ids)
             .exclude(following__in=user_following_ids)
             .exclude(following=user)
-            .select_related("following")
+            .order_by()
             .values_list("following", flat=True)
         )
 
         # Collect all suggested user IDs
         suggestion_ids = (
-            set(followings_of_followings)
-            | set(followers_of_followings)
-            | set(mutual_followers_of_followers)
+            followings_of_followings
+            | followers_of_followings
+            | mutual_followers_of_followers
         )
 
         # Fetch user objects for unique suggestion IDs
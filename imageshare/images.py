@@ -0,0 +1,147 @@
+"""
+Image ingest for posts.
+
+Uploads are only checked inline: reading the image header is enough to
+reject non-images and decompression bombs and to learn the format and size.
+A background task then does the expensive part once per image: full decode,
+applying the EXIF orientation, converting to sRGB and re-encoding without
+metadata (EXIF with GPS, embedded thumbnails, ICC profiles, text chunks),
+and renders the ~20px placeholder embedded in feed payloads.
+"""
+
+# Standard Library Imports
+import base64
+import io
+import os
+
+# Django Imports
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# Third-Party Package Imports
+from PIL import Image, ImageCms, ImageOps, UnidentifiedImageError
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 85, "method": 4},
+}
+SRGB = ImageCms.createProfile("sRGB")
+PLACEHOLDER_SIZE = 20
+# Some encoders fall back to these entries of Image.info when saving
+METADATA_KEYS = ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp", "comment")
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def read_header(file):
+    """
+    Identify an uploaded image from its header, without decoding the pixels.
+    Returns the fields recorded on the post.
+    """
+    if file.size > settings.IMAGE_MAX_UPLOAD_BYTES:
+        raise InvalidImage(
+            f"Images must be smaller than {settings.IMAGE_MAX_UPLOAD_BYTES} bytes."
+        )
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise InvalidImage("Upload a valid image.")
+    finally:
+        file.seek(position)
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidImage(f"{image_format} images are not supported.")
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise InvalidImage(
+            f"Images must be at most {settings.IMAGE_MAX_PIXELS} pixels."
+        )
+    return {
+        "width": width,
+        "height": height,
+        "aspect_ratio": aspect_ratio(width, height),
+        "byte_size": file.size,
+        "image_format": image_format,
+    }
+
+
+def aspect_ratio(width, height):
+    return round(width / height, 4)
+
+
+def _to_srgb(image):
+    profile = image.info.get("icc_profile")
+    if not profile:
+        return image
+    try:
+        return ImageCms.profileToProfile(
+            image,
+            ImageCms.ImageCmsProfile(io.BytesIO(profile)),
+            SRGB,
+            outputMode="RGBA" if image.mode in ("RGBA", "LA", "PA") else "RGB",
+        )
+    except ImageCms.PyCMSError:
+        # An unreadable profile is dropped along with the other metadata
+        return image
+
+
+def placeholder(image):
+    """
+    Tiny JPEG preview of an image as a data URI, for clients to stretch (and
+    blur) while the real image loads.
+    """
+    preview = image.copy()
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    if preview.mode in ("RGBA", "LA", "PA", "P"):
+        preview = preview.convert("RGBA")
+        background = Image.new("RGBA", preview.size, "white")
+        preview = Image.alpha_composite(background, preview)
+    buffer = io.BytesIO()
+    preview.convert("RGB").save(buffer, format="JPEG", quality=50)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def normalize(data):
+    """
+    Decode an image, apply its EXIF orientation and re-encode it without
+    metadata. Returns (bytes, format, upright image); animated images keep
+    their original bytes and return their first frame.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image_format = image.format
+        if getattr(image, "is_animated", False):
+            return data, image_format, image.copy()
+        image = _to_srgb(ImageOps.exif_transpose(image))
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        for key in METADATA_KEYS:
+            image.info.pop(key, None)
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **SAVE_OPTIONS.get(image_format, {}))
+        return buffer.getvalue(), image_format, image
+
+
+def process_image(name):
+    """
+    Normalize a stored image and save it under a new name. Returns the new
+    name and the fields recorded on the post.
+    """
+    with default_storage.open(name) as file:
+        data, image_format, image = normalize(file.read())
+    stem, _ = os.path.splitext(name)
+    extension = {"JPEG": ".jpg"}.get(image_format, f".{image_format.lower()}")
+    new_name = default_storage.save(f"{stem}{extension}", ContentFile(data))
+    width, height = image.size
+    return new_name, {
+        "width": width,
+        "height": height,
+        "aspect_ratio": aspect_ratio(width, height),
+        "byte_size": len(data),
+        "image_format": image_format,
+        "placeholder": placeholder(image),
+    }
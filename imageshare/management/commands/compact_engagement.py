@@ -0,0 +1,27 @@
+# Standard Library Imports
+from datetime import timedelta
+
+# Django Imports
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Project-Specific Imports
+from imageshare.rollups import compact_engagement
+from isa.sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = "Fold hourly engagement buckets older than --keep-days into daily buckets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=7,
+            help="Days of hourly resolution to keep",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["keep_days"])
+        removed = sum(compact_engagement(before, using=alias) for alias in all_shards())
+        self.stdout.write(f"Compacted {removed} hourly buckets into daily buckets")
@@ -0,0 +1,36 @@
+# Django Imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Project-Specific Imports
+from isa.sharding import ring, sharding_enabled
+from users.models import ShardAssignment, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Record every user's current hash ring shard in the shard directory. "
+        "Run before changing DJANGO_DB_SHARDS so existing users stay where their "
+        "rows are, then move them with `reshard_user`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("Sharding is not enabled (DJANGO_DB_SHARDS)")
+        user_ids = (
+            User.objects.filter(shard_assignment__isnull=True)
+            .values_list("id", flat=True)
+            .iterator(chunk_size=options["batch_size"])
+        )
+        frozen = len(
+            ShardAssignment.objects.bulk_create(
+                (
+                    ShardAssignment(user_id=user_id, shard=ring().node_for(user_id))
+                    for user_id in user_ids
+                ),
+                batch_size=options["batch_size"],
+            )
+        )
+        self.stdout.write(f"Recorded shard assignments for {frozen} users")
@@ -0,0 +1,40 @@
+# Standard Library Imports
+from datetime import timedelta
+
+# Django Imports
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Project-Specific Imports
+from imageshare.models import Post, TagActivity
+from imageshare.rollups import hour_bucket
+from imageshare.tags import sync_post_tags
+from isa.sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Index the hashtags of posts captioned before hashtags were parsed, and "
+        "drop trending buckets older than --prune-days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune-days",
+            type=int,
+            default=7,
+            help="Days of trending buckets to keep",
+        )
+
+    def handle(self, *args, **options):
+        indexed = 0
+        for alias in all_shards():
+            posts = Post.objects.using(alias).filter(caption__contains="#")
+            for post in posts.only("id", "caption", "created_at").iterator():
+                sync_post_tags(post)
+                indexed += 1
+        before = hour_bucket(timezone.now() - timedelta(days=options["prune_days"]))
+        pruned, _ = TagActivity.objects.filter(bucket__lt=before).delete()
+        self.stdout.write(
+            f"Indexed the tags of {indexed} posts, pruned {pruned} trending buckets"
+        )
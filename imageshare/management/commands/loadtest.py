@@ -0,0 +1,402 @@
+# Standard Library Imports
+import asyncio
+import importlib.util
+import io
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Django Imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Third-Party Package Imports
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Project-Specific Imports
+from imageshare.models import Post
+from isa.sharding import scatter
+from isa.stats import percentile
+from users.models import User
+
+DEFAULT_MIX = "feed=50,like=25,upload=5,suggestions=20"
+SCENARIOS = ("feed", "like", "upload", "suggestions")
+# The like scenario picks among this many of the newest posts
+HOT_POSTS = 50
+
+
+def parse_mix(value):
+    """
+    Parse a scenario mix such as "feed=50,like=25" into a weights dict.
+    """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f"Unknown scenario {name!r}, choose from {SCENARIOS}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid weight for scenario {name!r}: {weight!r}")
+    if not any(mix.values()):
+        raise CommandError("At least one scenario needs a positive weight")
+    return mix
+
+
+def summarise(samples, elapsed):
+    """
+    Reduce (scenario, latency_seconds, ok, status) samples to per-scenario stats.
+    """
+    grouped = defaultdict(list)
+    for sample in samples:
+        grouped[sample[0]].append(sample)
+
+    summary = {}
+    for scenario, rows in sorted(grouped.items()):
+        latencies = sorted(row[1] * 1000 for row in rows)
+        errors = sum(1 for row in rows if not row[2])
+        statuses = defaultdict(int)
+        for row in rows:
+            statuses[str(row[3])] += 1
+        summary[scenario] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed, 2) if elapsed else None,
+            "error_rate": round(errors / len(rows), 4),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "statuses": dict(statuses),
+        }
+    return summary
+
+
+def _upload_body(boundary):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 80, 40)).save(buffer, format="JPEG")
+    return b"".join(
+        [
+            f"--{boundary}\r\n".encode(),
+            b'Content-Disposition: form-data; name="caption"\r\n\r\nload test\r\n',
+            f"--{boundary}\r\n".encode(),
+            b'Content-Disposition: form-data; name="image"; filename="load.jpg"\r\n',
+            b"Content-Type: image/jpeg\r\n\r\n",
+            buffer.getvalue(),
+            f"\r\n--{boundary}--\r\n".encode(),
+        ]
+    )
+
+
+class HTTPClient:
+    """
+    Minimal keep-alive HTTP/1.1 client on top of asyncio streams, so the load
+    generator has no dependencies beyond the standard library.
+    """
+
+    def __init__(self, host, port, token):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b"", content_type=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        headers = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Authorization: Bearer {self.token}",
+            "Connection: keep-alive",
+            f"Content-Length: {len(body)}",
+        ]
+        if content_type:
+            headers.append(f"Content-Type: {content_type}")
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        length, chunked, keep_alive = 0, False, True
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                keep_alive = False
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await self.reader.readexactly(length)
+        if not keep_alive:
+            await self.close()
+        return status
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a concurrent mix of feed, like, upload and follow-suggestion "
+        "requests against the app and report latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server. If omitted, a server is started.",
+        )
+        parser.add_argument(
+            "--server",
+            choices=["wsgi", "asgi"],
+            default="wsgi",
+            help="Entry point to start when --url is not given",
+        )
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--duration", type=float, default=30.0)
+        parser.add_argument("--mix", default=DEFAULT_MIX)
+        parser.add_argument(
+            "--users", type=int, default=200, help="Seeded users to log in as"
+        )
+        parser.add_argument("--prefix", default="seed_")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="loadtest-results")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options["mix"])
+        if (
+            not options["url"]
+            and options["server"] == "asgi"
+            and importlib.util.find_spec("uvicorn") is None
+        ):
+            # Not a project dependency: only load tests of the ASGI entry point need it
+            raise CommandError(
+                "--server asgi runs the app with uvicorn, which is not installed; "
+                "install it with `pip install uvicorn` or pass --url."
+            )
+        tokens = [
+            str(RefreshToken.for_user(user).access_token)
+            for user in User.objects.filter(
+                username__startswith=options["prefix"]
+            ).order_by("username")[: options["users"]]
+        ]
+        if not tokens:
+            raise CommandError(
+                f"No users prefixed with {options['prefix']!r}; run `seed` first."
+            )
+        # The newest posts of every shard, newest first overall
+        newest = itertools.chain.from_iterable(
+            scatter(
+                lambda alias: list(
+                    Post.objects.using(alias)
+                    .order_by("-created_at")
+                    .values_list("created_at", "id")[:HOT_POSTS]
+                )
+            )
+        )
+        self.hot_post_ids = [
+            str(post_id) for _, post_id in sorted(newest, reverse=True)[:HOT_POSTS]
+        ]
+        if not self.hot_post_ids and mix.get("like"):
+            raise CommandError("No posts to like; run `seed` first.")
+
+        server = None
+        if options["url"]:
+            url = urlsplit(options["url"])
+            host, port = url.hostname, url.port or 80
+        else:
+            host, port = "127.0.0.1", self.free_port()
+            server = self.start_server(options["server"], host, port)
+        started_at = timezone.now()
+        try:
+            started = time.perf_counter()
+            samples = asyncio.run(self.run_clients(host, port, tokens, mix, options))
+            elapsed = time.perf_counter() - started
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        summary = summarise(samples, elapsed)
+        self.report(summary, elapsed)
+        self.write_results(summary, started_at, elapsed, options)
+
+    async def run_clients(self, host, port, tokens, mix, options):
+        deadline = time.perf_counter() + options["duration"]
+        samples = []
+        names, weights = list(mix), list(mix.values())
+
+        async def client(index):
+            rng = random.Random(f"{options['seed']}:{index}")
+            http = HTTPClient(host, port, tokens[index % len(tokens)])
+            try:
+                while time.perf_counter() < deadline:
+                    scenario = rng.choices(names, weights)[0]
+                    await getattr(self, f"scenario_{scenario}")(http, rng, samples)
+            finally:
+                await http.close()
+
+        await asyncio.gather(*(client(i) for i in range(options["clients"])))
+        return samples
+
+    async def timed(self, samples, scenario, http, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            status = await http.request(method, path, **kwargs)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            await http.close()
+            status = "connection-error"
+        latency = time.perf_counter() - started
+        ok = isinstance(status, int) and status < 400
+        samples.append((scenario, latency, ok, status))
+        return status
+
+    async def scenario_feed(self, http, rng, samples):
+        # Scroll the first few pages of the followed feed
+        for page in range(1, rng.randint(1, 3) + 1):
+            await self.timed(
+                samples, "feed", http, "GET", f"/imageshare/posts/followed?page={page}"
+            )
+
+    async def scenario_like(self, http, rng, samples):
+        post_id = rng.choice(self.hot_post_ids[:10])
+        await self.timed(
+            samples, "like", http, "POST", f"/imageshare/post/{post_id}/like"
+        )
+        await self.timed(
+            samples, "like", http, "DELETE", f"/imageshare/post/{post_id}/unlike"
+        )
+
+    async def scenario_upload(self, http, rng, samples):
+        boundary = uuid.uuid4().hex
+        await self.timed(
+            samples,
+            "upload",
+            http,
+            "POST",
+            "/imageshare/posts",
+            body=_upload_body(boundary),
+            content_type=f"multipart/form-data; boundary={boundary}",
+        )
+
+    async def scenario_suggestions(self, http, rng, samples):
+        await self.timed(
+            samples, "suggestions", http, "GET", "/imageshare/follow-suggestions/"
+        )
+
+    def free_port(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def start_server(self, entry_point, host, port):
+        env = {
+            **os.environ,
+            # Throttling would turn most of the load into 429 responses
+            "DJANGO_THROTTLE_ANON_RATE": "1000000/second",
+            "DJANGO_THROTTLE_USER_RATE": "1000000/second",
+        }
+        if entry_point == "asgi":
+            command = [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "isa.asgi:application",
+                "--host",
+                host,
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ]
+        else:
+            command = [
+                sys.executable,
+                "manage.py",
+                "runserver",
+                "--noreload",
+                f"{host}:{port}",
+            ]
+        server = subprocess.Popen(
+            command,
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited early: {' '.join(command)}")
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("Server did not start within 30 seconds")
+
+    def report(self, summary, elapsed):
+        self.stdout.write(f"Ran for {elapsed:.1f}s")
+        self.stdout.write(
+            f"{'scenario':<12}{'reqs':>8}{'rps':>9}{'err%':>8}"
+            f"{'p50':>9}{'p95':>9}{'p99':>9}"
+        )
+        for scenario, stats in summary.items():
+            self.stdout.write(
+                f"{scenario:<12}{stats['requests']:>8}{stats['throughput_rps']:>9}"
+                f"{stats['error_rate'] * 100:>8.2f}{stats['p50_ms']:>9}"
+                f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
+
+    def write_results(self, summary, started_at, elapsed, options):
+        output = Path(options["output"])
+        output.mkdir(parents=True, exist_ok=True)
+        path = output / f"loadtest-{started_at:%Y%m%dT%H%M%S}.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "started_at": started_at.isoformat(),
+                    "elapsed_seconds": round(elapsed, 3),
+                    "clients": options["clients"],
+                    "mix": options["mix"],
+                    "scenarios": summary,
+                },
+                indent=2,
+            )
+        )
+        self.stdout.write(f"Results written to {path}")
@@ -0,0 +1,58 @@
+# Standard Library Imports
+import itertools
+import time
+
+# Django Imports
+from django.core.management.base import BaseCommand
+from django.db import router
+
+# Project-Specific Imports
+from imageshare.models import Post
+from imageshare.tasks import process_post_image
+from isa.sharding import all_shards
+from taskqueue.models import Task
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue image processing (orientation, metadata stripping, re-encoding and "
+        "size recording) for posts whose image has not been processed yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Reprocess every post's image"
+        )
+
+    def handle(self, *args, **options):
+        # Without --all, a post already queued for its current image (e.g. on
+        # upload) is left alone; --all queues every post again, once per run
+        run = f":{time.time_ns()}" if options["all"] else ""
+        queued = 0
+        for alias in all_shards():
+            posts = Post.objects.using(alias).order_by()
+            if not options["all"]:
+                posts = posts.filter(image_processed_at__isnull=True)
+            rows = posts.values_list("id", "image").iterator(chunk_size=BATCH_SIZE)
+            while batch := list(itertools.islice(rows, BATCH_SIZE)):
+                keys = {
+                    post_id: f"post-image:{post_id}:{image}{run}"
+                    for post_id, image in batch
+                }
+                existing = set(
+                    Task.objects.using(router.db_for_write(Task))
+                    .filter(idempotency_key__in=keys.values())
+                    .values_list("idempotency_key", flat=True)
+                )
+                for post_id, key in keys.items():
+                    if key in existing:
+                        continue
+                    process_post_image.enqueue(
+                        post_id=post_id,
+                        using=alias or router.db_for_write(Post),
+                        idempotency_key=key,
+                    )
+                    queued += 1
+        self.stdout.write(f"Queued image processing for {queued} posts")
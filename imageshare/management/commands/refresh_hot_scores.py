@@ -0,0 +1,41 @@
+# Standard Library Imports
+from datetime import timedelta
+
+# Django Imports
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Project-Specific Imports
+from imageshare.models import Post
+from imageshare.ranking import refresh_hot_scores
+from isa.sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount likes and recompute hot scores. Run periodically to repair "
+        "counter drift, or with --all after changing the ranking formula."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Only refresh posts created within this many days",
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Refresh every post regardless of age"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        if not options["all"]:
+            since = timezone.now() - timedelta(days=options["days"])
+            queryset = queryset.filter(created_at__gte=since)
+        refreshed = sum(
+            refresh_hot_scores(queryset, batch_size=options["batch_size"], using=alias)
+            for alias in all_shards()
+        )
+        self.stdout.write(f"Refreshed hot scores for {refreshed} posts")
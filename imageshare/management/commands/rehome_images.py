@@ -0,0 +1,82 @@
+# Standard Library Imports
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Django Imports
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+# Project-Specific Imports
+from imageshare.models import Post
+from isa.sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Move post images stored outside the hash-prefix layout to it, copying "
+        "files in parallel. Posts keep pointing at the old file until the copy "
+        "is complete, and old files are only deleted after --grace-seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Files copied at the same time"
+        )
+        parser.add_argument(
+            "--grace-seconds",
+            type=int,
+            default=300,
+            help="Wait before deleting old files, for cached responses linking them",
+        )
+
+    def copy(self, name):
+        """
+        Copy one file into the sharded layout and return its new name.
+        """
+        directory = Post.image.field.upload_to.rstrip("/")
+        with default_storage.open(name) as file:
+            return default_storage.save(f"{directory}/{posixpath.basename(name)}", file)
+
+    def handle(self, *args, **options):
+        if not hasattr(default_storage, "is_sharded"):
+            raise CommandError("The default storage does not shard paths.")
+        # Images can be shared by several posts (seeded posts), on any shard
+        names = {
+            name
+            for alias in all_shards()
+            for name in Post.objects.using(alias)
+            .exclude(image="")
+            .order_by()
+            .values_list("image", flat=True)
+            .distinct()
+            .iterator()
+            if not default_storage.is_sharded(name)
+        }
+        moved, missing = [], 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            copies = {executor.submit(self.copy, name): name for name in names}
+            # Posts are repointed from this thread as copies finish
+            for future in as_completed(copies):
+                name = copies[future]
+                try:
+                    new_name = future.result()
+                except FileNotFoundError:
+                    missing += 1
+                    continue
+                updated = sum(
+                    Post.objects.using(alias).filter(image=name).update(image=new_name)
+                    for alias in all_shards()
+                )
+                if updated:
+                    moved.append(name)
+                else:
+                    # The image was replaced (e.g. re-encoded) meanwhile
+                    default_storage.delete(new_name)
+
+        time.sleep(options["grace_seconds"] if moved else 0)
+        for name in moved:
+            default_storage.delete(name)
+        self.stdout.write(
+            f"Moved {len(moved)} images into the sharded layout, {missing} missing"
+        )
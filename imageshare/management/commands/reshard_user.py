@@ -0,0 +1,195 @@
+# Standard Library Imports
+import time
+
+# Django Imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+# Project-Specific Imports
+from imageshare.models import (
+    AuthorEngagement,
+    Follow,
+    Like,
+    Post,
+    PostEngagement,
+    PostTag,
+)
+from imageshare.ranking import refresh_hot_scores
+from imageshare.tags import moving_post_tags
+from isa.models import explicit_timestamps
+from isa.sharding import assign_shard, shard_for_user
+from users.models import User
+
+# Copied in dependency order. Rows are matched on the target by their unique
+# fields (the rollups' ids are per database, so by their natural key); a row
+# already there keeps the update fields fresh
+POST_FIELDS = [
+    "caption",
+    "image",
+    "likes_count",
+    "hot_score",
+    "width",
+    "height",
+    "aspect_ratio",
+    "byte_size",
+    "image_format",
+    "placeholder",
+    "image_processed_at",
+]
+ENGAGEMENT_FIELDS = ["likes", "unlikes"]
+OWNED_ROWS = [
+    (Post, "created_by", ["id"], POST_FIELDS),
+    (Like, "post__created_by", ["id"], None),
+    (
+        PostEngagement,
+        "post__created_by",
+        ["post", "bucket", "resolution"],
+        ENGAGEMENT_FIELDS,
+    ),
+    (PostTag, "post__created_by", ["id"], None),
+    (Follow, "created_by", ["id"], None),
+    (
+        AuthorEngagement,
+        "author",
+        ["author", "bucket", "resolution"],
+        ENGAGEMENT_FIELDS,
+    ),
+]
+
+
+def _key(row, unique_fields):
+    return tuple(
+        getattr(row, row._meta.get_field(name).attname) for name in unique_fields
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Move a user's posts, likes and tags on those posts, follows and engagement "
+        "rollups to another shard while the app keeps serving traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("shard", help="Alias of the target shard")
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=settings.SHARD_DIRECTORY_CACHE_SECONDS,
+            help=(
+                "Seconds to wait after switching shards, so processes still "
+                "routing by a cached assignment catch up before the final copy"
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["shard"] not in settings.SHARDS:
+            raise CommandError(f"Unknown shard {options['shard']!r}: {settings.SHARDS}")
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+        source, target = shard_for_user(user.id), options["shard"]
+        if source == target:
+            raise CommandError(f"{user} is already on {target}")
+        self.batch_size = options["batch_size"]
+
+        # 1. Bulk copy while the source still takes writes
+        copied, first_keys = self.copy(user, source, target)
+        # 2. Route new writes to the target
+        assign_shard(user.id, target)
+        # 3. Let cached assignments expire, then copy what was written meanwhile,
+        # without bringing back rows already deleted on the target
+        time.sleep(options["grace"])
+        caught_up, last_keys = self.copy(user, source, target, first_keys)
+        copied += caught_up
+        # 4. Drop the copies of rows deleted on the source in the meantime
+        self.remove_deleted(user, target, first_keys, last_keys)
+        # 5. Drop the source rows and recount likes that landed on either side
+        with transaction.atomic(using=source), moving_post_tags():
+            # Deleting the posts cascades to their likes, engagement and tags,
+            # which live on in the copies (tag counts are kept as they are)
+            Post.objects.using(source).filter(created_by=user).delete()
+            Follow.objects.using(source).filter(created_by=user).delete()
+            AuthorEngagement.objects.using(source).filter(author=user).delete()
+        refresh_hot_scores(
+            Post.objects.filter(created_by=user),
+            batch_size=self.batch_size,
+            using=target,
+        )
+        self.stdout.write(f"Moved {copied} rows of {user} from {source} to {target}")
+
+    def copy(self, user, source, target, copied_before=None):
+        """
+        Copy the user's rows from source to target. Returns the number of rows
+        written and, per model, the keys of every row found on the source.
+
+        Rows whose keys are in `copied_before` but no longer on the target were
+        deleted there after an earlier copy, and are not copied again.
+        """
+        copied, keys = 0, {}
+        with transaction.atomic(using=target), explicit_timestamps(Post, Like, Follow):
+            for model, owner, unique_fields, update_fields in OWNED_ROWS:
+                conflicts = (
+                    {
+                        "update_conflicts": True,
+                        "unique_fields": unique_fields,
+                        "update_fields": update_fields,
+                    }
+                    if update_fields
+                    else {"ignore_conflicts": True}
+                )
+                deleted_on_target = set()
+                if copied_before:
+                    deleted_on_target = copied_before[model] - set(
+                        model.objects.using(target)
+                        .filter(**{owner: user})
+                        .values_list(*unique_fields)
+                    )
+                keys[model] = set()
+                rows = model.objects.using(source).filter(**{owner: user}).order_by()
+                batch = []
+                for row in rows.iterator(chunk_size=self.batch_size):
+                    key = _key(row, unique_fields)
+                    keys[model].add(key)
+                    if key in deleted_on_target:
+                        continue
+                    if unique_fields != ["id"]:
+                        # Ids are assigned by each database
+                        row.pk = None
+                    batch.append(row)
+                    if len(batch) >= self.batch_size:
+                        model.objects.using(target).bulk_create(batch, **conflicts)
+                        copied += len(batch)
+                        batch = []
+                if batch:
+                    model.objects.using(target).bulk_create(batch, **conflicts)
+                    copied += len(batch)
+        return copied, keys
+
+    def remove_deleted(self, user, target, copied_keys, source_keys):
+        """
+        Delete the target copies of rows that were deleted on the source after
+        being copied.
+        """
+        with transaction.atomic(using=target), moving_post_tags():
+            for model, owner, unique_fields, _ in OWNED_ROWS:
+                deleted = copied_keys[model] - source_keys[model]
+                if not deleted:
+                    continue
+                rows = model.objects.using(target).filter(**{owner: user})
+                pks = [
+                    pk
+                    for pk, *key in rows.values_list("pk", *unique_fields)
+                    if tuple(key) in deleted
+                ]
+                rows = model.objects.using(target).filter(pk__in=pks)
+                if model is Post:
+                    # Cascades to the likes, engagement and tags left on the post
+                    rows.delete()
+                else:
+                    # The counters and rollups already saw these deletes on the
+                    # source, so skip the signals
+                    rows._raw_delete(target)
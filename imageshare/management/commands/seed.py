@@ -0,0 +1,338 @@
+# Standard Library Imports
+import io
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import timedelta
+from functools import partial
+
+# Django Imports
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+# Third-Party Package Imports
+from PIL import Image
+
+# Project-Specific Imports
+from imageshare.models import Post, Like, Follow
+from imageshare.ranking import refresh_hot_scores
+from isa.models import explicit_timestamps
+from isa.sharding import all_shards, ring, sharding_enabled
+from users.models import User
+
+# Rows are generated in chunks of users so that every chunk can be produced
+# independently (and in parallel) from the seed alone.
+USERS_PER_CHUNK = 500
+IMAGE_PALETTE_SIZE = 32
+
+
+def _chunk_rng(seed, phase, chunk):
+    return random.Random(f"{seed}:{phase}:{chunk}")
+
+
+def _object_id(seed, kind, *parts):
+    return uuid.uuid5(uuid.NAMESPACE_OID, ":".join(map(str, (seed, kind, *parts))))
+
+
+def _skewed_index(rng, n, skew):
+    """
+    Pick an index in [0, n) with a power-law bias towards low indexes,
+    so that low-numbered users end up popular.
+    """
+    return min(n - 1, int(n * rng.random() ** skew))
+
+
+def _heavy_tailed(rng, mean, cap):
+    """
+    Draw a count with the given mean from a Pareto distribution (alpha=1.5).
+    """
+    return min(cap, int(mean * rng.paretovariate(1.5) / 3))
+
+
+def _users_for_chunk(chunk, start, stop, *, seed, days):
+    rng = _chunk_rng(seed, "users", chunk)
+    return [
+        (_object_id(seed, "user", i), i, rng.random() * days * 86400)
+        for i in range(start, stop)
+    ]
+
+
+def _posts_for_chunk(chunk, start, stop, *, seed, posts_per_user, days):
+    rng = _chunk_rng(seed, "posts", chunk)
+    rows = []
+    for i in range(start, stop):
+        for k in range(rng.randint(0, 2 * posts_per_user)):
+            rows.append(
+                (
+                    _object_id(seed, "post", i, k),
+                    _object_id(seed, "user", i),
+                    rng.randrange(IMAGE_PALETTE_SIZE),
+                    rng.random() * days * 86400,
+                )
+            )
+    return rows
+
+
+def _follows_for_chunk(
+    chunk, start, stop, *, seed, n_users, follows_per_user, skew, days
+):
+    rng = _chunk_rng(seed, "follows", chunk)
+    rows = []
+    for i in range(start, stop):
+        targets = set()
+        for _ in range(_heavy_tailed(rng, follows_per_user, n_users - 1)):
+            target = _skewed_index(rng, n_users, skew)
+            if target != i:
+                targets.add(target)
+        rows.extend(
+            (
+                _object_id(seed, "follow", i, target),
+                _object_id(seed, "user", i),
+                _object_id(seed, "user", target),
+                rng.random() * days * 86400,
+            )
+            for target in sorted(targets)
+        )
+    return rows
+
+
+def _likes_for_chunk(
+    chunk, start, stop, *, seed, n_users, posts_per_user, likes_per_post, skew, days
+):
+    rng = _chunk_rng(seed, "likes", chunk)
+    rows = []
+    posts = _posts_for_chunk(
+        chunk, start, stop, seed=seed, posts_per_user=posts_per_user, days=days
+    )
+    for post_id, author_id, _, post_age in posts:
+        likers = {
+            _skewed_index(rng, n_users, skew)
+            for _ in range(_heavy_tailed(rng, likes_per_post, n_users))
+        }
+        rows.extend(
+            (
+                _object_id(seed, "like", post_id, liker),
+                post_id,
+                _object_id(seed, "user", liker),
+                post_age * rng.random(),
+                author_id,
+            )
+            for liker in sorted(likers)
+        )
+    return rows
+
+
+def _generated_image(index):
+    """
+    Build a tiny JPEG with a colour derived from its palette index.
+    """
+    rng = random.Random(index)
+    colour = tuple(rng.randrange(256) for _ in range(3))
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), colour).save(buffer, format="JPEG", quality=70)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large, deterministic synthetic dataset of users, posts, "
+        "follows and likes using chunked bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--posts-per-user", type=int, default=5)
+        parser.add_argument("--follows-per-user", type=int, default=50)
+        parser.add_argument("--likes-per-post", type=int, default=20)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed for reproducible datasets"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes used to generate rows",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Rows per INSERT"
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=3.0,
+            help="Power-law exponent for popularity (higher is more skewed)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Spread generated timestamps over this many days",
+        )
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--prefix", default="seed_")
+
+    def handle(self, *args, **options):
+        n_users = options["users"]
+        if n_users < 2:
+            raise CommandError("--users must be at least 2")
+        if User.objects.filter(username__startswith=options["prefix"]).exists():
+            raise CommandError(
+                f"Users prefixed with {options['prefix']!r} already exist; "
+                "choose another --prefix or remove them first."
+            )
+
+        self.options = options
+        self.now = timezone.now()
+        chunks = [
+            (chunk, start, min(start + USERS_PER_CHUNK, n_users))
+            for chunk, start in enumerate(range(0, n_users, USERS_PER_CHUNK))
+        ]
+        # Every generated id and random stream derives from this key.
+        seed = f"{options['prefix']}{options['seed']}"
+        days, skew = options["days"], options["skew"]
+
+        image_names = self.create_images()
+        password = make_password(options["password"])
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+
+            def generate(func, **kwargs):
+                # map() yields chunks in submission order, keeping inserts
+                # deterministic however the workers are scheduled.
+                return executor.map(partial(func, seed=seed, **kwargs), *zip(*chunks))
+
+            self.insert(
+                "users",
+                generate(_users_for_chunk, days=days),
+                lambda row: User(
+                    id=row[0],
+                    username=f"{options['prefix']}{row[1]:07d}",
+                    email=f"{options['prefix']}{row[1]:07d}@example.com",
+                    password=password,
+                    date_joined=self.timestamp(row[2]),
+                    created_at=self.timestamp(row[2]),
+                ),
+                User,
+            )
+            self.insert(
+                "posts",
+                generate(
+                    _posts_for_chunk,
+                    posts_per_user=options["posts_per_user"],
+                    days=days,
+                ),
+                lambda row: Post(
+                    id=row[0],
+                    created_by_id=row[1],
+                    image=image_names[row[2]],
+                    caption=f"Seeded post #{row[2]}",
+                    created_at=self.timestamp(row[3]),
+                ),
+                Post,
+                owner=lambda row: row[1],
+            )
+            self.insert(
+                "follows",
+                generate(
+                    _follows_for_chunk,
+                    n_users=n_users,
+                    follows_per_user=options["follows_per_user"],
+                    skew=skew,
+                    days=days,
+                ),
+                lambda row: Follow(
+                    id=row[0],
+                    created_by_id=row[1],
+                    following_id=row[2],
+                    created_at=self.timestamp(row[3]),
+                ),
+                Follow,
+                owner=lambda row: row[1],
+            )
+            self.insert(
+                "likes",
+                generate(
+                    _likes_for_chunk,
+                    n_users=n_users,
+                    posts_per_user=options["posts_per_user"],
+                    likes_per_post=options["likes_per_post"],
+                    skew=skew,
+                    days=days,
+                ),
+                lambda row: Like(
+                    id=row[0],
+                    post_id=row[1],
+                    liked_by_id=row[2],
+                    created_at=self.timestamp(row[3]),
+                ),
+                Like,
+                # Likes are stored with the liked post
+                owner=lambda row: row[4],
+            )
+
+        started = time.perf_counter()
+        refreshed = sum(
+            refresh_hot_scores(
+                Post.objects.filter(created_by__username__startswith=options["prefix"]),
+                batch_size=options["batch_size"],
+                using=alias,
+            )
+            for alias in all_shards()
+        )
+        self.stdout.write(
+            f"Ranked {refreshed} posts in {time.perf_counter() - started:.2f}s"
+        )
+
+    def timestamp(self, offset_seconds):
+        return self.now - timedelta(seconds=offset_seconds)
+
+    def create_images(self):
+        """
+        Store a small palette of generated images shared by all seeded posts.
+        """
+        names = []
+        for index in range(IMAGE_PALETTE_SIZE):
+            name = f"posts/seed/{self.options['seed']}-{index}.jpg"
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(_generated_image(index)))
+            names.append(name)
+        return names
+
+    def insert(self, label, chunks, build, model, owner=None):
+        """
+        Insert generated rows chunk by chunk inside a single transaction per
+        database. When sharded, users are copied to every shard and other rows
+        go to the shard of the user returned by `owner`.
+        """
+        started = time.perf_counter()
+        total = 0
+        aliases = all_shards()
+        if model is User and sharding_enabled():
+            aliases = [None, *aliases]
+        with ExitStack() as stack:
+            for alias in aliases:
+                stack.enter_context(transaction.atomic(using=alias))
+            stack.enter_context(explicit_timestamps(model))
+            for rows in chunks:
+                objects = [build(row) for row in rows]
+                if owner is None or not sharding_enabled():
+                    placed = {alias: objects for alias in aliases}
+                else:
+                    # Seeded users have no directory entries, so the ring decides
+                    placed = {alias: [] for alias in aliases}
+                    for row, obj in zip(rows, objects):
+                        placed[ring().node_for(owner(row))].append(obj)
+                for alias, objs in placed.items():
+                    model.objects.using(alias).bulk_create(
+                        objs, batch_size=self.options["batch_size"]
+                    )
+                total += len(rows)
+        self.stdout.write(
+            f"Created {total} {label} in {time.perf_counter() - started:.2f}s"
+        )
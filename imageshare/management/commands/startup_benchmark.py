@@ -0,0 +1,97 @@
+# Standard Library Imports
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+# Django Imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import the WSGI application, then serve one request
+PROBE = """
+import io, json, sys, time
+started = time.perf_counter()
+from isa.wsgi import application
+imported = time.perf_counter()
+path, host = sys.argv[1], sys.argv[2]
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "", "SCRIPT_NAME": "",
+    "SERVER_NAME": host, "SERVER_PORT": "80", "HTTP_HOST": host,
+    "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr, "wsgi.url_scheme": "http",
+    "wsgi.version": (1, 0), "wsgi.multithread": False, "wsgi.multiprocess": True,
+    "wsgi.run_once": False,
+}
+statuses = []
+b"".join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+served = time.perf_counter()
+print(json.dumps({"import": imported - started, "first_request": served - imported,
+                  "status": statuses[0]}))
+"""
+
+
+def slowest_imports(importtime_output, top):
+    """
+    Packages by the time spent importing their own modules (microseconds),
+    from the output of -X importtime.
+    """
+    totals = Counter()
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, _, name = line[len("import time:") :].split("|")
+        totals[name.strip().split(".")[0]] += int(self_time)
+    return totals.most_common(top)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long a fresh process takes to import the WSGI application "
+        "(isa/wsgi.py) and to serve its first request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--settings-module",
+            default=os.environ.get("DJANGO_SETTINGS_MODULE", "isa.settings"),
+            help="Settings to boot with, e.g. isa.production_settings",
+        )
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--path", default="/imageshare/posts")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument(
+            "--top", type=int, default=15, help="Slowest imports to list"
+        )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": options["settings_module"]}
+        results, imports = [], []
+        for _ in range(options["runs"]):
+            process = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", PROBE]
+                + [options["path"], options["host"]],
+                capture_output=True,
+                text=True,
+                env=env,
+                cwd=settings.BASE_DIR,
+            )
+            if process.returncode != 0:
+                raise CommandError(process.stderr.strip().splitlines()[-1])
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+            imports = slowest_imports(process.stderr, options["top"])
+
+        self.stdout.write(
+            f"{options['settings_module']}, {options['runs']} runs, "
+            f"GET {options['path']} -> {results[-1]['status']}"
+        )
+        for phase in ("import", "first_request"):
+            timings = sorted(result[phase] * 1000 for result in results)
+            self.stdout.write(
+                f"{phase.replace('_', ' '):>14}: median {statistics.median(timings):.1f} ms"
+                f"  min {timings[0]:.1f} ms  max {timings[-1]:.1f} ms"
+            )
+        self.stdout.write("Slowest packages to import:")
+        for name, microseconds in imports:
+            self.stdout.write(f"  {microseconds / 1000:8.1f} ms  {name}")
@@ -0,0 +1,55 @@
+# Standard Library Imports
+from collections import Counter
+from datetime import timedelta
+
+# Django Imports
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+# Project-Specific Imports
+from imageshare.models import Like, Post
+from imageshare.tasks import warm_user_caches
+from isa.sharding import scatter
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue cache warming (first feed page, follow suggestions, profile) for "
+        "the users who posted and liked the most recently"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--days", type=int, default=7, help="How far back activity is counted"
+        )
+        parser.add_argument(
+            "--inline",
+            action="store_true",
+            help="Warm in this process instead of queueing tasks",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+        activity = Counter()
+        for model, column in ((Post, "created_by"), (Like, "liked_by")):
+            for rows in scatter(
+                lambda alias: list(
+                    model.objects.using(alias)
+                    .filter(created_at__gte=since)
+                    .order_by()
+                    .values_list(column)
+                    .annotate(count=Count("pk"))
+                )
+            ):
+                activity.update(dict(rows))
+
+        user_ids = [user_id for user_id, _ in activity.most_common(options["users"])]
+        for user_id in user_ids:
+            if options["inline"]:
+                warm_user_caches(user_id=user_id)
+            else:
+                warm_user_caches.enqueue(user_id=user_id)
+        verb = "Warmed" if options["inline"] else "Queued warming for"
+        self.stdout.write(f"{verb} {len(user_ids)} users")
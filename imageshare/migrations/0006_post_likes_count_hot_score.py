@@ -0,0 +1,54 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:32
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_hot_scores(apps, schema_editor):
+    Post = apps.get_model("imageshare", "Post")
+    db_alias = schema_editor.connection.alias
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    posts = Post.objects.using(db_alias).annotate(total_likes=models.Count("likes"))
+    for post in posts.iterator(chunk_size=1000):
+        order = math.log10(max(post.total_likes, 1))
+        seconds = (post.created_at - epoch).total_seconds()
+        Post.objects.using(db_alias).filter(pk=post.pk).update(
+            likes_count=post.total_likes,
+            hot_score=round(order + seconds / 45000, 7),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("imageshare", "0005_follow_unique_follow"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="hot_score",
+            field=models.FloatField(
+                default=0,
+                help_text="Time-decayed popularity used to rank the post list",
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Number of likes, maintained on like and unlike"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-hot_score", "-created_at"], name="post_hot_idx"
+            ),
+        ),
+        migrations.RunPython(populate_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("imageshare", "0006_post_likes_count_hot_score"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthorEngagement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("bucket", models.DateTimeField(help_text="Start of the time bucket")),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("unlikes", models.PositiveIntegerField(default=0)),
+                (
+                    "author",
+                    models.ForeignKey(
+                        help_text="Author of the engaged posts",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="engagement",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Author engagement",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("author", "bucket", "resolution"),
+                        name="unique_author_engagement",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="PostEngagement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("bucket", models.DateTimeField(help_text="Start of the time bucket")),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("unlikes", models.PositiveIntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        help_text="Post the engagement belongs to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="engagement",
+                        to="imageshare.post",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Post engagement",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "bucket", "resolution"),
+                        name="unique_post_engagement",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("imageshare", "0007_engagement_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["following", "created_by"], name="follow_followers_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["post", "created_at", "id"], name="like_post_recent_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["created_by", "-created_at"], name="post_author_recent_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("imageshare", "0008_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="byte_size",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="image_format",
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="image_processed_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the image was oriented, stripped of metadata and re-encoded",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("imageshare", "0009_post_image_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="aspect_ratio",
+            field=models.FloatField(
+                blank=True,
+                help_text="Width / height, for laying out the feed",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="placeholder",
+            field=models.TextField(
+                blank=True,
+                help_text="~20px JPEG preview as a data URI, painted before the image",
+            ),
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.1.15 on 2026-10-19 15:22
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("imageshare", "0010_post_placeholder"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Lowercase, no #", max_length=64, unique=True
+                    ),
+                ),
+                (
+                    "posts_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of posts tagged, maintained as tags change",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Tags",
+            },
+        ),
+        migrations.CreateModel(
+            name="PostTag",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        help_text="Creation time of the post, for listing a tag's newest posts"
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        help_text="Post whose caption has the tag",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="post_tags",
+                        to="imageshare.post",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        help_text="Tag used in the caption",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="post_tags",
+                        to="imageshare.tag",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Post tags",
+                "indexes": [
+                    models.Index(
+                        fields=["tag", "-created_at", "-post"],
+                        name="post_tag_recent_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "tag"), name="unique_post_tag"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TagActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField(help_text="Start of the hour")),
+                ("uses", models.PositiveIntegerField(default=0)),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        help_text="Tag that was used",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        to="imageshare.tag",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Tag activity",
+                "indexes": [
+                    models.Index(fields=["bucket", "tag"], name="tag_activity_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("tag", "bucket"), name="unique_tag_activity"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,10 +1,14 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-from isa.models import TimeStampedUUIDModel
+from isa.models import TimeStampedUUIDModel, UUIDModel
+from isa.sharding import ShardedQuerySet
 
 from users.models import User
 
+from .ranking import hot_score
+
 
 class Post(TimeStampedUUIDModel):
     """
@@ -21,14 +25,51 @@ class Post(TimeStampedUUIDModel):
         on_delete=models.CASCADE,
         help_text="User who created the post",
     )
+    likes_count = models.PositiveIntegerField(
+        default=0, help_text="Number of likes, maintained on like and unlike"
+    )
+    hot_score = models.FloatField(
+        default=0, help_text="Time-decayed popularity used to rank the post list"
+    )
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    aspect_ratio = models.FloatField(
+        null=True, blank=True, help_text="Width / height, for laying out the feed"
+    )
+    byte_size = models.PositiveIntegerField(null=True, blank=True)
+    image_format = models.CharField(max_length=10, blank=True)
+    placeholder = models.TextField(
+        blank=True,
+        help_text="~20px JPEG preview as a data URI, painted before the image",
+    )
+    image_processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the image was oriented, stripped of metadata and re-encoded",
+    )
+
+    objects = ShardedQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Posts"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-hot_score", "-created_at"], name="post_hot_idx"),
+            # Followed feed: posts by a set of authors, newest first
+            models.Index(
+                fields=["created_by", "-created_at"], name="post_author_recent_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.caption[:30]}... by {self.created_by.username}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # created_at is only stamped during the insert, at (almost) this time
+            self.hot_score = hot_score(self.likes_count, timezone.now())
+        super().save(*args, **kwargs)
+
     @property
     def sharable_link(self):
         return f"{settings.BASE_URL}/posts/{str(self.id)}"
@@ -52,12 +93,20 @@ class Like(TimeStampedUUIDModel):
         help_text="User who liked the post",
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Likes"
         ordering = ["-created_at"]
         constraints = [
             models.UniqueConstraint(fields=["post", "liked_by"], name="unique_like")
         ]
+        indexes = [
+            # Likers of a post in the (created_at, id) cursor order
+            models.Index(
+                fields=["post", "created_at", "id"], name="like_post_recent_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.liked_by.username} liked {self.post.caption[:30]}..."
@@ -81,6 +130,8 @@ class Follow(TimeStampedUUIDModel):
         help_text="User who is being followed",
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Follows"
         ordering = ["-created_at"]
@@ -89,6 +140,155 @@ class Follow(TimeStampedUUIDModel):
                 fields=["created_by", "following"], name="unique_follow"
             )
         ]
+        indexes = [
+            # Followers of a user; unique_follow already covers the followings side
+            models.Index(
+                fields=["following", "created_by"], name="follow_followers_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.created_by.username} followed {self.following.username}"
+
+
+class EngagementBucket(models.Model):
+    """
+    Abstract model holding like/unlike counts for one time bucket
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+    RESOLUTION_CHOICES = [(HOUR, "Hour"), (DAY, "Day")]
+
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the time bucket")
+    likes = models.PositiveIntegerField(default=0)
+    unlikes = models.PositiveIntegerField(default=0)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+
+class PostEngagement(EngagementBucket):
+    """
+    Model representing hourly or daily engagement rollups for a post
+    """
+
+    post = models.ForeignKey(
+        Post,
+        related_name="engagement",
+        on_delete=models.CASCADE,
+        help_text="Post the engagement belongs to",
+    )
+
+    class Meta:
+        verbose_name_plural = "Post engagement"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "bucket", "resolution"],
+                name="unique_post_engagement",
+            )
+        ]
+
+
+class AuthorEngagement(EngagementBucket):
+    """
+    Model representing hourly or daily engagement rollups across an author's posts
+    """
+
+    author = models.ForeignKey(
+        User,
+        related_name="engagement",
+        on_delete=models.CASCADE,
+        help_text="Author of the engaged posts",
+    )
+
+    class Meta:
+        verbose_name_plural = "Author engagement"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["author", "bucket", "resolution"],
+                name="unique_author_engagement",
+            )
+        ]
+
+
+class Tag(TimeStampedUUIDModel):
+    """
+    Model representing a hashtag used in post captions
+    """
+
+    name = models.CharField(max_length=64, unique=True, help_text="Lowercase, no #")
+    posts_count = models.PositiveIntegerField(
+        default=0, help_text="Number of posts tagged, maintained as tags change"
+    )
+
+    class Meta:
+        verbose_name_plural = "Tags"
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostTag(UUIDModel):
+    """
+    Model representing a hashtag in a post's caption
+    """
+
+    post = models.ForeignKey(
+        Post,
+        related_name="post_tags",
+        on_delete=models.CASCADE,
+        help_text="Post whose caption has the tag",
+    )
+    # Tags are global while posts may be sharded, so no cross-database constraint
+    tag = models.ForeignKey(
+        Tag,
+        related_name="post_tags",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        help_text="Tag used in the caption",
+    )
+    created_at = models.DateTimeField(
+        help_text="Creation time of the post, for listing a tag's newest posts"
+    )
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = "Post tags"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "tag"], name="unique_post_tag")
+        ]
+        indexes = [
+            # Posts of a tag in the (created_at, post) keyset order
+            models.Index(
+                fields=["tag", "-created_at", "-post"], name="post_tag_recent_idx"
+            ),
+        ]
+
+
+class TagActivity(models.Model):
+    """
+    Model representing how many posts used a tag in one hour, for trending tags
+    """
+
+    tag = models.ForeignKey(
+        Tag,
+        related_name="activity",
+        on_delete=models.CASCADE,
+        help_text="Tag that was used",
+    )
+    bucket = models.DateTimeField(help_text="Start of the hour")
+    uses = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Tag activity"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tag", "bucket"], name="unique_tag_activity"
+            )
+        ]
+        indexes = [models.Index(fields=["bucket", "tag"], name="tag_activity_idx")]
@@ -0,0 +1,84 @@
+"""
+Hot ranking for posts.
+
+The score follows Reddit's "hot" formula: the order of magnitude of the likes
+plus the post's age measured in 12.5 hour steps from a fixed epoch. A post
+needs ten times the likes to outrank one published 12.5 hours later, so fresh
+content rises without the stored scores ever having to decay.
+"""
+
+# Standard Library Imports
+import math
+from datetime import datetime, timezone
+
+# Django Imports
+from django.db import models, router, transaction
+from django.db.models import functions
+
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_score(likes_count, created_at):
+    order = math.log10(max(likes_count, 1))
+    seconds = (created_at - HOT_EPOCH).total_seconds()
+    return round(order + seconds / HOT_DECAY_SECONDS, 7)
+
+
+def update_post_likes(post_id, delta, using=None):
+    """
+    Apply a like (+1) or unlike (-1) to the stored counter and hot score.
+    Returns the id of the post's author, or None if the post is gone.
+    """
+    from .models import Post
+
+    using = using or router.db_for_write(Post)
+    with transaction.atomic(using=using):
+        row = (
+            Post.objects.using(using)
+            .select_for_update()
+            .filter(pk=post_id)
+            .values_list("likes_count", "created_at", "created_by_id")
+            .first()
+        )
+        if row is None:
+            return None
+        likes_count = max(row[0] + delta, 0)
+        Post.objects.using(using).filter(pk=post_id).update(
+            likes_count=likes_count, hot_score=hot_score(likes_count, row[1])
+        )
+    return row[2]
+
+
+def refresh_hot_scores(queryset, batch_size=1000, using=None):
+    """
+    Recount likes and recompute hot scores for the posts in `queryset`.
+    Returns the number of posts refreshed.
+    """
+    from .models import Like, Post
+
+    # Read back the counts just written, not a possibly lagging replica
+    queryset = queryset.using(using or router.db_for_write(Post))
+    likes = (
+        Like.objects.filter(post=models.OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(total=models.Count("pk"))
+        .values("total")
+    )
+    queryset.update(
+        likes_count=functions.Coalesce(models.Subquery(likes), 0),
+    )
+
+    refreshed = 0
+    batch = []
+    for post_id, likes_count, created_at in queryset.values_list(
+        "id", "likes_count", "created_at"
+    ).iterator(chunk_size=batch_size):
+        batch.append(Post(id=post_id, hot_score=hot_score(likes_count, created_at)))
+        if len(batch) >= batch_size:
+            refreshed += queryset.bulk_update(batch, ["hot_score"])
+            batch = []
+    if batch:
+        refreshed += queryset.bulk_update(batch, ["hot_score"])
+    return refreshed
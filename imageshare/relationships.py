@@ -0,0 +1,126 @@
+"""
+Relationship status between the authenticated user and a list of users.
+
+Both directions are answered with one query each: the viewer's follows of
+the listed users (on the viewer's shard) and the listed users' follows of the
+viewer (on their shards). Each user's followings can also be cached as a
+Bloom filter for FOLLOW_BLOOM_FILTER_SECONDS. A filter never misses a
+follow, so users it rules out are left out of the queries, and when every
+listed user is ruled out the query is skipped altogether.
+
+Filters are stored under the user's follow generation, a counter in the
+shared cache that every follow or unfollow of theirs bumps. A filter built
+before the latest change is never read again, by any process, so a stale
+filter cannot hide a new follow.
+"""
+
+# Standard Library Imports
+import time
+
+# Django Imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Project-Specific Imports
+from isa.bloom import BloomFilter
+from isa.sharding import shard_union
+
+from .models import Follow
+
+
+def _generation_key(user_id):
+    return f"followings-generation:{user_id}"
+
+
+def _filter_key(user_id, generation):
+    return f"followings-bloom:{user_id}:{generation}"
+
+
+def _bump(user_id):
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Never set, or evicted: start from a value no older filter has
+        cache.add(key, time.time_ns(), None)
+
+
+def forget_followings(user_id, using=None):
+    """
+    Move a user whose followings changed to a new generation, so no process
+    reads their older filters again. Bumped again on commit, in case a reader
+    rebuilt the filter before the change was visible.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id), using=using)
+
+
+def _current_filters(user_ids):
+    """
+    ({user id: generation}, {user id: cached filter of that generation}).
+    """
+    keys = {_generation_key(user_id): user_id for user_id in user_ids}
+    generations = {
+        keys[key]: generation for key, generation in cache.get_many(keys).items()
+    }
+    filter_keys = {
+        _filter_key(user_id, generation): user_id
+        for user_id, generation in generations.items()
+    }
+    filters = {
+        filter_keys[key]: bloom for key, bloom in cache.get_many(filter_keys).items()
+    }
+    return generations, filters
+
+
+def _viewer_followings(viewer, ids, generations, filters):
+    followings = viewer.followings.order_by().values_list("following_id", flat=True)
+    seconds = settings.FOLLOW_BLOOM_FILTER_SECONDS
+    viewer_filter = filters.get(viewer.id)
+    if seconds and viewer_filter is None:
+        # Cold: read all of the viewer's followings once, which answers exactly
+        generation = generations.get(viewer.id)
+        if generation is None:
+            _bump(viewer.id)
+            generation = cache.get(_generation_key(viewer.id))
+        following_ids = set(followings)
+        cache.set(
+            _filter_key(viewer.id, generation), BloomFilter.of(following_ids), seconds
+        )
+        return following_ids & ids
+    candidates = [
+        user_id for user_id in ids if viewer_filter is None or user_id in viewer_filter
+    ]
+    if not candidates:
+        return set()
+    return set(followings.filter(following_id__in=candidates))
+
+
+def _followers_of_viewer(viewer, ids, filters):
+    candidates = [
+        user_id
+        for user_id in ids
+        if user_id not in filters or viewer.id in filters[user_id]
+    ]
+    if not candidates:
+        return set()
+    # Follows are stored with the follower, on any shard
+    return shard_union(
+        Follow.objects.filter(created_by__in=candidates, following=viewer)
+        .order_by()
+        .values_list("created_by_id", flat=True)
+    )
+
+
+def relationship_statuses(viewer, ids):
+    """
+    {user id: (viewer follows them, they follow the viewer)} for each id.
+    """
+    ids = set(ids)
+    generations, filters = {}, {}
+    if settings.FOLLOW_BLOOM_FILTER_SECONDS:
+        generations, filters = _current_filters(ids | {viewer.id})
+    following = _viewer_followings(viewer, ids, generations, filters)
+    followed_by = _followers_of_viewer(viewer, ids, filters)
+    return {user_id: (user_id in following, user_id in followed_by) for user_id in ids}
@@ -0,0 +1,132 @@
+"""
+Time-bucketed engagement rollups.
+
+Every like and unlike increments an hourly bucket for the post and for its
+author. `compact_engagement` later folds old hourly buckets into daily ones,
+so time series stay a short indexed range read however many likes a post has.
+"""
+
+# Standard Library Imports
+from collections import defaultdict
+
+# Django Imports
+from django.db import IntegrityError, router, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+# Project-Specific Imports
+from .models import AuthorEngagement, EngagementBucket, PostEngagement
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _increment(model, lookup, using=None, **counts):
+    """
+    Add `counts` to the bucket matching `lookup`, creating it if needed.
+    """
+    using = using or router.db_for_write(model)
+    updates = {field: F(field) + value for field, value in counts.items()}
+    if model.objects.using(using).filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic(using=using):
+            model.objects.using(using).create(**lookup, **counts)
+    except IntegrityError:
+        # Another request created the bucket in the meantime
+        model.objects.using(using).filter(**lookup).update(**updates)
+
+
+def record_like_event(post_id, author_id, delta, at=None, using=None):
+    """
+    Count a like (delta=1) or unlike (delta=-1) in the hourly buckets.
+    """
+    bucket = hour_bucket(at or timezone.now())
+    field = "likes" if delta > 0 else "unlikes"
+    _increment(
+        PostEngagement,
+        {"post_id": post_id, "resolution": EngagementBucket.HOUR, "bucket": bucket},
+        using,
+        **{field: 1},
+    )
+    _increment(
+        AuthorEngagement,
+        {
+            "author_id": author_id,
+            "resolution": EngagementBucket.HOUR,
+            "bucket": bucket,
+        },
+        using,
+        **{field: 1},
+    )
+
+
+def compact_engagement(before, using=None):
+    """
+    Fold hourly buckets older than the start of `before`'s day into daily buckets.
+    Returns the number of hourly buckets removed.
+    """
+    cutoff = day_bucket(before)
+    removed = 0
+    for model, owner in ((PostEngagement, "post_id"), (AuthorEngagement, "author_id")):
+        alias = using or router.db_for_write(model)
+        with transaction.atomic(using=alias):
+            hourly = model.objects.using(alias).filter(
+                resolution=EngagementBucket.HOUR, bucket__lt=cutoff
+            )
+            totals = (
+                hourly.annotate(day=TruncDay("bucket"))
+                .order_by()
+                .values(owner, "day")
+                .annotate(total_likes=Sum("likes"), total_unlikes=Sum("unlikes"))
+            )
+            for row in totals:
+                _increment(
+                    model,
+                    {
+                        owner: row[owner],
+                        "resolution": EngagementBucket.DAY,
+                        "bucket": row["day"],
+                    },
+                    alias,
+                    likes=row["total_likes"],
+                    unlikes=row["total_unlikes"],
+                )
+            removed += hourly.delete()[0]
+    return removed
+
+
+def post_engagement_series(post_id, resolution, since, until, using=None):
+    """
+    Return [(bucket, likes, unlikes)] for a post in one range read.
+
+    Daily series also include the hourly buckets that have not been compacted
+    yet, folded into their day.
+    """
+    resolutions = [EngagementBucket.HOUR]
+    if resolution == EngagementBucket.DAY:
+        resolutions.append(EngagementBucket.DAY)
+        since = day_bucket(since)
+
+    rows = (
+        PostEngagement.objects.using(using)
+        .filter(post_id=post_id, bucket__gte=since, bucket__lt=until)
+        .filter(resolution__in=resolutions)
+        .order_by("bucket")
+        .values_list("bucket", "likes", "unlikes")
+    )
+    if resolution == EngagementBucket.HOUR:
+        return list(rows)
+
+    days = defaultdict(lambda: [0, 0])
+    for bucket, likes, unlikes in rows:
+        day = days[day_bucket(bucket)]
+        day[0] += likes
+        day[1] += unlikes
+    return [(bucket, likes, unlikes) for bucket, (likes, unlikes) in days.items()]
@@ -1,10 +1,23 @@
 from rest_framework import serializers
+from isa.serializers import SparseModelSerializer
+from users.models import User
+from .images import InvalidImage, read_header
 from .models import Post, Follow
 
 
-class PostSerializer(serializers.ModelSerializer):
+class AuthorSerializer(SparseModelSerializer):
+
+    class Meta:
+        model = User
+        fields = ["id", "username", "first_name", "last_name"]
+
+
+class PostSerializer(SparseModelSerializer):
     created_by = serializers.CharField(source="created_by.username", read_only=True)
-    likes_count = serializers.SerializerMethodField()
+    # Checked from its header only; the full decode runs in process_post_image
+    image = serializers.FileField()
+    likes_count = serializers.IntegerField(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -16,17 +29,52 @@ class PostSerializer(serializers.ModelSerializer):
             "created_at",
             "modified_at",
             "likes_count",
+            "liked_by_me",
+            "width",
+            "height",
+            "aspect_ratio",
+            "byte_size",
+            "image_format",
+            "placeholder",
         ]
+        # ?expand=created_by renders the author as an object instead of a username
+        expandable_fields = {"created_by": AuthorSerializer}
         read_only_fields = [
             "id",
             "created_by",
             "created_at",
             "modified_at",
             "likes_count",
+            "liked_by_me",
+            "width",
+            "height",
+            "aspect_ratio",
+            "byte_size",
+            "image_format",
+            "placeholder",
         ]
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()  # Return the count of likes for the post
+    def validate_image(self, value):
+        try:
+            self._image_metadata = read_header(value)
+        except InvalidImage as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+    def validate(self, attrs):
+        if "image" in attrs:
+            # Provisional until the worker applies the EXIF orientation
+            attrs.update(self._image_metadata, image_processed_at=None, placeholder="")
+        return attrs
+
+    def get_liked_by_me(self, obj):
+        # Views annotate this for the whole page; fall back to a single lookup
+        if hasattr(obj, "liked_by_me"):
+            return obj.liked_by_me
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.likes.filter(liked_by=request.user).exists()
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -0,0 +1,82 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from isa.caching import bump_generation
+
+from .models import Follow, Like, Post, PostTag
+from .ranking import update_post_likes
+from .relationships import forget_followings
+from .tags import count_tag_use, sync_post_tags
+from .tasks import record_engagement
+
+
+def _record_engagement(like, author_id, delta, at, using):
+    # The counter above stays inline so the client reads its own like back;
+    # the rollups can lag behind on the task queue
+    record_engagement.enqueue(
+        post_id=like.post_id,
+        author_id=author_id,
+        delta=delta,
+        at=at,
+        using=using,
+        idempotency_key=f"engagement:{like.pk}:{delta}",
+    )
+
+
+def _deleting_posts(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Post
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    # Authors see their own posts in their cached followed feed straight away
+    bump_generation(instance.created_by_id)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or "caption" in update_fields):
+        sync_post_tags(instance)
+
+
+@receiver(post_save, sender=PostTag)
+def post_tag_created(sender, instance, created, **kwargs):
+    if created:
+        count_tag_use(instance.tag_id, 1)
+
+
+@receiver(post_delete, sender=PostTag)
+def post_tag_deleted(sender, instance, **kwargs):
+    count_tag_use(instance.tag_id, -1)
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, using, **kwargs):
+    bump_generation(instance.liked_by_id)
+    if created:
+        author_id = update_post_likes(instance.post_id, 1, using=using)
+        if author_id is not None:
+            _record_engagement(instance, author_id, 1, instance.created_at, using)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, using, origin=None, **kwargs):
+    bump_generation(instance.liked_by_id)
+    # Likes removed along with their post leave no counter to maintain
+    if not _deleting_posts(origin):
+        author_id = update_post_likes(instance.post_id, -1, using=using)
+        if author_id is not None:
+            _record_engagement(instance, author_id, -1, timezone.now(), using)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, using, **kwargs):
+    # Both users' cached suggestions and profile counts change
+    bump_generation(instance.created_by_id)
+    bump_generation(instance.following_id)
+    forget_followings(instance.created_by_id, using=using)
@@ -0,0 +1,167 @@
+"""
+Hashtags.
+
+Tags are parsed from captions whenever a post is saved and stored as
+`PostTag` rows next to the post (on its shard), carrying the post's creation
+time so a tag's newest posts are a range read of one index. `Tag` rows are
+global and keep a running `posts_count`. Each new use of a tag also bumps its
+hourly `TagActivity` bucket, so trending tags are a sum over the last day's
+buckets instead of a scan of posts.
+"""
+
+# Standard Library Imports
+import base64
+import binascii
+import heapq
+import itertools
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+# Django Imports
+from django.db import IntegrityError, router, transaction
+from django.db.models import Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Project-Specific Imports
+from isa.sharding import all_shards, scatter
+
+from .models import Like, Post, Tag, TagActivity
+from .rollups import _increment, hour_bucket
+
+# Longer runs are not tags at all rather than cut to their first 64 characters
+HASHTAG_RE = re.compile(r"(?<![\w#])#(\w{1,64})(?!\w)")
+_moving = threading.local()
+
+
+def parse_tags(caption):
+    """
+    Lowercase tag names in a caption, without duplicates, in order of use.
+    """
+    return list(
+        dict.fromkeys(match.casefold() for match in HASHTAG_RE.findall(caption))
+    )
+
+
+def _tag(name):
+    alias = router.db_for_write(Tag)
+    tag = Tag.objects.using(alias).filter(name=name).first()
+    if tag is not None:
+        return tag
+    try:
+        with transaction.atomic(using=alias):
+            return Tag.objects.using(alias).create(name=name)
+    except IntegrityError:
+        # Another post created the tag in the meantime
+        return Tag.objects.using(alias).get(name=name)
+
+
+def sync_post_tags(post):
+    """
+    Make the post's PostTag rows match the tags in its caption.
+    """
+    names = set(parse_tags(post.caption))
+    existing = {
+        post_tag.tag_id: post_tag for post_tag in post.post_tags.only("id", "tag_id")
+    }
+    current = {tag.id: tag for tag in map(_tag, names)} if names else {}
+    for tag_id, post_tag in existing.items():
+        if tag_id not in current:
+            post_tag.delete()
+    for tag_id in current.keys() - existing.keys():
+        post.post_tags.create(tag_id=tag_id, created_at=post.created_at)
+
+
+@contextmanager
+def moving_post_tags():
+    """
+    Leave tag counts alone while PostTag rows are deleted only to be kept on
+    another shard.
+    """
+    _moving.active = True
+    try:
+        yield
+    finally:
+        _moving.active = False
+
+
+def count_tag_use(tag_id, delta):
+    """
+    Maintain the tag's post count, and its trending bucket for new uses.
+    """
+    if getattr(_moving, "active", False):
+        return
+    alias = router.db_for_write(Tag)
+    Tag.objects.using(alias).filter(pk=tag_id).update(
+        posts_count=F("posts_count") + delta
+    )
+    if delta > 0:
+        _increment(
+            TagActivity,
+            {"tag_id": tag_id, "bucket": hour_bucket(timezone.now())},
+            alias,
+            uses=delta,
+        )
+
+
+def trending_tags(hours=24, limit=20):
+    """
+    [(name, uses)] of the tags used the most in the last `hours`.
+    """
+    since = hour_bucket(timezone.now() - timedelta(hours=hours))
+    return list(
+        TagActivity.objects.filter(bucket__gte=since)
+        .values("tag__name")
+        .annotate(uses=Sum("uses"))
+        .order_by("-uses", "tag__name")
+        .values_list("tag__name", "uses")[:limit]
+    )
+
+
+def encode_cursor(post):
+    value = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, post id) of a cursor, or None if it is not one of ours.
+    """
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        created_at, post_id = parse_datetime(created_at), uuid.UUID(post_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    return (created_at, post_id) if created_at is not None else None
+
+
+def tagged_posts(tag, viewer, after=None, limit=20):
+    """
+    The newest `limit` posts with the tag, older than the `after` cursor
+    position, read from every shard and merged.
+    """
+    condition = Q(post_tags__tag=tag)
+    if after is not None:
+        created_at, post_id = after
+        condition &= Q(post_tags__created_at__lt=created_at) | Q(
+            post_tags__created_at=created_at, post_tags__post_id__lt=post_id
+        )
+    queryset = (
+        Post.objects.filter(condition)
+        .select_related("created_by")
+        .annotate(
+            liked_by_me=Exists(
+                Like.objects.filter(post=OuterRef("pk"), liked_by=viewer)
+            )
+        )
+        # Same join as the filter: walks post_tag_recent_idx
+        .order_by("-post_tags__created_at", "-post_tags__post_id")
+    )
+    pages = scatter(lambda alias: list(queryset.using(alias)[:limit]), all_shards())
+    merged = heapq.merge(
+        *pages, key=lambda post: (post.created_at, post.id), reverse=True
+    )
+    return list(itertools.islice(merged, limit))
@@ -0,0 +1,59 @@
+# Django Imports
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Project-Specific Imports
+from isa.sharding import all_shards, sharding_enabled
+from taskqueue.queue import task
+
+from . import rollups
+from .images import process_image
+from .models import Post
+from .warming import warm
+from users.models import User
+
+
+@task(priority=-1)
+def record_engagement(post_id, author_id, delta, at, using=None):
+    """
+    Count a like or unlike in the engagement rollups, off the request path.
+    """
+    rollups.record_like_event(
+        post_id, author_id, delta, at=parse_datetime(at), using=using
+    )
+
+
+@task(priority=5)
+def process_post_image(post_id, using=None):
+    """
+    Orient, strip and re-encode a post's uploaded image and record its size.
+    """
+    post = Post.objects.using(using).filter(pk=post_id).only("image").first()
+    if post is None or not post.image:
+        return
+    name, fields = process_image(post.image.name)
+    updated = (
+        Post.objects.using(using)
+        .filter(pk=post_id, image=post.image.name)
+        .update(image=name, image_processed_at=timezone.now(), **fields)
+    )
+    # Keep whichever file the post points at; it may have changed meanwhile
+    old_name = post.image.name if updated else name
+    # Seeded posts share image files, possibly across shards: keep one still
+    # used by another post
+    aliases = all_shards() if sharding_enabled() else [using]
+    if not any(
+        Post.objects.using(alias).filter(image=old_name).exists() for alias in aliases
+    ):
+        default_storage.delete(old_name)
+
+
+@task(priority=-2)
+def warm_user_caches(user_id):
+    """
+    Precompute the first feed page, follow suggestions and profile of a user.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is not None:
+        warm(user)
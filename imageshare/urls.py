@@ -4,6 +4,8 @@ from .api import (
     FollowViewSet,
     MutualFollowersViewSet,
     FollowSuggestionsViewSet,
+    RelationshipsViewSet,
+    TagViewSet,
     PostLikeView,
     PostUnlikeView,
 )
@@ -13,6 +15,7 @@ from rest_framework.routers import DefaultRouter
 router = DefaultRouter(trailing_slash=False)
 router.register(r"posts", PostViewSet, basename="posts")
 router.register(r"follow", FollowViewSet, basename="follow")
+router.register(r"tags", TagViewSet, basename="tags")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -31,6 +34,11 @@ urlpatterns = [
         MutualFollowersViewSet.as_view({"get": "list"}),
         name="mutual-following",
     ),
+    path(
+        "relationships",
+        RelationshipsViewSet.as_view({"get": "list"}),
+        name="relationships",
+    ),
     path(
         "follow-suggestions/",
         FollowSuggestionsViewSet.as_view({"get": "list"}),
@@ -0,0 +1,56 @@
+"""
+Cache warming for users who just signed in.
+
+A sign-in (token obtain / refresh, Google login) queues a task that renders
+the user's first followed feed and hot feed pages, follow suggestions and
+profile through the views themselves, so the entries land in the cache under
+exactly the keys the user's next requests read. The `warm_caches` command does the same ahead of
+time for the most active users.
+"""
+
+# Standard Library Imports
+import logging
+from urllib.parse import urlsplit
+
+# Django Imports
+from django.conf import settings
+from django.core.exceptions import DisallowedHost
+from django.urls import resolve
+
+# Logger Initialization
+logger = logging.getLogger(__name__)
+
+WARM_PATHS = (
+    "/imageshare/posts/followed",
+    "/imageshare/posts",
+    "/imageshare/follow-suggestions/",
+    "/user/me",
+)
+
+
+def warm(user):
+    """
+    Render the cached views of `user` as requested from BASE_URL.
+    """
+    # Imported here: rest_framework.test pulls in django.test, which no
+    # request needs, at the startup of every process loading the tasks
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    base = urlsplit(settings.BASE_URL)
+    factory = APIRequestFactory()
+    for path in WARM_PATHS:
+        request = factory.get(
+            path,
+            SERVER_NAME=base.hostname,
+            SERVER_PORT=str(base.port or (443 if base.scheme == "https" else 80)),
+            secure=base.scheme == "https",
+        )
+        try:
+            request.get_host()
+        except DisallowedHost:
+            # Clients never use this host, so nothing would read the entries
+            logger.warning("Not warming caches: BASE_URL is not in ALLOWED_HOSTS")
+            return
+        force_authenticate(request, user=user)
+        match = resolve(path)
+        match.func(request, *match.args, **match.kwargs)
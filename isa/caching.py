@@ -0,0 +1,194 @@
+"""
+Stampede-safe caching of expensive reads.
+
+`stale_while_revalidate` caches a function's result and protects the
+recomputation from a thundering herd of concurrent callers:
+
+- Single flight: when a value is missing, one caller (holding a short cache
+  lock) computes it while the others wait for its result, checking the
+  shared cache at exponentially growing intervals.
+- Stale while revalidate: once a value is due, one caller refreshes it while
+  the others keep being served the previous value, for up to `stale_ttl`.
+- Probabilistic early expiration ("XFetch"): each read may treat the value as
+  due slightly before it expires, more likely the closer the expiry and the
+  longer the value took to compute, so refreshes of a hot key spread out
+  instead of all landing at the same instant.
+
+Results that are the same for every user (`request_key`) are cached once,
+so a crowd opening the same page costs one computation. Per-user results
+(`viewer_key`) are keyed with the user's cache generation, which their own
+writes replace with a new unique token, so users always read their own
+changes back. The lock and the
+values live in the shared cache, so the single flight holds across processes.
+"""
+
+# Standard Library Imports
+import functools
+import math
+import random
+import time
+import uuid
+from urllib.parse import urlencode
+
+# Django Imports
+from django.core.cache import cache
+
+# Third-Party Package Imports
+from rest_framework.response import Response
+
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 1
+
+
+def _seconds(value):
+    return value() if callable(value) else value
+
+
+def _store(key, compute, ttl, stale_ttl):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    cache.set(key, (value, time.time() + ttl, delta), ttl + stale_ttl)
+    return value
+
+
+def _compute_once(key, compute, ttl, stale_ttl):
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    interval, waited = POLL_INTERVAL, False
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Back off, with jitter, so waiters don't flood the shared cache
+        waited = True
+        time.sleep(interval * random.uniform(0.5, 1))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() > deadline:
+            # The lock holder is stuck or gone; compute without it
+            return _store(key, compute, ttl, stale_ttl)
+    try:
+        # The previous holder may have stored the value just before unlocking
+        entry = cache.get(key) if waited else None
+        return entry[0] if entry is not None else _store(key, compute, ttl, stale_ttl)
+    finally:
+        cache.delete(lock_key)
+
+
+def get_or_compute(key, compute, ttl, stale_ttl=0, beta=1.0):
+    """
+    Cached value of `key`, computed with `compute()` at most once at a time.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return _compute_once(key, compute, ttl, stale_ttl)
+
+    value, expires_at, delta = entry
+    # 1 - random() is in (0, 1], so the early margin is never negative
+    if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+        return value
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Someone else is refreshing it
+        return value
+    try:
+        return _store(key, compute, ttl, stale_ttl)
+    finally:
+        cache.delete(lock_key)
+
+
+def stale_while_revalidate(key, ttl, stale_ttl=0, beta=1.0):
+    """
+    Cache the results of the decorated function under key(*args, **kwargs).
+    `ttl` and `stale_ttl` are seconds, or callables returning seconds; a key
+    of None or a ttl of 0 bypasses the cache.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key, seconds = key(*args, **kwargs), _seconds(ttl)
+            if cache_key is None or not seconds:
+                return func(*args, **kwargs)
+            return get_or_compute(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                seconds,
+                _seconds(stale_ttl),
+                beta,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def cached_response(key, ttl, stale_ttl=0, beta=1.0):
+    """
+    `stale_while_revalidate` for DRF view methods: the response data is cached.
+    """
+
+    def decorator(view):
+        @stale_while_revalidate(key, ttl, stale_ttl, beta)
+        def data(*args, **kwargs):
+            return view(*args, **kwargs).data
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return Response(data(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def _generation_key(user_id):
+    return f"cache-generation:{user_id}"
+
+
+def generation(user_id):
+    key = _generation_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        # Never set, or evicted: start from a value no cached entry is keyed by
+        cache.add(key, uuid.uuid4().hex, None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(user_id):
+    """
+    Invalidate every per-user cached result of a user after they wrote something.
+    A new unique token rather than an increment: concurrent bumps never land on
+    the same value, and an evicted counter never restarts at an old one.
+    """
+    cache.set(_generation_key(user_id), uuid.uuid4().hex, None)
+
+
+def viewer_key(prefix):
+    """
+    Cache key function for view methods: one entry per user, user generation,
+    host (responses hold absolute URLs) and query string.
+    """
+
+    def key(view, request, *args, **kwargs):
+        user_id = request.user.id
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        host = request.get_host()
+        return f"{prefix}:{user_id}:{generation(user_id)}:{host}:{query}"
+
+    return key
+
+
+def request_key(prefix):
+    """
+    Cache key function for view methods whose response is the same for every
+    user: one entry per host and query string.
+    """
+
+    def key(view, request, *args, **kwargs):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return f"{prefix}:{request.get_host()}:{query}"
+
+    return key
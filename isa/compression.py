@@ -0,0 +1,88 @@
+"""
+Response body compression: content negotiation, codecs and levels.
+
+gzip is always available. Brotli (`br`) and Zstandard (`zstd`) are offered
+when the optional `brotli` and `zstandard` packages are installed
+(`poetry install -E compression`); both compress JSON better than gzip at the
+same speed. Responses are dynamic and most are compressed on every request, so
+only fast levels are used, dropping further for large payloads so they do not
+stall the worker.
+"""
+
+# Standard Library Imports
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+# Preferred first when a client accepts several with the same quality
+PREFERENCE = ("br", "zstd", "gzip")
+
+# (largest payload in bytes, level); the last entry covers everything bigger
+LEVELS = {
+    "br": ((256 * 1024, 5), (None, 4)),
+    "zstd": ((256 * 1024, 6), (None, 3)),
+    "gzip": ((256 * 1024, 6), (None, 4)),
+}
+
+CODECS = {
+    # mtime=0 keeps the output identical for identical bodies
+    "gzip": lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+}
+if brotli is not None:
+    CODECS["br"] = lambda data, level: brotli.compress(data, quality=level)
+if zstandard is not None:
+    CODECS["zstd"] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(
+        data
+    )
+
+# Media that is compressed already gains nothing from another pass
+INCOMPRESSIBLE_TYPES = re.compile(
+    r"^(image/(?!svg)|video/|audio/|font/woff|application/"
+    r"(zip|gzip|x-gzip|zstd|x-7z-compressed|x-rar-compressed|pdf|octet-stream))"
+)
+Q_RE = re.compile(r"q=([0-9.]+)")
+
+
+def negotiate(accept_encoding):
+    """
+    The encoding to use for an `Accept-Encoding` header, or None for identity.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        match = Q_RE.search(params)
+        try:
+            accepted[name.strip().lower()] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in CODECS:
+            continue
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def level_for(encoding, size):
+    for limit, level in LEVELS[encoding]:
+        if limit is None or size <= limit:
+            return level
+
+
+def compress(encoding, data):
+    return CODECS[encoding](data, level_for(encoding, len(data)))
+
+
+def is_compressible(content_type):
+    return not INCOMPRESSIBLE_TYPES.match(content_type.lower())
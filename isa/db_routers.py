@@ -0,0 +1,75 @@
+"""
+Database routing for shards and read replicas.
+
+Reads go to a randomly chosen replica from `DATABASE_REPLICAS` unless the
+current request is pinned to the primary: requests that write are pinned for
+their whole duration, and `ReplicaPinningMiddleware` keeps a client pinned for
+`REPLICA_PIN_SECONDS` after a write so it always reads its own writes.
+
+With `SHARDS` configured, `ShardRouter` runs first and sends sharded models to
+the shard owning the instance involved (see `isa.sharding`).
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from isa import sharding
+
+_pinned_to_primary = ContextVar("pinned_to_primary", default=False)
+
+
+def pin_to_primary():
+    """
+    Send every read in the current context to the primary. Returns a token
+    for `unpin`.
+    """
+    return _pinned_to_primary.set(True)
+
+
+def unpin(token):
+    _pinned_to_primary.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if (
+            not replicas
+            # The database cache must read what was just written to it
+            or model._meta.app_label == "django_cache"
+            or _pinned_to_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ShardRouter:
+    def _shard(self, model, **hints):
+        if (
+            not sharding.sharding_enabled()
+            # The database cache's entry model has a minimal _meta, without
+            # label_lower
+            or f"{model._meta.app_label}.{model._meta.model_name}"
+            not in sharding.SHARDED_MODELS
+            or "instance" not in hints
+        ):
+            return None
+        return sharding.shard_for_instance(hints["instance"])
+
+    db_for_read = _shard
+    db_for_write = _shard
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Users are copied to every shard, so relations across aliases are fine
+        return True
@@ -1,6 +1,5 @@
 # Standard Library Imports
 import json
-import requests
 from urllib.parse import urljoin
 
 # Django and Django Rest Framework Imports
@@ -13,12 +12,10 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 
 # Third-Party Package Imports
-from password_generator import PasswordGenerator
-from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
-from allauth.socialaccount.providers.oauth2.client import OAuth2Client
-from dj_rest_auth.registration.views import SocialLoginView
+# requests and password_generator are imported where they are used, keeping
+# them out of the startup of every process; GoogleLogin lives in
+# isa/google_login.py for the same reason
 
-# Project-Specific Imports
 User = get_user_model()
 
 
@@ -34,12 +31,6 @@ class LoginPage(View):
         )
 
 
-class GoogleLogin(SocialLoginView):
-    adapter_class = GoogleOAuth2Adapter
-    callback_url = settings.GOOGLE_OAUTH_CALLBACK_URL
-    client_class = OAuth2Client
-
-
 class GoogleLoginCallback(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -88,6 +79,7 @@ class GoogleLoginCallback(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # The token endpoint queues the user's cache warming itself
         return Response(user_jwt_token_response.json(), status=status.HTTP_200_OK)
 
     def get_google_token_data(self, code, request):
@@ -108,6 +100,8 @@ class GoogleLoginCallback(APIView):
         """
         Request an access token from Google.
         """
+        import requests
+
         token_url = "https://oauth2.googleapis.com/token"
         return requests.post(token_url, data=token_data)
 
@@ -115,6 +109,8 @@ class GoogleLoginCallback(APIView):
         """
         Fetch the user info from Google using the access token.
         """
+        import requests
+
         user_info_url = "https://www.googleapis.com/oauth2/v1/userinfo"
         headers = {"Authorization": f"Bearer {access_token}"}
         user_info_response = requests.get(user_info_url, headers=headers)
@@ -141,6 +137,9 @@ class GoogleLoginCallback(APIView):
         except Exception as e:
             raise {"message": f"Unable to get or create user: {e}"}
 
+        import requests
+        from password_generator import PasswordGenerator
+
         password = PasswordGenerator().generate()
         user.set_password(password)
         user.save()
@@ -0,0 +1,20 @@
+"""
+Google login through dj-rest-auth.
+
+Kept apart from isa/google_auth.py so the allauth provider is only imported
+when the view is first requested (see `lazy_view` in isa/urls.py).
+"""
+
+# Django Imports
+from django.conf import settings
+
+# Third-Party Package Imports
+from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
+from allauth.socialaccount.providers.oauth2.client import OAuth2Client
+from dj_rest_auth.registration.views import SocialLoginView
+
+
+class GoogleLogin(SocialLoginView):
+    adapter_class = GoogleOAuth2Adapter
+    callback_url = settings.GOOGLE_OAUTH_CALLBACK_URL
+    client_class = OAuth2Client
@@ -0,0 +1,187 @@
+import cProfile
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .compression import compress, is_compressible, negotiate
+from .db_routers import pin_to_primary, unpin
+from .profiling import save_profile, valid_token
+from .querylog import QueryInspector, inspect_queries
+
+PIN_COOKIE_NAME = "pin_primary"
+# Bodies in this range keep their compressed forms in the cache
+COMPRESSION_CACHE_MIN_BYTES = 8 * 1024
+COMPRESSION_CACHE_MAX_BYTES = 1024 * 1024
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin requests to the primary database while they write, and afterwards for
+    REPLICA_PIN_SECONDS. The pin is kept both in a cookie and in the shared
+    cache under the JWT's user id, for API clients that do not keep cookies
+    and whose next request may be served by another worker process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "DATABASE_REPLICAS", []):
+            return self.get_response(request)
+
+        is_write = request.method not in SAFE_METHODS
+        cache_key = self.pin_cache_key(request)
+        pinned = (
+            is_write
+            or PIN_COOKIE_NAME in request.COOKIES
+            or (cache_key is not None and cache.get(cache_key))
+        )
+
+        token = pin_to_primary() if pinned else None
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                unpin(token)
+
+        if is_write:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE_NAME, "1", max_age=seconds, httponly=True, samesite="Lax"
+            )
+            if cache_key is not None:
+                cache.set(cache_key, True, seconds)
+        return response
+
+    def pin_cache_key(self, request):
+        """
+        Read the user id from the bearer token without touching the database.
+        """
+        authentication = JWTAuthentication()
+        raw_token = authentication.get_raw_token(
+            authentication.get_header(request) or b""
+        )
+        if raw_token is None:
+            return None
+        try:
+            validated = authentication.get_validated_token(raw_token)
+        except (InvalidToken, TokenError):
+            return None
+        user_id = validated.get(settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id"))
+        return f"replica-pin:{user_id}" if user_id else None
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with the best encoding the client accepts (br,
+    zstd or gzip, see isa/compression.py). Small bodies, streams and media
+    that is compressed already are sent as they are. Compressed bodies are
+    cached under a hash of the body and the encoding, so an identical response
+    served again (a popular post, a warm feed page) is compressed only once.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or response.status_code == 206
+            or len(response.content) < settings.COMPRESSION_MIN_BYTES
+            or not is_compressible(response.get("Content-Type", ""))
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+        body = self.compressed(encoding, response.content)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # The compressed body is a different byte sequence
+            response["ETag"] = "W/" + etag
+        return response
+
+    def compressed(self, encoding, content):
+        if (
+            not COMPRESSION_CACHE_MIN_BYTES
+            <= len(content)
+            <= COMPRESSION_CACHE_MAX_BYTES
+        ):
+            return compress(encoding, content)
+        digest = hashlib.blake2b(content, digest_size=20).hexdigest()
+        cache_key = f"compressed:{encoding}:{digest}"
+        body = cache.get(cache_key)
+        if body is None:
+            body = compress(encoding, content)
+            cache.set(cache_key, body, settings.COMPRESSION_CACHE_SECONDS)
+        return body
+
+
+class ProfilingMiddleware:
+    """
+    Run a sample of requests under cProfile and keep the profiles on disk
+    (see isa/profiling.py). Unsampled requests pay one random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.sampled(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        profile_id = save_profile(
+            profiler, request, response, time.perf_counter() - started
+        )
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    def sampled(self, request):
+        token = request.headers.get("X-Profile")
+        if token is not None and valid_token(token):
+            return True
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class QueryInspectionMiddleware:
+    """
+    Log slow queries and likely N+1 query patterns per request (see
+    isa/querylog.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = QueryInspector(request)
+        with inspect_queries(inspector):
+            response = self.get_response(request)
+        inspector.report()
+        return response
@@ -1,4 +1,5 @@
 import uuid
+from contextlib import contextmanager
 
 from django.db import models
 
@@ -16,3 +17,19 @@ class TimeStampedUUIDModel(UUIDModel):
 
     class Meta:
         abstract = True
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create keep given `created_at` values instead of overwriting them
+    with the current time.
+    """
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
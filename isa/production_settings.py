@@ -0,0 +1,33 @@
+"""
+Production settings for isa project.
+
+The development settings in `isa/settings.py` without the debugging tools:
+DEBUG is off, debug_toolbar and django_extensions are neither installed nor
+imported, the browsable API is not rendered and database connections are
+kept open between requests. Select them with
+`DJANGO_SETTINGS_MODULE=isa.production_settings`.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, os
+
+DEBUG = False
+ALLOWED_HOSTS = list(filter(None, os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")))
+
+DEVELOPMENT_APPS = {"debug_toolbar", "django_extensions"}
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEVELOPMENT_APPS]
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware.split(".")[0] not in DEVELOPMENT_APPS
+]
+
+# JSON only: the browsable API loads templates and forms on first use
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
+
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = int(os.getenv("DJANGO_DB_CONN_MAX_AGE", "60"))
+    database["CONN_HEALTH_CHECKS"] = True
@@ -0,0 +1,151 @@
+"""
+Sampled request profiling.
+
+`ProfilingMiddleware` (isa/middleware.py) runs a sample of requests under
+cProfile: a random PROFILING_SAMPLE_RATE share of them, plus any request
+carrying an `X-Profile` header signed with `profiling_token()`, so a
+specific slow request can be captured in production on demand. Profiles are
+written to PROFILING_DIR as `.prof` files (readable with pstats or
+snakeviz) next to a small JSON summary, and only the newest
+PROFILING_MAX_FILES are kept. Staff list and read them at `/profiles/`.
+"""
+
+# Standard Library Imports
+import io
+import json
+import os
+import pstats
+import re
+import time
+from pathlib import Path
+
+# Django Imports
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse
+
+# Third-Party Package Imports
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.response import Response
+
+TOKEN_SALT = "isa.profiling"
+PROFILE_ID_RE = re.compile(r"^\d+-[0-9a-f]{8}$")
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+
+def profiling_token():
+    """
+    A value for the `X-Profile` header, valid for PROFILING_TOKEN_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def valid_token(value):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            value, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _directory():
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def save_profile(profiler, request, response, duration):
+    """
+    Write a profile and its summary, then drop the oldest beyond the limit.
+    Returns the profile id.
+    """
+    directory = _directory()
+    # Ids sort by capture time; the suffix keeps concurrent captures apart
+    profile_id = f"{time.time_ns()}-{os.urandom(4).hex()}"
+    stats = pstats.Stats(profiler)
+    summary = {
+        "id": profile_id,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 2),
+        "function_calls": stats.total_calls,
+        "captured_at": time.time(),
+    }
+    temporary = directory / f".{profile_id}.tmp"
+    stats.dump_stats(temporary)
+    os.replace(temporary, directory / f"{profile_id}.prof")
+    (directory / f"{profile_id}.json").write_text(json.dumps(summary))
+
+    profiles = sorted(directory.glob("*.json"))
+    for stale in profiles[: max(len(profiles) - settings.PROFILING_MAX_FILES, 0)]:
+        stale.with_suffix(".prof").unlink(missing_ok=True)
+        stale.unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles():
+    summaries = []
+    for path in sorted(_directory().glob("*.json"), reverse=True):
+        try:
+            summaries.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # Pruned or still being written by another process
+            continue
+    return summaries
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Captured request profiles, newest first (staff only).
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def _path(self, pk, suffix):
+        path = _directory() / f"{pk}{suffix}"
+        if not PROFILE_ID_RE.match(pk) or not path.exists():
+            raise NotFound("No such profile.")
+        return path
+
+    def list(self, request):
+        return Response({"profiles": list_profiles()})
+
+    def retrieve(self, request, pk=None):
+        """
+        The summary and the functions with the highest cumulative time.
+        """
+        sort = request.query_params.get("sort", "cumulative")
+        limit = request.query_params.get("limit", "40")
+        if sort not in SORT_KEYS or not limit.isdigit():
+            raise ParseError(f"sort must be one of {SORT_KEYS} and limit a number")
+        summary = json.loads(self._path(pk, ".json").read_text())
+        report = io.StringIO()
+        stats = pstats.Stats(str(self._path(pk, ".prof")), stream=report)
+        stats.sort_stats(sort).print_stats(int(limit))
+        return Response({**summary, "report": report.getvalue()})
+
+    @action(methods=["GET"], detail=True)
+    def download(self, request, pk=None):
+        return FileResponse(
+            open(self._path(pk, ".prof"), "rb"),
+            as_attachment=True,
+            filename=f"{pk}.prof",
+        )
+
+    @action(methods=["POST"], detail=False)
+    def token(self, request):
+        """
+        A signed `X-Profile` header value to profile chosen requests.
+        """
+        return Response(
+            {
+                "header": "X-Profile",
+                "value": profiling_token(),
+                "max_age": settings.PROFILING_TOKEN_MAX_AGE,
+            }
+        )
@@ -0,0 +1,151 @@
+"""
+Per-request query inspection, installed with `connection.execute_wrapper`
+by `QueryInspectionMiddleware` (isa/middleware.py).
+
+- Queries slower than SLOW_QUERY_MS are logged with the URL name, the view
+  and action, and the innermost stack frame in project code, i.e. the line
+  that made the ORM run the query.
+- Queries of the same shape (the SQL without its parameters, with IN lists
+  collapsed) run more than QUERY_REPEAT_THRESHOLD times in one request are
+  reported as a likely N+1, with the frame where the repetition started.
+
+Shard queries run on `isa.sharding.scatter` worker threads, which have their
+own connections: scatter installs the request's inspector on them too, and
+their queries are attributed to the frame that called scatter.
+"""
+
+# Standard Library Imports
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+# Django Imports
+from django.conf import settings
+from django.db import connections
+
+# Logger Initialization
+logger = logging.getLogger(__name__)
+
+IN_LIST_RE = re.compile(r"IN \((?:%s, )*%s\)")
+PROJECT_ROOT = str(settings.BASE_DIR)
+# Plumbing that runs queries on behalf of the code worth reporting
+SKIPPED_FILES = ("isa/middleware.py", "isa/sharding.py")
+
+_inspector = ContextVar("query_inspector", default=None)
+_caller = ContextVar("query_caller", default="unknown")
+
+
+def query_shape(sql):
+    if "IN (" in sql:
+        return IN_LIST_RE.sub("IN (...)", sql)
+    return sql
+
+
+def project_frame():
+    """
+    "path:line in function" of the innermost frame in project code.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and "site-packages" not in filename
+            and filename != __file__
+            and not filename.endswith(SKIPPED_FILES)
+        ):
+            path = filename[len(PROJECT_ROOT) :].lstrip("/")
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    # A worker thread running queries for code on another thread
+    return _caller.get()
+
+
+def current_inspector():
+    return _inspector.get()
+
+
+@contextmanager
+def inspect_queries(inspector, caller="unknown"):
+    """
+    Run every query of the current thread's connections through `inspector`.
+    `caller` is the frame reported for queries made outside project code.
+    """
+    tokens = _inspector.set(inspector), _caller.set(caller)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(inspector))
+            yield
+    finally:
+        _inspector.reset(tokens[0])
+        _caller.reset(tokens[1])
+
+
+def view_name(request):
+    """
+    "ViewClass.action" of the view serving a request.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "-"
+    view = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+    actions = getattr(match.func, "actions", None) or {}
+    method = request.method.lower()
+    name = view.__name__ if view is not None else match._func_path
+    return f"{name}.{actions.get(method, method)}"
+
+
+class QueryInspector:
+    def __init__(self, request):
+        self.request = request
+        self.counts = Counter()
+        self.origins = {}
+        # Shard queries are counted from several threads at once
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            shape = query_shape(sql)
+            with self.lock:
+                self.counts[shape] += 1
+                repeated = self.counts[shape] == settings.QUERY_REPEAT_THRESHOLD + 1
+            if repeated:
+                self.origins[shape] = project_frame()
+            if duration >= settings.SLOW_QUERY_MS:
+                logger.warning(
+                    "Slow query (%.1f ms on %s) in %s [%s] at %s: %s",
+                    duration,
+                    context["connection"].alias,
+                    self.url_name(),
+                    view_name(self.request),
+                    project_frame(),
+                    sql,
+                )
+
+    def url_name(self):
+        match = getattr(self.request, "resolver_match", None)
+        return match.view_name if match is not None else self.request.path
+
+    def report(self):
+        """
+        Log the query shapes repeated more than QUERY_REPEAT_THRESHOLD times.
+        """
+        for shape, origin in self.origins.items():
+            logger.warning(
+                "Possible N+1: %d similar queries in %s [%s] at %s: %s",
+                self.counts[shape],
+                self.url_name(),
+                view_name(self.request),
+                origin,
+                shape,
+            )
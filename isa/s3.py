@@ -0,0 +1,199 @@
+"""
+Minimal client for S3-compatible object stores (AWS S3, MinIO, R2, ...).
+
+Only what the storage backend needs: single and multipart uploads, reads,
+metadata, deletes and listings, over path-style URLs
+(`<endpoint>/<bucket>/<key>`) signed with AWS Signature Version 4. It uses
+the standard library only, so no SDK has to be installed to serve media
+from a bucket.
+"""
+
+# Standard Library Imports
+import datetime
+import hashlib
+import hmac
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+
+S3_NAMESPACE = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class S3Error(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"S3 request failed with HTTP {status}: {body[:200]!r}")
+        self.status = status
+
+
+def _quote(value):
+    return urllib.parse.quote(value, safe="-_.~")
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _find(element, tag):
+    # Some S3-compatible servers leave the namespace out
+    found = element.find(S3_NAMESPACE + tag)
+    return found if found is not None else element.find(tag)
+
+
+def _findall(element, tag):
+    return element.findall(S3_NAMESPACE + tag) or element.findall(tag)
+
+
+class S3Client:
+    def __init__(
+        self, endpoint_url, bucket, access_key_id, secret_access_key, region, timeout=60
+    ):
+        parts = urllib.parse.urlsplit(endpoint_url)
+        self.endpoint = f"{parts.scheme}://{parts.netloc}"
+        self.host = parts.netloc
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.timeout = timeout
+
+    def object_path(self, key):
+        return f"/{_quote(self.bucket)}/" + "/".join(map(_quote, key.split("/")))
+
+    def _signed_headers(self, method, path, query, headers, payload_hash):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        stamp, day = now.strftime("%Y%m%dT%H%M%SZ"), now.strftime("%Y%m%d")
+        headers = {
+            **{name.lower(): str(value).strip() for name, value in headers.items()},
+            "host": self.host,
+            "x-amz-date": stamp,
+            "x-amz-content-sha256": payload_hash,
+        }
+        names = sorted(headers)
+        canonical_request = "\n".join(
+            [
+                method,
+                path,
+                "&".join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(query.items())),
+                "".join(f"{name}:{headers[name]}\n" for name in names),
+                ";".join(names),
+                payload_hash,
+            ]
+        )
+        scope = f"{day}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                stamp,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        key = ("AWS4" + self.secret_access_key).encode()
+        for part in (day, self.region, "s3", "aws4_request"):
+            key = _hmac(key, part)
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        del headers["host"]
+        return headers
+
+    def request(self, method, key=None, query=None, body=b"", headers=None):
+        """
+        Send a signed request. Returns the open response, to be read or
+        streamed; raises FileNotFoundError on 404 and S3Error otherwise.
+        """
+        path = self.object_path(key) if key is not None else f"/{_quote(self.bucket)}"
+        query = query or {}
+        payload_hash = hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256
+        signed = self._signed_headers(method, path, query, headers or {}, payload_hash)
+        url = self.endpoint + path
+        if query:
+            url += "?" + urllib.parse.urlencode(query, quote_via=urllib.parse.quote)
+        request = urllib.request.Request(
+            url, data=body or None, headers=signed, method=method
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            content = error.read()
+            error.close()
+            if error.code == 404:
+                raise FileNotFoundError(key) from None
+            raise S3Error(error.code, content) from None
+
+    def put_object(self, key, body, content_type="application/octet-stream"):
+        with self.request(
+            "PUT", key, body=body, headers={"content-type": content_type}
+        ):
+            pass
+
+    def get_object(self, key):
+        return self.request("GET", key)
+
+    def head_object(self, key):
+        with self.request("HEAD", key) as response:
+            return response.headers
+
+    def delete_object(self, key):
+        try:
+            with self.request("DELETE", key):
+                pass
+        except FileNotFoundError:
+            pass
+
+    def create_multipart_upload(self, key, content_type="application/octet-stream"):
+        with self.request(
+            "POST", key, query={"uploads": ""}, headers={"content-type": content_type}
+        ) as response:
+            return _find(ET.fromstring(response.read()), "UploadId").text
+
+    def upload_part(self, key, upload_id, number, body):
+        """
+        Upload one part and return its ETag.
+        """
+        query = {"partNumber": str(number), "uploadId": upload_id}
+        with self.request("PUT", key, query=query, body=body) as response:
+            return response.headers["ETag"]
+
+    def complete_multipart_upload(self, key, upload_id, etags):
+        parts = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in sorted(etags.items())
+        )
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+        with self.request(
+            "POST", key, query={"uploadId": upload_id}, body=body
+        ) as response:
+            # Failures after the upload started are reported with a 200
+            result = ET.fromstring(response.read())
+        if result.tag.endswith("Error"):
+            raise S3Error(200, ET.tostring(result))
+
+    def abort_multipart_upload(self, key, upload_id):
+        try:
+            with self.request("DELETE", key, query={"uploadId": upload_id}):
+                pass
+        except (FileNotFoundError, S3Error):
+            pass
+
+    def list_objects(self, prefix, delimiter="/"):
+        """
+        Yield ("prefix", name) for each common prefix and ("key", name) for
+        each object under `prefix`, following continuation tokens.
+        """
+        query = {"list-type": "2", "prefix": prefix, "delimiter": delimiter}
+        while True:
+            with self.request("GET", query=query) as response:
+                result = ET.fromstring(response.read())
+            for common in _findall(result, "CommonPrefixes"):
+                yield "prefix", _find(common, "Prefix").text
+            for content in _findall(result, "Contents"):
+                yield "key", _find(content, "Key").text
+            token = _find(result, "NextContinuationToken")
+            if token is None or not token.text:
+                return
+            query = {**query, "continuation-token": token.text}
@@ -0,0 +1,106 @@
+"""
+Sparse fieldsets for API responses.
+
+Clients choose what a response contains with query parameters:
+
+- `?fields=id,caption` returns only the listed fields,
+- `?omit=placeholder` returns everything except the listed fields,
+- `?expand=created_by` swaps a field for the nested object it refers to.
+
+Fields are removed from the serializer before it renders anything, so the
+queries and method fields behind an unrequested field never run. Views use
+`selected_fields` / `only_fields` to prune their querysets to the same
+selection.
+"""
+
+# Django Imports
+from django.core.exceptions import FieldDoesNotExist
+
+# Third-Party Package Imports
+from rest_framework import serializers
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _names(request, param):
+    value = request.query_params.get(param, "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def selected_fields(request, serializer_class):
+    """
+    Names of the fields of `serializer_class` a request asks for.
+    """
+    names = list(serializer_class.Meta.fields)
+    if request is None or request.method not in SAFE_METHODS:
+        # Writes validate against, and echo back, the full serializer
+        return names
+    wanted = _names(request, "fields")
+    omitted = _names(request, "omit")
+    return [
+        name for name in names if (not wanted or name in wanted) and name not in omitted
+    ]
+
+
+def expanded_fields(request, serializer_class):
+    """
+    Names of the fields of `serializer_class` to render as nested objects.
+    """
+    expandable = getattr(serializer_class.Meta, "expandable_fields", {})
+    if request is None or request.method not in SAFE_METHODS:
+        return set()
+    return _names(request, "expand") & set(expandable)
+
+
+def only_fields(request, serializer_class):
+    """
+    (`.only()` paths, `select_related()` relations) covering the selected
+    fields of a model serializer. Method fields and annotations need no column.
+    """
+    model = serializer_class.Meta.model
+    fields = serializer_class().fields
+    expanded = expanded_fields(request, serializer_class)
+    only, related = [model._meta.pk.name], []
+    for name in selected_fields(request, serializer_class):
+        if name in expanded:
+            nested = serializer_class.Meta.expandable_fields[name]
+            related.append(name)
+            only.extend(f"{name}__{field}" for field in nested.Meta.fields)
+            continue
+        field = fields[name]
+        if field.write_only or field.source == "*":
+            continue
+        attrs = field.source.split(".")
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            continue
+        if model_field.is_relation and len(attrs) > 1:
+            related.append(attrs[0])
+        if model_field.concrete:
+            only.append("__".join(attrs))
+    return only, related
+
+
+class SparseFieldsMixin:
+    """
+    Drop the fields a request did not ask for and expand the ones it asked to.
+    Nested serializers are built with `sparse=False` and render in full.
+    """
+
+    def __init__(self, *args, sparse=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if not sparse or request is None:
+            return
+        keep = set(selected_fields(request, type(self)))
+        for name in list(self.fields):
+            if name not in keep and not self.fields[name].write_only:
+                self.fields.pop(name)
+        for name in expanded_fields(request, type(self)) & keep:
+            nested = self.Meta.expandable_fields[name]
+            self.fields[name] = nested(read_only=True, sparse=False)
+
+
+class SparseModelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    pass
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     "debug_toolbar",
     "users.apps.UsersConfig",
     "imageshare.apps.ImageshareConfig",
+    "taskqueue.apps.TaskqueueConfig",
     "django_extensions",
     "allauth",
     "allauth.account",
@@ -63,8 +64,13 @@ SITE_ID = 1
 AUTH_USER_MODEL = "users.User"
 
 MIDDLEWARE = [
+    # Outermost, so it compresses what every other middleware produced
+    "isa.middleware.CompressionMiddleware",
+    "isa.middleware.ProfilingMiddleware",
+    "isa.middleware.QueryInspectionMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "isa.middleware.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -122,6 +128,108 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma separated hosts (PostgreSQL), or database files standing
+# in for replicas on SQLite. Reads are routed by isa.db_routers.ReplicaRouter.
+DATABASE_REPLICAS = []
+location_key = "NAME" if DATABASES["default"]["ENGINE"].endswith("sqlite3") else "HOST"
+for replica in filter(None, os.getenv("DJANGO_DB_REPLICAS", "").split(",")):
+    DATABASE_REPLICAS.append(f"replica_{len(DATABASE_REPLICAS) + 1}")
+    DATABASES[DATABASE_REPLICAS[-1]] = {
+        **DATABASES["default"],
+        location_key: replica,
+        "TEST": {"MIRROR": "default"},
+    }
+# Shards: comma separated hosts (PostgreSQL) or database files (SQLite) holding
+# posts, likes and follows partitioned by user. See isa/sharding.py.
+SHARDS = []
+for shard in filter(None, os.getenv("DJANGO_DB_SHARDS", "").split(",")):
+    SHARDS.append(f"shard_{len(SHARDS)}")
+    DATABASES[SHARDS[-1]] = {**DATABASES["default"], location_key: shard}
+# How long a user's shard assignment may be served from the cache
+SHARD_DIRECTORY_CACHE_SECONDS = int(
+    os.getenv("DJANGO_SHARD_DIRECTORY_CACHE_SECONDS", "30")
+)
+DATABASE_ROUTERS = ["isa.db_routers.ShardRouter", "isa.db_routers.ReplicaRouter"]
+# How long a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = int(os.getenv("DJANGO_REPLICA_PIN_SECONDS", "10"))
+
+# Uploads are rejected from their header above these limits (imageshare/images.py)
+IMAGE_MAX_UPLOAD_BYTES = int(
+    os.getenv("DJANGO_IMAGE_MAX_UPLOAD_BYTES", 20 * 1024 * 1024)
+)
+IMAGE_MAX_PIXELS = int(os.getenv("DJANGO_IMAGE_MAX_PIXELS", 40_000_000))
+
+# Background tasks (taskqueue): retry backoff, and how long a task may run before
+# it is assumed its worker died and it is queued again
+TASK_RETRY_BASE_SECONDS = 5
+TASK_RETRY_MAX_SECONDS = 3600
+TASK_VISIBILITY_TIMEOUT_SECONDS = int(
+    os.getenv("DJANGO_TASK_VISIBILITY_TIMEOUT_SECONDS", "600")
+)
+
+# Responses smaller than this are not compressed (isa/middleware.py); compressed
+# bodies are cached for COMPRESSION_CACHE_SECONDS
+COMPRESSION_MIN_BYTES = int(os.getenv("DJANGO_COMPRESSION_MIN_BYTES", "512"))
+COMPRESSION_CACHE_SECONDS = int(os.getenv("DJANGO_COMPRESSION_CACHE_SECONDS", "300"))
+
+# Most ids accepted by one batch multi-get request (isa/viewsets.py)
+API_BATCH_MAX_IDS = int(os.getenv("DJANGO_API_BATCH_MAX_IDS", "100"))
+
+# How long each user's followings are cached as a Bloom filter for relationship
+# lookups (imageshare/relationships.py); 0 disables the filters
+FOLLOW_BLOOM_FILTER_SECONDS = int(
+    os.getenv("DJANGO_FOLLOW_BLOOM_FILTER_SECONDS", "300")
+)
+
+# Cache shared by every web and task worker process: cached responses, cache
+# warming, locks, replica pins and generation counters must be seen by all of
+# them. "database" (the default) needs `python manage.py createcachetable`;
+# "redis" uses DJANGO_REDIS_URL; "locmem" is per process, for a single process.
+# The database and locmem backends hold up to CACHE_MAX_ENTRIES entries (Django
+# defaults to 300) and drop a tenth of them when full; Redis evicts by its own
+# maxmemory policy
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "database")
+CACHE_MAX_ENTRIES = int(os.getenv("DJANGO_CACHE_MAX_ENTRIES", "100000"))
+CACHE_OPTIONS = {"MAX_ENTRIES": CACHE_MAX_ENTRIES, "CULL_FREQUENCY": 10}
+CACHES = {
+    "default": {
+        "database": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "isa_cache",
+            "OPTIONS": CACHE_OPTIONS,
+        },
+        "redis": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("DJANGO_REDIS_URL", "redis://127.0.0.1:6379/0"),
+        },
+        "locmem": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": CACHE_OPTIONS,
+        },
+    }[CACHE_BACKEND]
+}
+
+# How long the hot feed, follow suggestions and profile are cached per user, and served
+# stale while one request refreshes them (isa/caching.py); 0 disables caching
+FEED_CACHE_SECONDS = int(os.getenv("DJANGO_FEED_CACHE_SECONDS", "15"))
+SUGGESTIONS_CACHE_SECONDS = int(os.getenv("DJANGO_SUGGESTIONS_CACHE_SECONDS", "300"))
+PROFILE_CACHE_SECONDS = int(os.getenv("DJANGO_PROFILE_CACHE_SECONDS", "60"))
+TRENDING_TAGS_CACHE_SECONDS = int(os.getenv("DJANGO_TRENDING_TAGS_CACHE_SECONDS", "60"))
+
+# Share of requests profiled with cProfile, and the on-disk ring buffer of the
+# newest PROFILING_MAX_FILES profiles (isa/profiling.py). Requests with a signed
+# X-Profile header are always profiled.
+PROFILING_SAMPLE_RATE = float(os.getenv("DJANGO_PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("DJANGO_PROFILING_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILING_MAX_FILES = int(os.getenv("DJANGO_PROFILING_MAX_FILES", "100"))
+PROFILING_TOKEN_MAX_AGE = int(os.getenv("DJANGO_PROFILING_TOKEN_MAX_AGE", "3600"))
+
+# Queries slower than this are logged, and query shapes repeated more than
+# QUERY_REPEAT_THRESHOLD times in one request are logged as a likely N+1
+# (isa/querylog.py)
+SLOW_QUERY_MS = float(os.getenv("DJANGO_SLOW_QUERY_MS", "200"))
+QUERY_REPEAT_THRESHOLD = int(os.getenv("DJANGO_QUERY_REPEAT_THRESHOLD", "10"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -158,6 +266,46 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Uploaded files. Files saved into MEDIA_SHARDED_DIRS are stored by content
+# hash under hash-prefix directories (posts/ab/cd/<hash>.jpg), on local disk
+# or, with isa.storage.ShardedS3Storage, in an S3-compatible bucket
+STORAGES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "DJANGO_STORAGE_BACKEND", "isa.storage.ShardedFileSystemStorage"
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+MEDIA_SHARDED_DIRS = ["posts"]
+S3_ENDPOINT_URL = os.getenv("DJANGO_S3_ENDPOINT_URL", "https://s3.amazonaws.com")
+S3_BUCKET = os.getenv("DJANGO_S3_BUCKET", "")
+S3_REGION = os.getenv("DJANGO_S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("DJANGO_S3_ACCESS_KEY_ID", "")
+S3_SECRET_ACCESS_KEY = os.getenv("DJANGO_S3_SECRET_ACCESS_KEY", "")
+# Base URL of public file links, e.g. a CDN in front of the bucket
+S3_PUBLIC_URL = os.getenv("DJANGO_S3_PUBLIC_URL", "")
+# Files larger than the threshold are uploaded in parts of the chunk size
+# (at least 5 MiB on AWS), up to S3_MAX_CONCURRENCY parts at a time
+S3_MULTIPART_THRESHOLD = int(
+    os.getenv("DJANGO_S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024))
+)
+S3_MULTIPART_CHUNK_SIZE = int(
+    os.getenv("DJANGO_S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024))
+)
+S3_MAX_CONCURRENCY = int(os.getenv("DJANGO_S3_MAX_CONCURRENCY", "8"))
+# Files only served by views that check access (takeout archives): on local
+# disk outside the media directory, or in a bucket without public access
+PRIVATE_MEDIA_ROOT = os.getenv("DJANGO_PRIVATE_MEDIA_ROOT", str(BASE_DIR / "private"))
+S3_PRIVATE_BUCKET = os.getenv("DJANGO_S3_PRIVATE_BUCKET", "")
+STORAGES["private"] = (
+    {"BACKEND": "isa.storage.S3Storage", "OPTIONS": {"bucket": S3_PRIVATE_BUCKET}}
+    if S3_PRIVATE_BUCKET
+    else {"BACKEND": "isa.storage.PrivateFileSystemStorage"}
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -174,7 +322,10 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "1000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("DJANGO_THROTTLE_ANON_RATE", "10/day"),
+        "user": os.getenv("DJANGO_THROTTLE_USER_RATE", "1000/day"),
+    },
 }
 
 SIMPLE_JWT = {
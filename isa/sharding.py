@@ -0,0 +1,255 @@
+"""
+Application-level sharding of posts, likes and follows by owning user.
+
+Sharding is enabled by listing shard databases in `DJANGO_DB_SHARDS`. Users stay
+on the default database and are copied to every shard, so joins on `created_by`
+and foreign key constraints keep working inside a shard. Rows are owned by:
+
+- Post: its author (`created_by`)
+- Like, PostEngagement, PostTag: the author of the post, so they stay with it
+- Follow: the follower (`created_by`)
+- AuthorEngagement: the author
+
+A user's shard is read from the `ShardAssignment` directory, falling back to a
+consistent hash ring, so shards can be added and users moved one at a time
+(see the `freeze_shard_assignments` and `reshard_user` commands).
+
+When sharding is disabled every helper degrades to a single `None` alias, which
+leaves routing to the regular database routers.
+"""
+
+# Standard Library Imports
+import bisect
+import functools
+import hashlib
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+# Django Imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models
+from django.http import Http404
+
+# Project-Specific Imports
+from isa import querylog
+
+SHARDED_MODELS = {
+    "imageshare.post",
+    "imageshare.like",
+    "imageshare.posttag",
+    "imageshare.follow",
+    "imageshare.postengagement",
+    "imageshare.authorengagement",
+}
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes: adding a shard only remaps about
+    1/N of the keys.
+    """
+
+    def __init__(self, nodes, replicas=100):
+        self.ring = sorted(
+            (self._hash(f"{node}#{index}"), node)
+            for node in nodes
+            for index in range(replicas)
+        )
+        self.hashes = [point for point, _ in self.ring]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def node_for(self, key):
+        index = bisect.bisect(self.hashes, self._hash(str(key))) % len(self.ring)
+        return self.ring[index][1]
+
+
+def sharding_enabled():
+    return bool(getattr(settings, "SHARDS", []))
+
+
+def all_shards():
+    """
+    Every shard alias, or [None] (let the routers decide) when not sharded.
+    """
+    return list(settings.SHARDS) if sharding_enabled() else [None]
+
+
+@functools.lru_cache(maxsize=None)
+def _ring(shards):
+    return HashRing(shards)
+
+
+def ring():
+    return _ring(tuple(settings.SHARDS))
+
+
+def _directory_cache_key(user_id):
+    return f"shard-directory:{user_id}"
+
+
+def shard_for_user(user_id):
+    """
+    The shard that owns a user's rows, or None when sharding is disabled.
+    """
+    if not sharding_enabled():
+        return None
+    key = _directory_cache_key(user_id)
+    shard = cache.get(key)
+    if shard is None:
+        from users.models import ShardAssignment
+
+        shard = (
+            ShardAssignment.objects.filter(user_id=user_id)
+            .values_list("shard", flat=True)
+            .first()
+        ) or ring().node_for(user_id)
+        cache.set(key, shard, settings.SHARD_DIRECTORY_CACHE_SECONDS)
+    return shard
+
+
+def assign_shard(user_id, shard):
+    """
+    Record a user's shard in the directory.
+    """
+    from users.models import ShardAssignment
+
+    ShardAssignment.objects.update_or_create(user_id=user_id, defaults={"shard": shard})
+    cache.delete(_directory_cache_key(user_id))
+
+
+def shard_for_instance(instance):
+    """
+    The shard owning a model instance, based on the rules in the module docstring.
+    """
+    label = instance._meta.label_lower
+    if label == settings.AUTH_USER_MODEL.lower():
+        # Users are copied everywhere; their own rows live on their shard
+        return shard_for_user(instance.pk)
+    if instance._state.db in settings.SHARDS:
+        return instance._state.db
+    if label in ("imageshare.post", "imageshare.follow"):
+        return shard_for_user(instance.created_by_id)
+    if label == "imageshare.authorengagement":
+        return shard_for_user(instance.author_id)
+    # Like, PostEngagement and PostTag live with their post
+    post = instance._state.fields_cache.get("post")
+    if post is not None:
+        return shard_for_instance(post)
+    return None
+
+
+class ShardedQuerySet(models.QuerySet):
+    """
+    QuerySet whose `create()` lets the routers place the new row by its
+    contents, as `save()` does, instead of routing without an instance.
+    """
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+def scatter(func, shards=None):
+    """
+    Call func(alias) for each shard and return the results in shard order.
+
+    Shards are queried in parallel, except inside a transaction where the
+    caller's own connections must be used.
+    """
+    shards = all_shards() if shards is None else list(shards)
+    if len(shards) < 2 or any(
+        alias is not None and connections[alias].in_atomic_block for alias in shards
+    ):
+        return [func(alias) for alias in shards]
+
+    # Worker threads have their own connections: keep inspecting the queries
+    # of the request, if it is inspected (see isa/querylog.py)
+    inspector = querylog.current_inspector()
+    caller = querylog.project_frame() if inspector is not None else None
+
+    def run(alias):
+        try:
+            if inspector is None:
+                return func(alias)
+            with querylog.inspect_queries(inspector, caller):
+                return func(alias)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        return list(executor.map(run, shards))
+
+
+def shard_union(queryset, shards=None):
+    """
+    Evaluate a values_list queryset on every shard and return the union as a set.
+    """
+    return set(
+        itertools.chain.from_iterable(
+            scatter(lambda alias: list(queryset.using(alias)), shards)
+        )
+    )
+
+
+def get_sharded_object_or_404(queryset, **filters):
+    """
+    Look an object up on whichever shard holds it.
+    """
+    for found in scatter(lambda alias: queryset.using(alias).filter(**filters).first()):
+        if found is not None:
+            return found
+    raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+def _ordering_key(ordering):
+    fields = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+    def compare(left, right):
+        for name, descending in fields:
+            a, b = getattr(left, name), getattr(right, name)
+            if a != b:
+                return (a < b) - (a > b) if descending else (a > b) - (a < b)
+        return 0
+
+    return functools.cmp_to_key(compare)
+
+
+class ScatterGatherList:
+    """
+    Read-only sequence merging the same ordered query run on several shards,
+    usable wherever a paginator expects a queryset.
+    """
+
+    def __init__(self, querysets):
+        self.querysets = {queryset.db: queryset for queryset in querysets}
+        query = next(iter(self.querysets.values())).query
+        self.key = _ordering_key(query.order_by or query.get_meta().ordering)
+
+    def count(self):
+        return sum(scatter(lambda alias: self.querysets[alias].count(), self.querysets))
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        start, stop = index.start or 0, index.stop
+        # Any one shard may hold the whole slice, so each returns its first `stop` rows
+        results = scatter(
+            lambda alias: list(self.querysets[alias][:stop]), self.querysets
+        )
+        return list(itertools.islice(heapq.merge(*results, key=self.key), start, stop))
+
+    @classmethod
+    def across_shards(cls, queryset, shards=None):
+        shards = settings.SHARDS if shards is None else shards
+        return cls(queryset.using(alias) for alias in shards)
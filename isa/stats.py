@@ -0,0 +1,18 @@
+"""
+Summary statistics shared by the load test and the task queue metrics.
+"""
+
+# Standard Library Imports
+import math
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list: the smallest value
+    with at least `pct` percent of the values at or below it.
+    """
+    if not sorted_values:
+        return None
+    # pct * n first, so whole percentages stay exact (0.07 * 100 > 7)
+    rank = max(1, math.ceil(pct * len(sorted_values) / 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
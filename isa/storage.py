@@ -0,0 +1,241 @@
+"""
+Storage backends for uploaded files.
+
+Files saved directly into one of MEDIA_SHARDED_DIRS are named after a hash
+of their content and spread over two levels of hash-prefix directories
+(`posts/photo.jpg` is stored as `posts/ab/cd/abcd....jpg`), so no directory
+grows past a few thousand entries however many files there are. Files
+re-saved inside a shard directory (e.g. a re-encoded image next to its
+original) are re-hashed the same way.
+
+`ShardedFileSystemStorage` keeps files on local disk. `S3Storage` keeps them
+in an S3-compatible bucket, uploading large files as multipart uploads with
+their parts sent in parallel. `PrivateFileSystemStorage` keeps files outside
+the media directory, without URLs, for views that check access before serving
+them.
+"""
+
+# Standard Library Imports
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+
+# Django Imports
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.deconstruct import deconstructible
+
+# Project-Specific Imports
+from isa.s3 import S3Client
+
+SHARD_DIR_RE = re.compile(r"(.+)/[0-9a-f]{2}/[0-9a-f]{2}")
+HASH_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+class ShardedPathsMixin:
+    """
+    Store files saved into MEDIA_SHARDED_DIRS under content-hash paths.
+    """
+
+    @property
+    def sharded_dirs(self):
+        return set(settings.MEDIA_SHARDED_DIRS)
+
+    def sharded_root(self, name):
+        """
+        The sharded directory a name is saved into, or None.
+        """
+        directory = posixpath.dirname(name)
+        if match := SHARD_DIR_RE.fullmatch(directory):
+            directory = match[1]
+        return directory if directory in self.sharded_dirs else None
+
+    def is_sharded(self, name):
+        directory = posixpath.dirname(name)
+        match = SHARD_DIR_RE.fullmatch(directory)
+        return bool(match) and match[1] in self.sharded_dirs
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        if (root := self.sharded_root(name)) is not None:
+            digest = hashlib.blake2b(digest_size=16)
+            for chunk in content.chunks(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+            content.seek(0)
+            value = digest.hexdigest()
+            extension = posixpath.splitext(name)[1].lower()
+            name = f"{root}/{value[:2]}/{value[2:4]}/{value}{extension}"
+        return super().save(name, content, max_length=max_length)
+
+
+@deconstructible(path="isa.storage.ShardedFileSystemStorage")
+class ShardedFileSystemStorage(ShardedPathsMixin, FileSystemStorage):
+    pass
+
+
+@deconstructible(path="isa.storage.PrivateFileSystemStorage")
+class PrivateFileSystemStorage(FileSystemStorage):
+    """
+    Files under PRIVATE_MEDIA_ROOT, which is not served as media.
+    """
+
+    @property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.PRIVATE_MEDIA_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError("Private files have no URL; serve them from a view.")
+
+
+def _parts(content, size):
+    """
+    (part number, bytes) of each `size` chunk of a file, read as needed.
+    """
+    content.seek(0)
+    number = 0
+    while block := content.read(size):
+        number += 1
+        yield number, block
+
+
+@deconstructible(path="isa.storage.S3Storage")
+class S3Storage(Storage):
+    """
+    Files in an S3-compatible bucket, configured with the S3_* settings or
+    the matching keyword arguments.
+    """
+
+    def __init__(
+        self,
+        bucket=None,
+        endpoint_url=None,
+        access_key_id=None,
+        secret_access_key=None,
+        region=None,
+        public_url=None,
+        multipart_threshold=None,
+        multipart_chunk_size=None,
+        max_concurrency=None,
+    ):
+        self.bucket = bucket or settings.S3_BUCKET
+        if not self.bucket:
+            raise ImproperlyConfigured("S3Storage needs DJANGO_S3_BUCKET to be set.")
+        self.client = S3Client(
+            endpoint_url or settings.S3_ENDPOINT_URL,
+            self.bucket,
+            access_key_id or settings.S3_ACCESS_KEY_ID,
+            secret_access_key or settings.S3_SECRET_ACCESS_KEY,
+            region or settings.S3_REGION,
+        )
+        self.public_url = (
+            public_url
+            or settings.S3_PUBLIC_URL
+            or f"{self.client.endpoint}/{self.bucket}"
+        ).rstrip("/")
+        self.multipart_threshold = (
+            multipart_threshold or settings.S3_MULTIPART_THRESHOLD
+        )
+        self.multipart_chunk_size = (
+            multipart_chunk_size or settings.S3_MULTIPART_CHUNK_SIZE
+        )
+        self.max_concurrency = max_concurrency or settings.S3_MAX_CONCURRENCY
+
+    def _open(self, name, mode="rb"):
+        if "w" in mode or "a" in mode:
+            raise ValueError("S3 files are written with save().")
+        spool = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_BYTES)
+        with self.client.get_object(name) as response:
+            while block := response.read(HASH_CHUNK_SIZE):
+                spool.write(block)
+        spool.seek(0)
+        return File(spool, name=name)
+
+    def _save(self, name, content):
+        content_type = getattr(content, "content_type", None) or (
+            "application/octet-stream"
+        )
+        content.seek(0)
+        if content.size is not None and content.size <= self.multipart_threshold:
+            self.client.put_object(name, content.read(), content_type)
+        else:
+            self._multipart_upload(name, content, content_type)
+        return name
+
+    def _multipart_upload(self, name, content, content_type):
+        """
+        Upload `content` in parts, at most `max_concurrency` parts in flight
+        (and in memory) at once.
+        """
+        upload_id = self.client.create_multipart_upload(name, content_type)
+        etags, lock = {}, threading.Lock()
+
+        def send(number, block):
+            etag = self.client.upload_part(name, upload_id, number, block)
+            with lock:
+                etags[number] = etag
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                pending = set()
+                for number, block in _parts(content, self.multipart_chunk_size):
+                    if len(pending) >= self.max_concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(send, number, block))
+                for future in pending:
+                    future.result()
+            self.client.complete_multipart_upload(name, upload_id, etags)
+        except BaseException:
+            self.client.abort_multipart_upload(name, upload_id)
+            raise
+
+    def delete(self, name):
+        self.client.delete_object(name)
+
+    def exists(self, name):
+        try:
+            self.client.head_object(name)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def size(self, name):
+        return int(self.client.head_object(name)["Content-Length"])
+
+    def get_modified_time(self, name):
+        return parsedate_to_datetime(self.client.head_object(name)["Last-Modified"])
+
+    def listdir(self, path):
+        prefix = path.strip("/") + "/" if path.strip("/") else ""
+        directories, files = [], []
+        for kind, name in self.client.list_objects(prefix):
+            if kind == "prefix":
+                directories.append(name[len(prefix) :].rstrip("/"))
+            else:
+                files.append(name[len(prefix) :])
+        return directories, files
+
+    def url(self, name):
+        return f"{self.public_url}/{quote(name)}"
+
+
+@deconstructible(path="isa.storage.ShardedS3Storage")
+class ShardedS3Storage(ShardedPathsMixin, S3Storage):
+    pass
@@ -15,30 +15,62 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include, re_path
-from debug_toolbar.toolbar import debug_toolbar_urls
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+from rest_framework.routers import SimpleRouter
+
+from users.api import WarmTokenObtainPairView, WarmTokenRefreshView
+from .google_auth import GoogleLoginCallback, LoginPage
+from .profiling import ProfileViewSet
+
+profiles_router = SimpleRouter(trailing_slash=False)
+profiles_router.register(r"profiles", ProfileViewSet, basename="profiles")
+
+
+def lazy_view(dotted_path):
+    """
+    A view whose class (and the packages it needs) is imported on first request.
+    """
+    view = None
+
+    @csrf_exempt
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view()
+        return view(request, *args, **kwargs)
+
+    return dispatch
 
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
-from .google_auth import GoogleLogin, GoogleLoginCallback, LoginPage
 
 urlpatterns = [
     path("imageshare/", include("imageshare.urls")),
     path("user/", include("users.urls")),
     path("admin/", admin.site.urls),
-    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("", include(profiles_router.urls)),
+    path("api/token/", WarmTokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/token/refresh/", WarmTokenRefreshView.as_view(), name="token_refresh"),
     path("login/", LoginPage.as_view(), name="login"),
     path("api/v1/auth/", include("dj_rest_auth.urls")),
     re_path(r"^api/v1/auth/accounts/", include("allauth.urls")),
     path("api/v1/auth/registration/", include("dj_rest_auth.registration.urls")),
-    path("api/v1/auth/google/", GoogleLogin.as_view(), name="google_login"),
+    path(
+        "api/v1/auth/google/",
+        lazy_view("isa.google_login.GoogleLogin"),
+        name="google_login",
+    ),
     path(
         "api/v1/auth/google/callback/",
         GoogleLoginCallback.as_view(),
         name="google_login_callback",
     ),
-] + debug_toolbar_urls()
+]
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
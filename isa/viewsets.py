@@ -0,0 +1,76 @@
+"""
+Batch multi-get for viewsets.
+
+`GET <list url>/batch?ids=<id>,<id>,...` fetches up to `API_BATCH_MAX_IDS`
+objects in one query (one per shard when the model is sharded) instead of one
+request each. Results come back in the order the ids were asked for and are
+rendered by the view's own serializer, so `?fields=` and the other options
+of single-object requests apply. Ids that match nothing, including malformed
+ones, get a `{"id": ..., "error": "not_found"}` entry in their place.
+"""
+
+# Standard Library Imports
+import itertools
+import uuid
+
+# Django Imports
+from django.conf import settings
+
+# Third-Party Package Imports
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+# Project-Specific Imports
+from isa.sharding import SHARDED_MODELS, scatter, sharding_enabled
+
+
+def parse_ids(value):
+    """
+    The comma-separated ids of an `?ids=` parameter, at most API_BATCH_MAX_IDS.
+    """
+    ids = [part.strip() for part in value.split(",") if part.strip()]
+    if not ids:
+        raise ParseError("ids must list at least one id")
+    if len(ids) > settings.API_BATCH_MAX_IDS:
+        raise ParseError(f"ids may list at most {settings.API_BATCH_MAX_IDS} ids")
+    return ids
+
+
+def _as_uuid(value):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+class BatchRetrieveMixin:
+    """
+    Adds a `batch` list action fetching objects by id with a single query.
+    """
+
+    @action(methods=["GET"], detail=False)
+    def batch(self, request):
+        ids = parse_ids(request.query_params.get("ids", ""))
+        pks = {_as_uuid(value) for value in ids} - {None}
+        queryset = self.get_queryset().filter(pk__in=pks)
+        if sharding_enabled() and queryset.model._meta.label_lower in SHARDED_MODELS:
+            objects = list(
+                itertools.chain.from_iterable(
+                    scatter(lambda alias: list(queryset.using(alias)))
+                )
+            )
+        else:
+            objects = list(queryset)
+
+        serializer = self.get_serializer(objects, many=True)
+        # Keyed by object, not by the rendered id, which ?fields= may leave out
+        found = {obj.pk: item for obj, item in zip(objects, serializer.data)}
+        results = []
+        for value in ids:
+            # A rendered object may be empty, e.g. with ?fields=bogus
+            key = _as_uuid(value)
+            results.append(
+                found[key] if key in found else {"id": value, "error": "not_found"}
+            )
+        return Response({"results": results})
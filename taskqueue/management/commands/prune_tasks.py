@@ -0,0 +1,20 @@
+# Standard Library Imports
+from datetime import timedelta
+
+# Django Imports
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Project-Specific Imports
+from taskqueue.queue import prune_finished
+
+
+class Command(BaseCommand):
+    help = "Delete successfully finished tasks older than --keep-days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-days", type=int, default=7)
+
+    def handle(self, *args, **options):
+        removed = prune_finished(timezone.now() - timedelta(days=options["keep_days"]))
+        self.stdout.write(f"Pruned {removed} finished tasks")
@@ -0,0 +1,88 @@
+# Standard Library Imports
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+# Django Imports
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Project-Specific Imports
+from taskqueue.queue import claim, requeue_stale, run_pending, run_task
+
+
+def work(worker, stop, poll_interval):
+    """
+    Claim and run tasks until `stop` is set, polling while the queue is empty.
+    """
+    # Ctrl-C reaches the whole process group; let the parent stop us cleanly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    last_sweep = 0
+    while not stop.is_set():
+        task = claim(worker)
+        if task is not None:
+            run_task(task)
+            continue
+        if time.monotonic() - last_sweep > settings.TASK_VISIBILITY_TIMEOUT_SECONDS:
+            requeue_stale()
+            last_sweep = time.monotonic()
+        stop.wait(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the database queue in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling an empty queue again",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Run the tasks that are due in this process, then exit",
+        )
+
+    def handle(self, *args, **options):
+        name = f"{socket.gethostname()}:{os.getpid()}"
+        if options["burst"]:
+            processed = run_pending(worker=name)
+            self.stdout.write(f"Ran {processed} tasks")
+            return
+
+        # Forked workers must open their own database connections
+        connections.close_all()
+        stop = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(
+                target=work,
+                args=(f"{name}/{index}", stop, options["poll_interval"]),
+                daemon=True,
+            )
+            for index in range(options["processes"])
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f"Started {len(workers)} workers")
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+        # Tasks in flight finish before their worker exits
+        for process in workers:
+            process.join()
+        self.stdout.write("Workers stopped")
@@ -0,0 +1,25 @@
+# Standard Library Imports
+import json
+from datetime import timedelta
+
+# Django Imports
+from django.core.management.base import BaseCommand
+
+# Project-Specific Imports
+from taskqueue.queue import queue_metrics
+
+
+class Command(BaseCommand):
+    help = "Print task queue depth and latency metrics as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=60,
+            help="Minutes of finished tasks to compute latencies over",
+        )
+
+    def handle(self, *args, **options):
+        metrics = queue_metrics(window=timedelta(minutes=options["window"]))
+        self.stdout.write(json.dumps(metrics, indent=2))
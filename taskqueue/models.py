@@ -0,0 +1,73 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from isa.models import TimeStampedUUIDModel
+
+
+class Task(TimeStampedUUIDModel):
+    """
+    Model representing a unit of background work waiting for, or run by, a worker
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=200, help_text="Registered task name")
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(
+        default=0, help_text="Higher priority tasks are claimed first"
+    )
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(
+        default=timezone.now, help_text="Not claimed before this time"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    idempotency_key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Enqueueing the same key again returns the existing task",
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-priority", "run_at"]
+        indexes = [
+            # Claim order: due queued tasks, highest priority first
+            models.Index(
+                fields=["status", "-priority", "run_at"], name="task_claim_idx"
+            ),
+            models.Index(fields=["status", "finished_at"], name="task_finished_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class TaskLock(models.Model):
+    """
+    Model claiming a task for one worker on databases without SKIP LOCKED
+    """
+
+    task = models.OneToOneField(
+        Task, primary_key=True, related_name="lock", on_delete=models.CASCADE
+    )
+    worker = models.CharField(max_length=100)
+    locked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.task_id} locked by {self.worker}"
@@ -0,0 +1,276 @@
+"""
+Database-backed background tasks.
+
+Request handlers enqueue work as `Task` rows (in the same transaction as the
+write that caused it) and `run_tasks` workers claim and run them:
+
+- PostgreSQL claims with `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent
+  workers never wait on each other's rows.
+- Databases without SKIP LOCKED (SQLite) claim by inserting a `TaskLock` row;
+  its primary key lets exactly one worker win each task.
+
+Failed tasks are retried with exponential backoff until `max_attempts`, then
+kept as failed for inspection.
+"""
+
+# Standard Library Imports
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+# Django Imports
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+# Project-Specific Imports
+from isa.stats import percentile
+
+from .models import Task, TaskLock
+
+# Logger Initialization
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+# Candidates tried per claim when claiming through the lock table
+CLAIM_CANDIDATES = 10
+
+
+class TaskFunction:
+    """
+    A function registered with @task. Call it to run inline, or `enqueue()` it.
+    """
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *, priority=None, idempotency_key=None, delay=None, **kwargs):
+        """
+        Queue a run with JSON-serializable keyword arguments. Returns the task;
+        an existing one if a task was already queued under `idempotency_key`.
+        """
+        fields = {
+            "name": self.name,
+            "kwargs": kwargs,
+            "priority": self.priority if priority is None else priority,
+            "max_attempts": self.max_attempts,
+            "run_at": timezone.now() + (delay or timedelta()),
+        }
+        if idempotency_key is None:
+            return Task.objects.create(**fields)
+        alias = router.db_for_write(Task)
+        try:
+            with transaction.atomic(using=alias):
+                return Task.objects.using(alias).create(
+                    idempotency_key=idempotency_key, **fields
+                )
+        except IntegrityError:
+            return Task.objects.using(alias).get(idempotency_key=idempotency_key)
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=5):
+    """
+    Register a function as a background task, under `<module>.<function>`
+    unless a name is given.
+    """
+
+    def register(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        REGISTRY[task_name] = TaskFunction(func, task_name, priority, max_attempts)
+        return REGISTRY[task_name]
+
+    return register(func) if func is not None else register
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff with jitter before retry number `attempts`.
+    """
+    delay = min(
+        settings.TASK_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.TASK_RETRY_MAX_SECONDS,
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def _due():
+    return Task.objects.filter(status=Task.QUEUED, run_at__lte=timezone.now()).order_by(
+        "-priority", "run_at"
+    )
+
+
+def _start(task, worker):
+    task.status = Task.RUNNING
+    task.locked_by = worker
+    task.started_at = timezone.now()
+    task.attempts = F("attempts") + 1
+    task.save(update_fields=["status", "locked_by", "started_at", "attempts"])
+    task.refresh_from_db(fields=["attempts"])
+
+
+def claim(worker):
+    """
+    Claim the next due task for `worker`, or return None if there is none.
+    """
+    alias = router.db_for_write(Task)
+    if connections[alias].features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=alias):
+            task = _due().using(alias).select_for_update(skip_locked=True).first()
+            if task is not None:
+                _start(task, worker)
+            return task
+
+    for task in _due().using(alias)[:CLAIM_CANDIDATES]:
+        try:
+            with transaction.atomic(using=alias):
+                TaskLock.objects.using(alias).create(task=task, worker=worker)
+        except IntegrityError:
+            continue  # another worker got there first
+        task.refresh_from_db(fields=["status"])
+        if task.status != Task.QUEUED:
+            # Finished between our read and the lock
+            TaskLock.objects.using(alias).filter(task=task).delete()
+            continue
+        _start(task, worker)
+        return task
+    return None
+
+
+def _finish(task, **fields):
+    for field, value in fields.items():
+        setattr(task, field, value)
+    task.locked_by = ""
+    task.save(update_fields=[*fields, "locked_by"])
+    TaskLock.objects.filter(task=task).delete()
+
+
+def run_task(task):
+    """
+    Run a claimed task and record the outcome, scheduling a retry on failure.
+    """
+    wait = (task.started_at - task.run_at).total_seconds()
+    task_function = REGISTRY.get(task.name)
+    try:
+        if task_function is None:
+            raise LookupError(f"No task registered as {task.name!r}")
+        task_function(**task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            _finish(
+                task,
+                status=Task.QUEUED,
+                run_at=timezone.now() + retry_delay(task.attempts),
+                last_error=error,
+            )
+            logger.warning(
+                "Task %s %s failed (attempt %d), retrying",
+                task.name,
+                task.id,
+                task.attempts,
+            )
+        else:
+            _finish(
+                task, status=Task.FAILED, finished_at=timezone.now(), last_error=error
+            )
+            logger.error("Task %s %s failed for good:\n%s", task.name, task.id, error)
+        return False
+
+    _finish(task, status=Task.DONE, finished_at=timezone.now())
+    logger.info(
+        "Task %s %s done in %.1fms after waiting %.1fms",
+        task.name,
+        task.id,
+        (task.finished_at - task.started_at).total_seconds() * 1000,
+        wait * 1000,
+    )
+    return True
+
+
+def run_pending(worker="inline", limit=None):
+    """
+    Run due tasks until none are left (or `limit` have run). Returns the count.
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        task = claim(worker)
+        if task is None:
+            break
+        run_task(task)
+        processed += 1
+    return processed
+
+
+def requeue_stale(timeout=None):
+    """
+    Put tasks back on the queue whose worker died while running them.
+    """
+    timeout = timeout or settings.TASK_VISIBILITY_TIMEOUT_SECONDS
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    with transaction.atomic(using=router.db_for_write(Task)):
+        TaskLock.objects.filter(task__in=stale).delete()
+        return stale.update(status=Task.QUEUED, locked_by="")
+
+
+def _percentile(sorted_values, pct):
+    value = percentile(sorted_values, pct)
+    return None if value is None else round(value, 3)
+
+
+def queue_metrics(window=timedelta(hours=1)):
+    """
+    Queue depth per status and task, age of the oldest due task, and queue
+    wait / run time percentiles (seconds) of the tasks finished in `window`.
+    """
+    now = timezone.now()
+    depth = {
+        row["status"]: row["total"]
+        for row in Task.objects.order_by().values("status").annotate(total=Count("id"))
+    }
+    queued = {
+        row["name"]: row["total"]
+        for row in Task.objects.filter(status=Task.QUEUED)
+        .order_by()
+        .values("name")
+        .annotate(total=Count("id"))
+    }
+    oldest = _due().order_by().aggregate(oldest=Min("run_at"))["oldest"]
+
+    finished = Task.objects.filter(
+        status=Task.DONE, finished_at__gte=now - window
+    ).values_list("run_at", "started_at", "finished_at")
+    waits, runs = [], []
+    for run_at, started_at, finished_at in finished:
+        waits.append((started_at - run_at).total_seconds())
+        runs.append((finished_at - started_at).total_seconds())
+    waits.sort()
+    runs.sort()
+    return {
+        "depth": depth,
+        "queued_by_name": queued,
+        "oldest_due_seconds": (now - oldest).total_seconds() if oldest else 0,
+        "finished": len(runs),
+        "wait_p50": _percentile(waits, 50),
+        "wait_p95": _percentile(waits, 95),
+        "run_p50": _percentile(runs, 50),
+        "run_p95": _percentile(runs, 95),
+    }
+
+
+def prune_finished(before):
+    """
+    Delete tasks that finished successfully before `before`. Failed tasks are
+    kept for inspection. Returns the number deleted.
+    """
+    return Task.objects.filter(status=Task.DONE, finished_at__lt=before).delete()[0]
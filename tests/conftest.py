@@ -1,7 +1,35 @@
 import pytest
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 
 @pytest.fixture
 def api_client():
     return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def process_cache(settings):
+    # Tests run in one process; query counts are not padded by cache queries.
+    # The shared database cache is covered in test_caching.py
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    # Responses cached for everyone must not leak from one test to the next
+    cache.clear()
+
+
+def pytest_collection_modifyitems(items):
+    # With shards configured, rows are written to every shard database (users
+    # are replicated to all of them), so every database test may use them
+    if not settings.SHARDS:
+        return
+    for item in items:
+        if item.get_closest_marker("single_database"):
+            # Sharded reads are spread over several connections
+            item.add_marker(pytest.mark.skip(reason="counts queries on one database"))
+        marker = item.get_closest_marker("django_db")
+        if marker is not None:
+            kwargs = {**marker.kwargs, "databases": "__all__"}
+            item.add_marker(pytest.mark.django_db(*marker.args, **kwargs), False)
@@ -0,0 +1,139 @@
+"""
+In-process stand-in for an S3-compatible object store, serving one bucket
+over HTTP with the subset of the API isa.s3.S3Client uses.
+"""
+
+import hashlib
+import threading
+import uuid
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class FakeS3:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.objects = {}
+        self.uploads = {}
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def route(self):
+                url = urlsplit(self.path)
+                bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+                assert bucket == fake.bucket
+                assert self.headers["Authorization"].startswith("AWS4-HMAC-SHA256 ")
+                query = {k: v[0] for k, v in parse_qs(url.query, True).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                with fake.lock:
+                    fake.requests.append((self.command, key, query))
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    return key, query, body
+                finally:
+                    if "partNumber" in query:
+                        # Slow parts down so concurrent uploads overlap
+                        threading.Event().wait(0.05)
+                    with fake.lock:
+                        fake.in_flight -= 1
+
+            def reply(self, status=200, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_PUT(self):
+                key, query, body = self.route()
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if "uploadId" in query:
+                    fake.uploads[query["uploadId"]][int(query["partNumber"])] = body
+                else:
+                    fake.objects[key] = body
+                self.reply(headers={"ETag": etag})
+
+            def do_POST(self):
+                key, query, body = self.route()
+                if "uploads" in query:
+                    upload_id = uuid.uuid4().hex
+                    fake.uploads[upload_id] = {}
+                    result = (
+                        f"<InitiateMultipartUploadResult><UploadId>{upload_id}"
+                        f"</UploadId></InitiateMultipartUploadResult>"
+                    )
+                    return self.reply(body=result.encode())
+                parts = fake.uploads.pop(query["uploadId"])
+                numbers = [
+                    int(part.text) for part in ET.fromstring(body).iter("PartNumber")
+                ]
+                fake.objects[key] = b"".join(parts[number] for number in numbers)
+                self.reply(body=b"<CompleteMultipartUploadResult/>")
+
+            def do_GET(self):
+                key, query, _ = self.route()
+                if not key:
+                    return self.reply(body=fake.listing(query))
+                if key not in fake.objects:
+                    return self.reply(404, b"<Error><Code>NoSuchKey</Code></Error>")
+                self.reply(body=fake.objects[key])
+
+            def do_HEAD(self):
+                key, _, _ = self.route()
+                if key not in fake.objects:
+                    return self.reply(404)
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(fake.objects[key])))
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+                self.end_headers()
+
+            def do_DELETE(self):
+                key, query, _ = self.route()
+                if "uploadId" in query:
+                    fake.uploads.pop(query["uploadId"], None)
+                else:
+                    fake.objects.pop(key, None)
+                self.reply(204)
+
+        return Handler
+
+    def listing(self, query):
+        prefix, delimiter = query.get("prefix", ""), query.get("delimiter", "")
+        prefixes, keys = set(), []
+        for key in sorted(self.objects):
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix) :]
+            if delimiter and delimiter in rest:
+                prefixes.add(prefix + rest.split(delimiter)[0] + delimiter)
+            else:
+                keys.append(key)
+        body = "".join(
+            f"<CommonPrefixes><Prefix>{name}</Prefix></CommonPrefixes>"
+            for name in sorted(prefixes)
+        ) + "".join(f"<Contents><Key>{key}</Key></Contents>" for key in keys)
+        return f"<ListBucketResult>{body}</ListBucketResult>".encode()
@@ -0,0 +1,197 @@
+import threading
+import time
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import CacheHandler, cache
+from django.core.management import call_command
+
+from isa import caching
+from isa.caching import bump_generation, generation, get_or_compute
+from taskqueue.models import Task
+from taskqueue.queue import run_pending
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def test_concurrent_misses_compute_once() -> None:
+    """
+    Test concurrent callers of a missing key wait for a single computation
+    """
+    calls, results = [], []
+    start = threading.Barrier(5)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    def read():
+        start.wait()
+        results.append(get_or_compute("single-flight", compute, ttl=60))
+
+    threads = [threading.Thread(target=read) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+
+def test_waiters_back_off(monkeypatch) -> None:
+    """
+    Test callers waiting for another process's computation poll the shared
+    cache at growing intervals
+    """
+    cache.add("slow:lock", 1)
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 8:
+            cache.set("slow", ("value", time.time() + 60, 0.01), 60)
+
+    monkeypatch.setattr(
+        caching,
+        "time",
+        SimpleNamespace(monotonic=time.monotonic, time=time.time, sleep=sleep),
+    )
+    assert get_or_compute("slow", lambda: "computed", ttl=60) == "value"
+    assert len(sleeps) == 8
+    assert sleeps[-1] > 4 * sleeps[0] and max(sleeps) <= caching.MAX_POLL_INTERVAL
+
+
+def test_generation_never_reused() -> None:
+    """
+    Test a user's cache generation changes on every write and never comes
+    back once evicted
+    """
+    seen = {generation("user")}
+    bump_generation("user")
+    seen.add(generation("user"))
+    cache.delete("cache-generation:user")
+    seen.add(generation("user"))
+    assert len(seen) == 3
+    assert generation("user") in seen
+
+
+def test_stale_value_served_while_refreshing() -> None:
+    """
+    Test an expired value is served as is while another caller refreshes it,
+    and refreshed by the next caller otherwise
+    """
+    cache.set("stale", ("old", time.time() - 1, 0.01), 60)
+    cache.add("stale:lock", 1)
+    assert get_or_compute("stale", lambda: "new", ttl=60, stale_ttl=60) == "old"
+
+    cache.delete("stale:lock")
+    assert get_or_compute("stale", lambda: "new", ttl=60, stale_ttl=60) == "new"
+    assert get_or_compute("stale", lambda: "newer", ttl=60, stale_ttl=60) == "new"
+
+
+def test_early_expiration() -> None:
+    """
+    Test a value that is slow to compute is refreshed before it expires
+    """
+    cache.set("early", ("old", time.time() + 1, 1e6), 60)
+    assert get_or_compute("early", lambda: "new", ttl=60) == "new"
+
+
+def test_hot_feed_cached_for_everyone(api_client) -> None:
+    """
+    Test the hot feed page is computed once for all viewers, with each
+    viewer's likes applied to it on every request
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post(caption="first")
+    assert api_client.get("/imageshare/posts").data["count"] == 1
+
+    f.create_post(caption="second")
+    f.create_like(post=post, liked_by=auth_user)
+    response = api_client.get("/imageshare/posts")
+    assert response.data["count"] == 1
+    assert response.data["results"][0]["liked_by_me"]
+
+    api_client.force_authenticate(f.create_user(username="other"))
+    response = api_client.get("/imageshare/posts")
+    assert response.data["count"] == 1
+    assert not response.data["results"][0]["liked_by_me"]
+
+
+def test_followed_feed_cached_until_own_write(api_client) -> None:
+    """
+    Test the followed feed is served from the cache until the viewer writes
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    f.create_post(caption="first", created_by=auth_user)
+    assert api_client.get("/imageshare/posts/followed").data["count"] == 1
+
+    author = f.create_user(username="author")
+    f.create_post(caption="second", created_by=author)
+    f.create_follow(created_by=auth_user, following=author)
+    assert api_client.get("/imageshare/posts/followed").data["count"] == 2
+
+
+@pytest.mark.single_database
+def test_sign_in_warms_caches(api_client, settings, django_assert_num_queries) -> None:
+    """
+    Test signing in queues a task that precomputes the feeds, suggestions and profile
+    """
+    settings.BASE_URL = "http://testserver"
+    f.create_post(caption="hot")
+    _test_authenticate_user(api_client, "username", "password123")
+    assert Task.objects.filter(name="imageshare.tasks.warm_user_caches").count() == 1
+    run_pending()
+
+    # Only authentication (and the viewer's likes on the hot feed page): every
+    # response comes from the cache
+    for path, queries in (
+        ("/imageshare/posts/followed", 1),
+        ("/imageshare/posts", 2),
+        ("/imageshare/follow-suggestions/", 1),
+        ("/user/me", 1),
+    ):
+        with django_assert_num_queries(queries):
+            response = api_client.get(path)
+        assert response.status_code == 200
+
+
+def test_database_cache_shared_between_processes(settings) -> None:
+    """
+    Test the default cache backend is visible to other processes, which get
+    their own cache connections
+    """
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "isa_cache",
+        }
+    }
+    cache.set("warmed", "by a task worker")
+    other_process = CacheHandler(settings.CACHES)
+    assert other_process["default"].get("warmed") == "by a task worker"
+
+
+def test_warm_caches_command(api_client, settings, django_assert_num_queries) -> None:
+    """
+    Test the most active users' caches are warmed ahead of their requests
+    """
+    settings.BASE_URL = "http://testserver"
+    active = f.create_user(username="active")
+    api_client.force_authenticate(active)
+    f.create_like(post=f.create_post(), liked_by=active)
+
+    out = StringIO()
+    call_command("warm_caches", users=2, inline=True, stdout=out)
+    assert "Warmed 2 users" in out.getvalue()
+    with django_assert_num_queries(0):
+        assert api_client.get("/user/me").data["username"] == "active"
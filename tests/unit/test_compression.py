@@ -0,0 +1,100 @@
+import gzip
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from isa.compression import compress, level_for, negotiate
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+def test_negotiate_encoding(monkeypatch) -> None:
+    """
+    Test the preferred accepted encoding is picked and q=0 refuses one
+    """
+    monkeypatch.setattr("isa.compression.CODECS", {"gzip": None, "br": None})
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate("br;q=0, *") == "gzip"
+    assert negotiate("zstd, identity") is None
+    assert negotiate("") is None
+    assert level_for("gzip", 1024) > level_for("gzip", 1024 * 1024)
+
+
+@pytest.mark.parametrize(
+    "encoding, module, decompress, fastest, fast",
+    [
+        ("br", "brotli", lambda codec, body: codec.decompress(body), 4, 5),
+        (
+            "zstd",
+            "zstandard",
+            lambda codec, body: codec.ZstdDecompressor().decompress(body),
+            3,
+            6,
+        ),
+    ],
+)
+def test_optional_codec(
+    api_client, encoding, module, decompress, fastest, fast
+) -> None:
+    """
+    Test each optional codec compresses at a fast level when it is installed
+    """
+    codec = pytest.importorskip(module)
+    assert fastest <= level_for(encoding, 1024) <= fast
+    assert fastest <= level_for(encoding, 1024 * 1024) <= fast
+
+    _test_authenticate_user(api_client, "username", "password123")
+    for i in range(30):
+        f.create_post(caption=f"caption number {i}")
+    plain = api_client.get("/imageshare/posts")
+    response = api_client.get("/imageshare/posts", HTTP_ACCEPT_ENCODING=encoding)
+    assert response["Content-Encoding"] == encoding
+    assert json.loads(decompress(codec, response.content)) == plain.json()
+
+
+def test_json_compressed_and_cached(api_client, monkeypatch) -> None:
+    """
+    Test JSON responses are gzipped for clients accepting it, once per body
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    for i in range(30):
+        f.create_post(caption=f"caption number {i}")
+    cache.clear()
+    monkeypatch.setattr("isa.middleware.COMPRESSION_CACHE_MIN_BYTES", 0)
+    calls = []
+    monkeypatch.setattr(
+        "isa.middleware.compress",
+        lambda encoding, data: calls.append(encoding) or compress(encoding, data),
+    )
+
+    plain = api_client.get("/imageshare/posts")
+    assert not plain.has_header("Content-Encoding")
+    assert plain["Vary"].endswith("Accept-Encoding")
+
+    response = api_client.get("/imageshare/posts", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert int(response["Content-Length"]) < len(plain.content)
+    assert json.loads(gzip.decompress(response.content)) == plain.json()
+
+    again = api_client.get("/imageshare/posts", HTTP_ACCEPT_ENCODING="gzip")
+    assert again.content == response.content
+    assert calls == ["gzip"]
+
+
+def test_media_not_recompressed(api_client, settings, tmp_path) -> None:
+    """
+    Test already-compressed media such as the takeout ZIP is sent as is
+    """
+    settings.MEDIA_ROOT = tmp_path
+    user = _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post(created_by=user)
+    post.image.save("photo.jpg", ContentFile(b"\xff\xd8" + b"a" * 5000))
+
+    response = api_client.get("/user/takeout", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Type"] == "application/zip"
+    assert not response.has_header("Content-Encoding")
@@ -0,0 +1,139 @@
+import uuid
+from contextlib import ExitStack
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from imageshare.models import Post
+from isa.db_routers import ReplicaRouter
+from isa.middleware import PIN_COOKIE_NAME, ReplicaPinningMiddleware
+from tests import factories as f
+from users.models import User
+
+REPLICAS = ["replica_1", "replica_2"]
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = REPLICAS
+    cache.clear()
+    return REPLICAS
+
+
+def _routed_view(request):
+    return HttpResponse(ReplicaRouter().db_for_read(Post))
+
+
+def _request(method="get", **kwargs):
+    response = ReplicaPinningMiddleware(_routed_view)(
+        getattr(RequestFactory(), method)("/imageshare/posts", **kwargs)
+    )
+    return response, response.content.decode()
+
+
+def test_reads_go_to_replicas(replicas) -> None:
+    """
+    Test safe requests read from a replica
+    """
+    _, database = _request()
+    assert database in replicas
+
+
+def test_writes_pin_reads_to_primary(replicas) -> None:
+    """
+    Test a write reads from the primary and pins the client with a cookie
+    """
+    response, database = _request("post")
+    assert database == "default"
+    assert response.cookies[PIN_COOKIE_NAME]["max-age"] == 10
+
+    _, database = _request(HTTP_COOKIE=f"{PIN_COOKIE_NAME}=1")
+    assert database == "default"
+
+
+def test_writes_pin_jwt_user_to_primary(replicas) -> None:
+    """
+    Test a write pins the token's user to the primary through the cache
+    """
+    token = RefreshToken.for_user(User(id=uuid.uuid4())).access_token
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    _, database = _request(**auth)
+    assert database in replicas
+    _request("post", **auth)
+    _, database = _request(**auth)
+    assert database == "default"
+
+
+def test_no_replicas_configured(settings) -> None:
+    """
+    Test all reads use the primary without replicas
+    """
+    settings.DATABASE_REPLICAS = []
+    _, database = _request()
+    assert database == "default"
+
+
+@pytest.mark.skipif(
+    not django_settings.DATABASE_REPLICAS, reason="needs DJANGO_DB_REPLICAS"
+)
+# Without a test transaction: the router keeps reads inside one on the primary
+@pytest.mark.django_db(transaction=True, databases="__all__")
+def test_cookieless_client_reads_own_write_on_another_worker(
+    api_client, settings
+) -> None:
+    """
+    Test a JWT client without cookies reads its write back from the primary
+    when the read is served by another worker process, while other clients
+    read from the configured replica
+    """
+    shared_cache = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "isa_cache",
+        }
+    }
+    settings.CACHES = shared_cache
+    user = f.create_user(username="writer")
+    post = f.create_post()
+    token = RefreshToken.for_user(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get_post(client):
+        used = []
+
+        def record(alias):
+            def wrapper(execute, sql, *args):
+                # Reads of the app's tables (cache writes, e.g. throttling, run
+                # in their own transactions on the primary)
+                if sql.startswith("SELECT") and "isa_cache" not in sql:
+                    used.append(alias)
+                return execute(sql, *args)
+
+            return wrapper
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(record(alias)))
+            response = client.get(f"/imageshare/posts/{post.id}")
+        return response, set(used)
+
+    response = api_client.post(f"/imageshare/post/{post.id}/like")
+    assert response.status_code == 201
+    api_client.cookies.clear()
+    # A fresh cache connection, as in another worker process
+    settings.CACHES = {"default": {**shared_cache["default"]}}
+
+    response, used = get_post(api_client)
+    assert response.data["likes_count"] == 1 and response.data["liked_by_me"]
+    assert used == {"default"}
+
+    other = type(api_client)()
+    other.force_authenticate(f.create_user(username="reader"))
+    _, used = get_post(other)
+    assert used <= set(settings.DATABASE_REPLICAS) and used
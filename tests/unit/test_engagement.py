@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from imageshare.models import AuthorEngagement, EngagementBucket, PostEngagement
+from isa.sharding import shard_for_user
+from taskqueue.queue import run_pending
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+def test_post_stats_hourly_series(api_client) -> None:
+    """
+    Test likes and unlikes are rolled up into hourly buckets
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post()
+    f.create_like(post=post)
+    api_client.post(f"/imageshare/post/{post.id}/like")
+    api_client.delete(f"/imageshare/post/{post.id}/unlike")
+    # Rollups are recorded by a background task (plus the sign-in cache warming)
+    assert run_pending() == 4
+
+    response = api_client.get(f"/imageshare/posts/{post.id}/stats")
+    assert response.status_code == 200
+    assert response.data["total_likes"] == 1
+    assert len(response.data["series"]) == 1
+    assert response.data["series"][0]["likes"] == 2
+    assert response.data["series"][0]["unlikes"] == 1
+    author_engagement = AuthorEngagement.objects.using(
+        shard_for_user(post.created_by_id)
+    ).get(author=post.created_by)
+    assert author_engagement.likes == 2
+
+
+def test_compacted_buckets_in_daily_series(api_client) -> None:
+    """
+    Test old hourly buckets are folded into daily buckets
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post()
+    day = (timezone.now() - timedelta(days=10)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    for hour in (1, 5, 9):
+        PostEngagement.objects.create(
+            post=post,
+            resolution=EngagementBucket.HOUR,
+            bucket=day + timedelta(hours=hour),
+            likes=hour,
+        )
+    f.create_like(post=post)
+    run_pending()
+
+    call_command("compact_engagement", keep_days=7, stdout=StringIO())
+    assert (
+        not PostEngagement.objects.using(post._state.db)
+        .filter(resolution=EngagementBucket.HOUR, bucket__lt=day + timedelta(days=1))
+        .exists()
+    )
+
+    response = api_client.get(f"/imageshare/posts/{post.id}/stats?resolution=day")
+    assert response.status_code == 200
+    assert [point["likes"] for point in response.data["series"]] == [15, 1]
@@ -1,5 +1,7 @@
 import pytest
+from django.core.cache import cache
 
+from imageshare.relationships import relationship_statuses
 from tests import factories as f
 from tests.utils import _test_authenticate_user
 
@@ -68,3 +70,75 @@ def test_auth_user_not_in_follow_suggestions(api_client) -> None:
     assert response.status_code == 200
     assert response.data["suggestions"] is not None
     assert auth_user.username not in response.data["suggestions"]
+
+
+def test_relationship_statuses(api_client, django_assert_max_num_queries) -> None:
+    """
+    Test following / followed_by / mutual for a list of users in at most 2 queries,
+    and in fewer once Bloom filters of the followings are cached
+    """
+    cache.clear()
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    followed, follower, friend, stranger = (
+        f.create_user(username=name)
+        for name in ("followed", "follower", "friend", "stranger")
+    )
+    f.create_follow(created_by=auth_user, following=followed)
+    f.create_follow(created_by=auth_user, following=friend)
+    f.create_follow(created_by=follower, following=auth_user)
+    f.create_follow(created_by=friend, following=auth_user)
+    ids = [stranger.id, friend.id, follower.id, followed.id]
+    url = f"/imageshare/relationships?ids={','.join(map(str, ids))}"
+
+    # authentication and one query per direction
+    with django_assert_max_num_queries(3):
+        response = api_client.get(url)
+    assert response.status_code == 200
+    statuses = [
+        (item["following"], item["followed_by"], item["mutual"])
+        for item in response.data["relationships"]
+    ]
+    assert [item["id"] for item in response.data["relationships"]] == ids
+    assert statuses == [
+        (False, False, False),
+        (True, True, True),
+        (False, True, False),
+        (True, False, False),
+    ]
+
+    # The stranger's cached filter rules out any follow of the viewer
+    api_client.force_authenticate(stranger)
+    api_client.get(url)
+    api_client.force_authenticate(auth_user)
+    with django_assert_max_num_queries(2):
+        response = api_client.get(f"/imageshare/relationships?ids={stranger.id}")
+    assert response.data["relationships"][0]["followed_by"] is False
+
+    # Following drops the stale filter
+    api_client.force_authenticate(stranger)
+    api_client.post("/imageshare/follow", data={"following": str(auth_user.id)})
+    api_client.force_authenticate(auth_user)
+    response = api_client.get(f"/imageshare/relationships?ids={stranger.id}")
+    assert response.data["relationships"][0]["followed_by"] is True
+
+
+def test_stale_bloom_filter_never_read() -> None:
+    """
+    Test a filter cached before a follow, still present in the cache as it
+    would be for other processes, is not used after the follow, nor after its
+    generation counter is evicted
+    """
+    viewer = f.create_user(username="viewer")
+    other = f.create_user(username="other")
+    assert relationship_statuses(viewer, [other.id]) == {other.id: (False, False)}
+    generation = cache.get(f"followings-generation:{viewer.id}")
+    stale_key = f"followings-bloom:{viewer.id}:{generation}"
+    assert cache.get(stale_key) is not None
+
+    follow = f.create_follow(created_by=viewer, following=other)
+    assert cache.get(stale_key) is not None
+    assert relationship_statuses(viewer, [other.id]) == {other.id: (True, False)}
+
+    cache.delete(f"followings-generation:{viewer.id}")
+    follow.delete()
+    assert relationship_statuses(viewer, [other.id]) == {other.id: (False, False)}
@@ -0,0 +1,149 @@
+import base64
+import io
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from imageshare.models import Post
+from isa.sharding import get_sharded_object_or_404, shard_union
+from taskqueue.queue import run_pending
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+def _jpeg(size, orientation=None):
+    image = Image.new("RGB", size, (200, 80, 40))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    exif[0x010F] = "Camera maker"
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif.tobytes())
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), "image/jpeg")
+
+
+def test_upload_oriented_and_stripped_by_worker(api_client, settings, tmp_path) -> None:
+    """
+    Test an upload is recorded from its header, then rotated upright and
+    stripped of metadata by the image task
+    """
+    settings.MEDIA_ROOT = tmp_path
+    _test_authenticate_user(api_client, "username", "password123")
+    upload = _jpeg((40, 20), orientation=6)  # rotated 90 degrees clockwise
+
+    response = api_client.post(
+        "/imageshare/posts",
+        data={"caption": "sideways", "image": upload},
+        format="multipart",
+    )
+    assert response.status_code == 201
+    assert (response.data["width"], response.data["height"]) == (40, 20)
+    assert response.data["image_format"] == "JPEG"
+
+    # The image task and the sign-in cache warming
+    assert run_pending() == 2
+    post = get_sharded_object_or_404(Post.objects, id=response.data["id"])
+    assert (post.width, post.height) == (20, 40)
+    assert post.image_processed_at is not None
+    assert post.byte_size == post.image.size
+    with Image.open(post.image.path) as image:
+        assert image.size == (20, 40)
+        assert not image.getexif()
+    assert len(list(tmp_path.rglob("*.jpg"))) == 1
+
+
+def test_upload_rejected_from_header(api_client, settings) -> None:
+    """
+    Test non-images and oversized images are rejected without decoding them
+    """
+    settings.IMAGE_MAX_PIXELS = 100
+    _test_authenticate_user(api_client, "username", "password123")
+
+    for upload in (
+        SimpleUploadedFile("notes.jpg", b"not an image", "image/jpeg"),
+        _jpeg((20, 20)),
+    ):
+        response = api_client.post(
+            "/imageshare/posts",
+            data={"caption": "nope", "image": upload},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert "image" in response.data
+    assert not shard_union(Post.objects.values_list("id", flat=True))
+
+
+def test_feed_embeds_placeholder_and_aspect_ratio(
+    api_client, settings, tmp_path
+) -> None:
+    """
+    Test processed posts carry a ~20px data URI preview and their aspect ratio
+    """
+    settings.MEDIA_ROOT = tmp_path
+    _test_authenticate_user(api_client, "username", "password123")
+    api_client.post(
+        "/imageshare/posts",
+        data={"caption": "wide", "image": _jpeg((300, 100))},
+        format="multipart",
+    )
+    run_pending()
+
+    post = api_client.get("/imageshare/posts").data["results"][0]
+    assert post["aspect_ratio"] == 3.0
+    prefix = "data:image/jpeg;base64,"
+    assert post["placeholder"].startswith(prefix)
+    preview = base64.b64decode(post["placeholder"][len(prefix) :])
+    with Image.open(io.BytesIO(preview)) as image:
+        assert image.size == (20, 7)
+
+
+def test_shared_image_processed_for_every_post(settings, tmp_path) -> None:
+    """
+    Test posts sharing one image file (as seeded posts do) are each
+    processed, and the shared original is only removed once unused
+    """
+    settings.MEDIA_ROOT = tmp_path
+    upload = _jpeg((40, 20), orientation=6)
+    name = default_storage.save("posts/seed/shared.jpg", upload)
+    posts = [f.create_post(image=name) for _ in range(2)]
+
+    call_command("process_images", stdout=io.StringIO())
+    assert run_pending() == 2
+    for post in posts:
+        post.refresh_from_db()
+        assert post.image_processed_at is not None
+        assert post.image.name != name
+        assert default_storage.exists(post.image.name)
+    assert not default_storage.exists(name)
+
+
+def test_process_images_counts_queued_tasks(settings, tmp_path) -> None:
+    """
+    Test posts already queued are not counted again, and --all reprocesses
+    images that were already processed
+    """
+    settings.MEDIA_ROOT = tmp_path
+    name = default_storage.save("posts/photo.jpg", _jpeg((40, 20)))
+    post = f.create_post(image=name)
+
+    def queued(**options):
+        stdout = io.StringIO()
+        call_command("process_images", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    assert queued() == "Queued image processing for 1 posts\n"
+    assert queued() == "Queued image processing for 0 posts\n"
+    assert run_pending() == 1
+    post.refresh_from_db()
+    processed_at = post.image_processed_at
+
+    for _ in range(2):
+        assert queued(all=True) == "Queued image processing for 1 posts\n"
+        assert run_pending() == 1
+    post.refresh_from_db()
+    assert post.image_processed_at > processed_at
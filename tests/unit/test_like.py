@@ -31,3 +31,42 @@ def test_like_an_already_liked_post(api_client) -> None:
     f.create_like(post=post, liked_by=auth_user)
     response = api_client.post(f"/imageshare/post/{post.id}/like")
     assert response.status_code == 400
+
+
+def test_post_likers_are_cursor_paginated(api_client) -> None:
+    """
+    Test post likers are listed one cursor page at a time
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post()
+    for i in range(3):
+        f.create_like(post=post, liked_by=f.create_user(username=f"liker{i}"))
+
+    response = api_client.get(f"/imageshare/post/{post.id}/like?page_size=2")
+    assert response.status_code == 200
+    assert response.data["total_likes"] == 3
+    assert response.data["liked_by"] == ["liker0", "liker1"]
+
+    response = api_client.get(response.data["next"])
+    assert response.status_code == 200
+    assert response.data["liked_by"] == ["liker2"]
+    assert response.data["next"] is None
+
+
+def test_post_likers_followed_first(api_client) -> None:
+    """
+    Test likers followed by the authenticated user are listed first
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post()
+    for i in range(3):
+        f.create_like(post=post, liked_by=f.create_user(username=f"liker{i}"))
+    f.create_follow(
+        created_by=auth_user,
+        following=post.likes.get(liked_by__username="liker2").liked_by,
+    )
+
+    response = api_client.get(f"/imageshare/post/{post.id}/like?followed_first=true")
+    assert response.status_code == 200
+    assert response.data["followed_liked_by"] == ["liker2"]
+    assert response.data["liked_by"] == ["liker0", "liker1"]
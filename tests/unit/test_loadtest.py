@@ -0,0 +1,72 @@
+import importlib.util
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from imageshare.management.commands.loadtest import parse_mix, summarise
+from isa.stats import percentile
+from tests import factories as f
+
+
+def test_percentile_nearest_rank() -> None:
+    """
+    Test percentiles are taken with the nearest-rank method
+    """
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 7) == 7
+    # Ranks round up: the median of five values is the third
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile([1, 2, 3, 4, 5], 95) == 5
+    assert percentile([1, 2, 3, 4, 5], 0) == 1
+    assert percentile([], 50) is None
+
+
+def test_summarise_reports_error_rate_per_scenario() -> None:
+    """
+    Test load test samples are summarised per scenario
+    """
+    samples = [("feed", 0.010, True, 200)] * 9 + [("feed", 0.500, False, 500)]
+    summary = summarise(samples, elapsed=2.0)
+    assert summary["feed"]["requests"] == 10
+    assert summary["feed"]["throughput_rps"] == 5.0
+    assert summary["feed"]["error_rate"] == 0.1
+    assert summary["feed"]["p50_ms"] == 10.0
+    assert summary["feed"]["p99_ms"] == 500.0
+    assert summary["feed"]["statuses"] == {"200": 9, "500": 1}
+
+
+def test_parse_mix_rejects_unknown_scenarios() -> None:
+    """
+    Test an unknown scenario in the mix is rejected
+    """
+    assert parse_mix("feed=3,like=1") == {"feed": 3.0, "like": 1.0}
+    with pytest.raises(CommandError):
+        parse_mix("feed=3,explode=1")
+
+
+def test_asgi_server_needs_uvicorn(monkeypatch) -> None:
+    """
+    Test a missing uvicorn is reported before any work when --server asgi starts the app
+    """
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util,
+        "find_spec",
+        lambda name, *args: None if name == "uvicorn" else find_spec(name, *args),
+    )
+    with pytest.raises(CommandError, match="uvicorn"):
+        call_command("loadtest", server="asgi")
+
+
+@pytest.mark.django_db
+def test_like_scenario_needs_posts() -> None:
+    """
+    Test a mix with likes fails up front when there are no posts on any shard
+    """
+    f.create_user(username="seed_0000000")
+    with pytest.raises(CommandError, match="No posts to like"):
+        call_command("loadtest", url="http://127.0.0.1:9", mix="like=1")
@@ -1,6 +1,14 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+
 import pytest
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from imageshare.models import Post
 
 from tests import factories as f
 from tests.utils import _test_authenticate_user
@@ -96,3 +104,182 @@ def test_get_posts(api_client) -> None:
     response = api_client.get("/imageshare/posts?search=2")
     assert response.status_code == 200
     assert response.data["count"] == 1
+
+
+def test_posts_ranked_by_hot_score(api_client) -> None:
+    """
+    Test a fresh post outranks an older post with more likes
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    old_post = f.create_post(caption="old viral post")
+    new_post = f.create_post(caption="new post")
+    for _ in range(5):
+        f.create_like(post=old_post)
+    f.create_like(post=new_post)
+    Post.objects.using(old_post._state.db).filter(pk=old_post.pk).update(
+        created_at=timezone.now() - timedelta(days=10)
+    )
+    call_command("refresh_hot_scores", all=True, stdout=StringIO())
+
+    response = api_client.get("/imageshare/posts")
+    assert response.status_code == 200
+    assert [post["caption"] for post in response.data["results"]] == [
+        "new post",
+        "old viral post",
+    ]
+
+
+def test_like_and_unlike_update_likes_count(api_client) -> None:
+    """
+    Test the stored likes counter follows likes and unlikes
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post()
+    score = Post.objects.using(post._state.db).get(pk=post.pk).hot_score
+
+    api_client.post(f"/imageshare/post/{post.id}/like")
+    post.refresh_from_db()
+    assert post.likes_count == 1
+    assert post.hot_score == pytest.approx(score, abs=1e-6)
+
+    f.create_like(post=post)
+    post.refresh_from_db()
+    assert post.likes_count == 2
+    assert post.hot_score > score
+
+    api_client.delete(f"/imageshare/post/{post.id}/unlike")
+    post.refresh_from_db()
+    assert post.likes_count == 1
+
+
+@pytest.mark.single_database
+def test_liked_by_me_without_loading_likes(
+    api_client, django_assert_num_queries
+) -> None:
+    """
+    Test posts report whether the viewer liked them with a constant number of queries
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    liked_post = f.create_post(caption="liked")
+    other_post = f.create_post(caption="other")
+    f.create_like(post=liked_post, liked_by=auth_user)
+    for _ in range(5):
+        f.create_like(post=liked_post)
+        f.create_like(post=other_post)
+
+    # authentication, page count, the page itself and the viewer's likes on it
+    with django_assert_num_queries(4):
+        response = api_client.get("/imageshare/posts")
+    assert response.status_code == 200
+    posts = {post["caption"]: post for post in response.data["results"]}
+    assert posts["liked"]["liked_by_me"] is True
+    assert posts["liked"]["likes_count"] == 6
+    assert posts["other"]["liked_by_me"] is False
+    assert posts["other"]["likes_count"] == 5
+
+    # The page is cached for everyone; other viewers only look up their likes
+    api_client.force_authenticate(f.create_user(username="other"))
+    with django_assert_num_queries(1):
+        response = api_client.get("/imageshare/posts")
+    assert not any(post["liked_by_me"] for post in response.data["results"])
+
+
+def test_liked_by_me_with_sparse_fields(api_client) -> None:
+    """
+    Test the viewer's likes are merged into the cached hot feed page when
+    ?fields= leaves out the post ids
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    f.create_like(post=f.create_post(caption="liked"), liked_by=auth_user)
+    f.create_post(caption="other")
+
+    path = "/imageshare/posts?fields=caption,liked_by_me"
+    response = api_client.get(path)
+    assert response.status_code == 200
+    assert sorted(response.data["results"], key=lambda post: post["caption"]) == [
+        {"caption": "liked", "liked_by_me": True},
+        {"caption": "other", "liked_by_me": False},
+    ]
+
+    # Served from the cache to another viewer
+    api_client.force_authenticate(f.create_user(username="other"))
+    response = api_client.get(path)
+    assert response.status_code == 200
+    assert [post["liked_by_me"] for post in response.data["results"]] == [False] * 2
+
+
+@pytest.mark.single_database
+def test_sparse_post_fields(api_client, django_assert_num_queries) -> None:
+    """
+    Test ?fields=, ?omit= and ?expand= shape post payloads and their queries
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    f.create_post(created_by=auth_user, caption="mine")
+
+    with django_assert_num_queries(3) as captured:
+        response = api_client.get("/imageshare/posts?fields=id,caption")
+    assert response.data["results"] == [
+        {"id": str(Post.objects.get().id), "caption": "mine"}
+    ]
+    page_sql = captured.captured_queries[-1]["sql"]
+    assert "placeholder" not in page_sql and "EXISTS" not in page_sql.upper()
+
+    response = api_client.get("/imageshare/posts?omit=placeholder,liked_by_me")
+    post = response.data["results"][0]
+    assert "placeholder" not in post and "liked_by_me" not in post
+    assert post["created_by"] == "username"
+
+    response = api_client.get(
+        "/imageshare/posts?fields=id,created_by&expand=created_by"
+    )
+    assert response.data["results"][0]["created_by"] == {
+        "id": str(auth_user.id),
+        "username": "username",
+        "first_name": auth_user.first_name,
+        "last_name": auth_user.last_name,
+    }
+
+
+@pytest.mark.single_database
+def test_batch_get_posts(api_client, django_assert_num_queries, settings) -> None:
+    """
+    Test posts are fetched by id in one query, in request order, with not-found markers
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    first, second = f.create_post(caption="first"), f.create_post(caption="second")
+    ids = [str(second.id), "not-a-uuid", str(first.id), str(uuid.uuid4())]
+
+    # authentication and the posts
+    with django_assert_num_queries(2):
+        response = api_client.get(
+            f"/imageshare/posts/batch?ids={','.join(ids)}&fields=caption"
+        )
+    assert response.status_code == 200
+    assert response.data["results"] == [
+        {"caption": "second"},
+        {"id": "not-a-uuid", "error": "not_found"},
+        {"caption": "first"},
+        {"id": ids[3], "error": "not_found"},
+    ]
+
+    settings.API_BATCH_MAX_IDS = 1
+    response = api_client.get(f"/imageshare/posts/batch?ids={ids[0]},{ids[2]}")
+    assert response.status_code == 400
+
+
+def test_batch_get_posts_with_no_fields(api_client) -> None:
+    """
+    Test a found post that renders to an empty object is not reported missing
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post(caption="first")
+    missing = str(uuid.uuid4())
+
+    response = api_client.get(
+        f"/imageshare/posts/batch?ids={post.id},{missing}&fields=bogus"
+    )
+    assert response.status_code == 200
+    assert response.data["results"] == [
+        {},
+        {"id": missing, "error": "not_found"},
+    ]
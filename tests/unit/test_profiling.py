@@ -0,0 +1,79 @@
+import pytest
+from django.test import RequestFactory
+
+from isa.middleware import ProfilingMiddleware
+from isa.profiling import profiling_token
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiles(settings, tmp_path):
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_SAMPLE_RATE = 0
+    return tmp_path
+
+
+def test_signed_header_profiles_request(api_client, profiles, settings) -> None:
+    """
+    Test requests with a signed X-Profile header are profiled into a bounded ring buffer
+    """
+    settings.PROFILING_MAX_FILES = 2
+    _test_authenticate_user(api_client, "username", "password123")
+
+    response = api_client.get("/imageshare/posts", HTTP_X_PROFILE="forged")
+    assert not response.has_header("X-Profile-Id")
+
+    ids = [
+        api_client.get("/imageshare/posts", HTTP_X_PROFILE=profiling_token())[
+            "X-Profile-Id"
+        ]
+        for _ in range(3)
+    ]
+    assert sorted(path.stem for path in profiles.glob("*.prof")) == ids[1:]
+
+    settings.PROFILING_SAMPLE_RATE = 1
+    assert api_client.get("/imageshare/posts").has_header("X-Profile-Id")
+
+
+def test_staff_read_profiles(api_client, profiles) -> None:
+    """
+    Test staff list captured profiles and read their top functions
+    """
+    user = _test_authenticate_user(api_client, "username", "password123")
+    profile_id = api_client.get("/user/me", HTTP_X_PROFILE=profiling_token())[
+        "X-Profile-Id"
+    ]
+    assert api_client.get("/profiles").status_code == 403
+
+    user.is_staff = True
+    user.save()
+    response = api_client.get("/profiles")
+    assert response.status_code == 200
+    summary = response.data["profiles"][0]
+    assert summary["id"] == profile_id
+    assert summary["path"] == "/user/me"
+    assert summary["status"] == 200
+
+    response = api_client.get(f"/profiles/{profile_id}?sort=tottime&limit=5")
+    assert "function calls" in response.data["report"]
+    assert api_client.get("/profiles/123-nothere0").status_code == 404
+    assert api_client.post("/profiles/token").data["header"] == "X-Profile"
+
+
+def test_view_errors_not_retried(profiles) -> None:
+    """
+    Test a view raising ValueError while profiled runs once and its error propagates
+    """
+    calls = []
+
+    def view(request):
+        calls.append(request)
+        raise ValueError("bad input")
+
+    middleware = ProfilingMiddleware(view)
+    request = RequestFactory().get("/", HTTP_X_PROFILE=profiling_token())
+    with pytest.raises(ValueError, match="bad input"):
+        middleware(request)
+    assert len(calls) == 1
@@ -0,0 +1,66 @@
+"""
+Query plan regression tests.
+
+Every query issued by the hot endpoints is captured and run through EXPLAIN on
+the configured database (SQLite or PostgreSQL). A test fails as soon as one
+of them falls back to a full table scan.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+HOT_ENDPOINTS = [
+    "/imageshare/posts",
+    "/imageshare/posts/followed",
+    "/imageshare/post/{post_id}/like?followed_first=true",
+    "/imageshare/posts/{post_id}/stats",
+    "/imageshare/mutual-followers/{user_id}/",
+    "/imageshare/follow-suggestions/",
+    "/user/{user_id}",
+]
+
+
+def _explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise always be sequentially scanned
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _is_full_scan(plan_line):
+    if connection.vendor == "postgresql":
+        return "Seq Scan" in plan_line
+    return plan_line.startswith("SCAN ") and " USING " not in plan_line
+
+
+@pytest.mark.parametrize("endpoint", HOT_ENDPOINTS)
+def test_hot_queries_use_indexes(api_client, endpoint) -> None:
+    """
+    Test no query behind a hot endpoint does a full table scan
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    user = f.create_user(username="followed")
+    follower = f.create_user(username="follower")
+    post = f.create_post(created_by=user)
+    f.create_follow(created_by=auth_user, following=user)
+    f.create_follow(created_by=follower, following=user)
+    f.create_follow(created_by=follower, following=auth_user)
+    f.create_like(post=post, liked_by=follower)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(endpoint.format(post_id=post.id, user_id=user.id))
+    assert response.status_code == 200
+
+    for query in queries.captured_queries:
+        plan = _explain(query["sql"])
+        assert not any(map(_is_full_scan, plan)), "\n".join([query["sql"], *plan])
@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import RequestFactory
+
+from imageshare.models import Post
+from isa.querylog import QueryInspector, inspect_queries, query_shape
+from isa.sharding import scatter
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+def test_slow_query_logged_with_view_and_frame(api_client, settings, caplog) -> None:
+    """
+    Test slow queries are logged with the URL name, view action and project frame
+    """
+    settings.SLOW_QUERY_MS = 0
+    _test_authenticate_user(api_client, "username", "password123")
+    with caplog.at_level(logging.WARNING, logger="isa.querylog"):
+        api_client.get("/imageshare/posts/followed")
+
+    messages = [r.getMessage() for r in caplog.records if "Slow query" in r.message]
+    page = next(message for message in messages if "imageshare_post" in message)
+    assert "in posts-followed [PostViewSet.followed]" in page
+    assert " at imageshare/api.py:" in page
+
+
+def test_repeated_query_reported_as_n_plus_one(settings, caplog) -> None:
+    """
+    Test the same query shape run more than the threshold is reported once
+    """
+    settings.QUERY_REPEAT_THRESHOLD = 2
+    posts = [f.create_post() for _ in range(3)]
+    inspector = QueryInspector(RequestFactory().get("/imageshare/posts"))
+    with connection.execute_wrapper(inspector):
+        for post in posts:
+            Post.objects.filter(id__in=[post.id] * 3).exists()
+            Post.objects.filter(pk=post.pk).first()
+
+    with caplog.at_level(logging.WARNING, logger="isa.querylog"):
+        inspector.report()
+    assert len(caplog.records) == 2
+    assert "Possible N+1: 3 similar queries" in caplog.records[0].message
+    assert "tests/unit/test_querylog.py" in caplog.records[0].message
+    assert query_shape('WHERE "id" IN (%s, %s, %s)') == 'WHERE "id" IN (...)'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scattered_queries_inspected(settings, caplog) -> None:
+    """
+    Test queries scattered to worker threads (outside a transaction, as in
+    production) are inspected and attributed to the caller
+    """
+    settings.SLOW_QUERY_MS = 0
+    inspector = QueryInspector(RequestFactory().get("/imageshare/posts"))
+    with caplog.at_level(logging.WARNING, logger="isa.querylog"):
+        with inspect_queries(inspector):
+            scatter(
+                lambda alias: Post.objects.using(alias).exists(),
+                [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS],
+            )
+
+    messages = [
+        r.getMessage() for r in caplog.records if "imageshare_post" in r.message
+    ]
+    assert len(messages) == 2
+    assert all(" at tests/unit/test_querylog.py:" in message for message in messages)
+    assert sum(inspector.counts.values()) == 2
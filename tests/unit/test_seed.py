@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import F
+
+from imageshare.models import Post, Like, Follow
+from imageshare.management.commands.seed import _follows_for_chunk
+from isa.sharding import all_shards
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_seed_creates_dataset(settings, tmp_path) -> None:
+    """
+    Test the seed command bulk creates users, posts, follows and likes
+    """
+    settings.MEDIA_ROOT = tmp_path
+    call_command(
+        "seed",
+        users=50,
+        posts_per_user=2,
+        follows_per_user=5,
+        likes_per_post=3,
+        seed=7,
+        stdout=StringIO(),
+    )
+    assert User.objects.filter(username__startswith="seed_").count() == 50
+    for model in (Post, Follow, Like):
+        assert any(model.objects.using(alias).exists() for alias in all_shards())
+    assert not any(
+        Follow.objects.using(alias).filter(created_by=F("following")).exists()
+        for alias in all_shards()
+    )
+    seeded = User.objects.get(username="seed_0000000")
+    assert seeded.check_password("password")
+    # Searchable, though bulk created without save()
+    assert seeded.username_folded == "seed_0000000"
+
+
+def test_seed_is_deterministic() -> None:
+    """
+    Test the same seed always generates the same follow graph
+    """
+    kwargs = dict(seed="seed_7", n_users=1000, follows_per_user=20, skew=3, days=1)
+    assert _follows_for_chunk(0, 0, 500, **kwargs) == _follows_for_chunk(
+        0, 0, 500, **kwargs
+    )
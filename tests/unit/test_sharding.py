@@ -0,0 +1,222 @@
+"""
+Sharding tests.
+
+The integration tests need at least two shards, e.g. SQLite files standing in
+for shard databases:
+
+    DJANGO_DB_SHARDS=/tmp/shard0.sqlite3,/tmp/shard1.sqlite3 pytest tests/unit/test_sharding.py
+"""
+
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from imageshare.management.commands import reshard_user
+from imageshare.models import (
+    AuthorEngagement,
+    EngagementBucket,
+    Follow,
+    Like,
+    Post,
+    PostEngagement,
+    PostTag,
+    Tag,
+)
+from isa.sharding import HashRing, assign_shard, shard_for_user
+from users.models import User
+
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+sharded = pytest.mark.skipif(
+    len(settings.SHARDS) < 2, reason="needs DJANGO_DB_SHARDS with two shards"
+)
+
+
+@pytest.fixture
+def shards():
+    cache.clear()
+    yield settings.SHARDS
+    cache.clear()
+
+
+def test_hash_ring_balances_and_moves_few_keys() -> None:
+    """
+    Test the ring spreads keys evenly and a new node only takes over its share
+    """
+    keys = [uuid.uuid4() for _ in range(4000)]
+    ring = HashRing(["a", "b", "c", "d"])
+    placement = {key: ring.node_for(key) for key in keys}
+    for node in "abcd":
+        assert 600 < list(placement.values()).count(node) < 1400
+
+    grown = HashRing(["a", "b", "c", "d", "e"])
+    moved = [key for key in keys if grown.node_for(key) != placement[key]]
+    assert all(grown.node_for(key) == "e" for key in moved)
+    assert len(moved) < 1400
+
+
+@sharded
+@pytest.mark.django_db(databases="__all__")
+def test_rows_stored_on_owner_shard(api_client, shards) -> None:
+    """
+    Test posts and follows live on their author's shard, likes with the post,
+    and the post list merges every shard
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    author = f.create_user(username="author")
+    assign_shard(auth_user.id, shards[0])
+    assign_shard(author.id, shards[1])
+
+    own_post = f.create_post(created_by=auth_user)
+    post = f.create_post(created_by=author)
+    assert api_client.post(f"/imageshare/post/{post.id}/like").status_code == 201
+    response = api_client.post("/imageshare/follow", data={"following": author.id})
+    assert response.status_code == 201
+
+    assert Post.objects.using(shards[0]).get().id == own_post.id
+    assert Post.objects.using(shards[1]).get(likes_count=1).id == post.id
+    assert Like.objects.using(shards[1]).filter(post=post).exists()
+    assert Follow.objects.using(shards[0]).filter(following=author).exists()
+
+    response = api_client.get("/imageshare/posts")
+    assert response.data["count"] == 2
+    assert response.data["results"][0]["id"] == str(post.id)
+    assert response.data["results"][0]["liked_by_me"] is True
+
+    response = api_client.get("/imageshare/posts/followed")
+    assert {row["id"] for row in response.data["results"]} == {
+        str(own_post.id),
+        str(post.id),
+    }
+    response = api_client.get(f"/user/{author.id}")
+    assert response.data["followers"] == 1
+
+
+@sharded
+@pytest.mark.django_db(databases="__all__")
+def test_reshard_user_moves_rows(shards) -> None:
+    """
+    Test reshard_user moves a user's posts, likes and follows to another shard
+    """
+    author = f.create_user(username="author")
+    fan = f.create_user(username="fan")
+    assign_shard(author.id, shards[0])
+    post = f.create_post(created_by=author)
+    f.create_like(post=post, liked_by=fan)
+    f.create_follow(created_by=author, following=fan)
+
+    call_command("reshard_user", "author", shards[1], grace=0, stdout=StringIO())
+
+    assert shard_for_user(author.id) == shards[1]
+    assert not Post.objects.using(shards[0]).filter(id=post.id).exists()
+    moved = Post.objects.using(shards[1]).get(id=post.id)
+    assert moved.likes_count == 1
+    assert moved.likes.get().liked_by_id == fan.id
+    assert Follow.objects.using(shards[1]).filter(created_by=author).exists()
+    assert not Follow.objects.using(shards[0]).filter(created_by=author).exists()
+    assert User.objects.using(shards[0]).filter(id=author.id).exists()
+
+
+@sharded
+@pytest.mark.django_db(databases="__all__")
+def test_reshard_user_keeps_tags(api_client, shards) -> None:
+    """
+    Test reshard_user moves the tags of a user's posts and keeps tag counts
+    """
+    author = f.create_user(username="author")
+    assign_shard(author.id, shards[0])
+    post = f.create_post(created_by=author, caption="#moved")
+    assert Tag.objects.get(name="moved").posts_count == 1
+
+    call_command("reshard_user", "author", shards[1], grace=0, stdout=StringIO())
+
+    assert PostTag.objects.using(shards[1]).filter(post=post).exists()
+    assert not PostTag.objects.using(shards[0]).filter(post=post).exists()
+    assert Tag.objects.get(name="moved").posts_count == 1
+    _test_authenticate_user(api_client, "viewer", "password123")
+    response = api_client.get("/imageshare/tags/moved/posts")
+    assert [result["id"] for result in response.data["results"]] == [str(post.id)]
+    assert response.data["posts_count"] == 1
+
+
+@sharded
+@pytest.mark.django_db(databases="__all__")
+def test_reshard_user_merges_rollups_by_bucket(shards) -> None:
+    """
+    Test engagement rollups are matched by post or author and bucket, not by
+    their per-database ids, so they never overwrite another user's buckets
+    """
+    bucket = timezone.now().replace(minute=0, second=0, microsecond=0)
+    rollups = {}
+    for username, shard, likes in (("author", shards[0], 7), ("other", shards[1], 3)):
+        user = f.create_user(username=username)
+        assign_shard(user.id, shard)
+        post = f.create_post(created_by=user)
+        rollups[username] = (
+            PostEngagement.objects.create(
+                post=post, resolution=EngagementBucket.HOUR, bucket=bucket, likes=likes
+            ),
+            AuthorEngagement.objects.create(
+                author=user,
+                resolution=EngagementBucket.HOUR,
+                bucket=bucket,
+                likes=likes,
+            ),
+        )
+    # Each shard numbers its rows on its own
+    assert rollups["author"][0].id == rollups["other"][0].id
+
+    call_command("reshard_user", "author", shards[1], grace=0, stdout=StringIO())
+
+    for username, likes in (("author", 7), ("other", 3)):
+        post_engagement, author_engagement = rollups[username]
+        target = PostEngagement.objects.using(shards[1])
+        assert target.get(post=post_engagement.post_id).likes == likes
+        target = AuthorEngagement.objects.using(shards[1])
+        assert target.get(author=author_engagement.author_id).likes == likes
+
+
+@sharded
+@pytest.mark.django_db(databases="__all__")
+def test_reshard_user_catches_up_on_changes(shards, monkeypatch) -> None:
+    """
+    Test changes made on the source while a user is being moved reach the
+    target, deletions included
+    """
+    author = f.create_user(username="author")
+    assign_shard(author.id, shards[0])
+    post, gone_post = f.create_post(created_by=author), f.create_post(created_by=author)
+    like, unliked = f.create_like(post=post), f.create_like(post=post)
+    follow = f.create_follow(created_by=author)
+    assign = reshard_user.assign_shard
+
+    def change_then_assign(user_id, shard):
+        # Written after the first copy, before the switch
+        Post.objects.using(shards[0]).filter(id=post.id).update(
+            width=20, height=40, image_processed_at=timezone.now() - timedelta(1)
+        )
+        like.delete()
+        follow.delete()
+        gone_post.delete()
+        assign(user_id, shard)
+        # Written after the switch, to the first copy
+        Like.objects.using(shards[1]).get(id=unliked.id).delete()
+
+    monkeypatch.setattr(reshard_user, "assign_shard", change_then_assign)
+    call_command("reshard_user", "author", shards[1], grace=0, stdout=StringIO())
+
+    moved = Post.objects.using(shards[1]).get(id=post.id)
+    assert (moved.width, moved.height, moved.likes_count) == (20, 40, 0)
+    assert moved.image_processed_at is not None
+    assert (
+        not Like.objects.using(shards[1]).filter(id__in=[like.id, unliked.id]).exists()
+    )
+    assert not Follow.objects.using(shards[1]).filter(id=follow.id).exists()
+    assert not Post.objects.using(shards[1]).filter(id=gone_post.id).exists()
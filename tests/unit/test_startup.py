@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from imageshare.management.commands.startup_benchmark import slowest_imports
+from isa import production_settings
+
+pytestmark = pytest.mark.django_db
+
+
+def test_production_settings_drop_debug_tools() -> None:
+    """
+    Test production settings run without DEBUG and the development apps
+    """
+    assert production_settings.DEBUG is False
+    assert "debug_toolbar" not in production_settings.INSTALLED_APPS
+    assert "django_extensions" not in production_settings.INSTALLED_APPS
+    assert not any("debug_toolbar" in m for m in production_settings.MIDDLEWARE)
+
+
+def test_startup_benchmark() -> None:
+    """
+    Test the WSGI application is imported and serves a request in a fresh process
+    """
+    out = StringIO()
+    call_command(
+        "startup_benchmark",
+        runs=1,
+        path="/login/",
+        settings_module="isa.production_settings",
+        stdout=out,
+    )
+    output = out.getvalue()
+    assert "import: median" in output
+    assert "first request: median" in output
+    assert "Slowest packages to import" in output
+
+    sample = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |   django.utils\n"
+        "import time:        50 |        150 | django\n"
+        "import time:        70 |         70 | isa\n"
+    )
+    assert slowest_imports(sample, 2) == [("django", 150), ("isa", 70)]
+
+
+def test_google_auth_imports_stay_lazy() -> None:
+    """
+    Test importing the Google login views leaves OAuth and project API modules unloaded
+    """
+    script = (
+        "import sys, django\n"
+        "django.setup()\n"
+        "before = set(sys.modules)\n"
+        "import isa.google_auth\n"
+        "print(sorted(set(sys.modules) - before))\n"
+    )
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "isa.production_settings"}
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    loaded = result.stdout
+    for module in ("users.api", "allauth", "dj_rest_auth", "requests", "password"):
+        assert f"'{module}" not in loaded
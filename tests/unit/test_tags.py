@@ -0,0 +1,107 @@
+import pytest
+from django.core.management import call_command
+
+from imageshare.models import PostTag, Tag, TagActivity
+from imageshare.tags import parse_tags
+from isa.sharding import all_shards
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+
+pytestmark = pytest.mark.django_db
+
+
+def _tag_names(post):
+    # Tags are global while PostTag rows live on the post's shard: no join
+    tag_ids = list(post.post_tags.values_list("tag_id", flat=True))
+    return set(Tag.objects.filter(id__in=tag_ids).values_list("name", flat=True))
+
+
+def test_parse_tags() -> None:
+    """
+    Test hashtags are lowercased, deduplicated, matched at word starts and never truncated
+    """
+    caption = "#Sunset at the beach #sunset #travel_2024 me#not ##double #"
+    assert parse_tags(caption) == ["sunset", "travel_2024"]
+    assert parse_tags(f"#{'a' * 64} #{'b' * 70}") == ["a" * 64]
+
+
+def test_tags_follow_caption_edits(api_client) -> None:
+    """
+    Test tags and their post counts are kept in step with captions
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    first = f.create_post(caption="#cats and #dogs")
+    f.create_post(caption="more #Cats")
+    assert dict(Tag.objects.values_list("name", "posts_count")) == {
+        "cats": 2,
+        "dogs": 1,
+    }
+
+    first.caption = "just #dogs #birds"
+    first.save()
+    counts = dict(Tag.objects.values_list("name", "posts_count"))
+    assert counts == {"cats": 1, "dogs": 1, "birds": 1}
+    assert _tag_names(first) == {"dogs", "birds"}
+
+    first.delete()
+    assert Tag.objects.get(name="dogs").posts_count == 0
+    dogs = Tag.objects.get(name="dogs")
+    assert not PostTag.objects.filter(tag=dogs).exists()
+
+
+def test_tag_posts_keyset_pages(api_client) -> None:
+    """
+    Test a tag's posts are paged newest first with a cursor, without repeats
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    posts = [f.create_post(caption=f"photo {i} #Daily") for i in range(5)]
+    f.create_post(caption="untagged")
+
+    response = api_client.get("/imageshare/tags/%23daily/posts?page_size=2")
+    assert response.status_code == 200
+    assert (response.data["tag"], response.data["posts_count"]) == ("daily", 5)
+    seen = [post["id"] for post in response.data["results"]]
+    while response.data["next"]:
+        response = api_client.get(response.data["next"])
+        seen += [post["id"] for post in response.data["results"]]
+
+    newest_first = sorted(posts, key=lambda post: (post.created_at, post.id))[::-1]
+    assert seen == [str(post.id) for post in newest_first]
+    assert api_client.get("/imageshare/tags/nothing/posts").status_code == 404
+    response = api_client.get("/imageshare/tags/daily/posts?cursor=garbage")
+    assert response.status_code == 400
+
+
+def test_trending_tags(api_client) -> None:
+    """
+    Test trending tags are ranked by recent uses from the hourly buckets
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    for caption in ["#a #b", "#b", "#b #c", "#c"]:
+        f.create_post(caption=caption)
+    assert TagActivity.objects.count() == 3
+
+    response = api_client.get("/imageshare/tags/trending")
+    assert response.status_code == 200
+    assert response.data["trending"] == [
+        {"tag": "b", "uses": 3},
+        {"tag": "c", "uses": 2},
+        {"tag": "a", "uses": 1},
+    ]
+    assert api_client.get("/imageshare/tags/trending?hours=0").status_code == 400
+
+
+def test_index_tags_command() -> None:
+    """
+    Test the command indexes posts saved without tags and prunes old buckets
+    """
+    post = f.create_post(caption="#old #photo")
+    for alias in all_shards():
+        PostTag.objects.using(alias).all().delete()
+    Tag.objects.update(posts_count=0)
+    TagActivity.objects.update(bucket="2000-01-01T00:00:00Z")
+
+    call_command("index_tags")
+    assert _tag_names(post) == {"old", "photo"}
+    assert Tag.objects.get(name="old").posts_count == 1
+    assert TagActivity.objects.count() == 2
@@ -0,0 +1,104 @@
+import io
+import json
+import zipfile
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+
+from taskqueue.models import Task
+from taskqueue.queue import run_pending
+from tests import factories as f
+from tests.utils import _test_authenticate_user
+from users.takeout import archive_name
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def account(api_client, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.PRIVATE_MEDIA_ROOT = tmp_path / "private"
+    user = _test_authenticate_user(api_client, "username", "password123")
+    post = f.create_post(created_by=user)
+    post.image.save("photo.jpg", ContentFile(b"\xff\xd8 image bytes " * 1000))
+    f.create_like(post=f.create_post(), liked_by=user)
+    f.create_follow(created_by=user)
+    return user, post
+
+
+def test_takeout_streams_zip(api_client, account) -> None:
+    """
+    Test the takeout streams a ZIP of posts, images, likes and follows
+    """
+    user, post = account
+    response = api_client.get("/user/takeout")
+    assert response.status_code == 200
+    assert response.streaming
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    assert json.loads(archive.read("profile.json"))["username"] == "username"
+    posts = archive.read("posts.jsonl").decode().splitlines()
+    assert [json.loads(line)["id"] for line in posts] == [str(post.id)]
+    assert len(archive.read("likes.jsonl").decode().splitlines()) == 1
+    assert len(archive.read("following.jsonl").decode().splitlines()) == 1
+    assert archive.read(f"images/{post.id}.jpg") == post.image.read()
+
+
+def test_takeout_archive_resumable(api_client, account) -> None:
+    """
+    Test a pre-generated archive downloads in byte ranges
+    """
+    assert api_client.get("/user/takeout/archive").status_code == 404
+    assert api_client.post("/user/takeout/archive").status_code == 202
+    assert api_client.post("/user/takeout/archive").status_code == 202
+    assert Task.objects.filter(name="users.tasks.build_takeout_archive").count() == 1
+    run_pending()
+
+    response = api_client.get("/user/takeout/archive")
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    full = b"".join(response.streaming_content)
+    assert zipfile.ZipFile(io.BytesIO(full)).testzip() is None
+
+    etag = response["ETag"]
+    response = api_client.get(
+        "/user/takeout/archive", HTTP_RANGE="bytes=100-", HTTP_IF_RANGE=etag
+    )
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes 100-{len(full) - 1}/{len(full)}"
+    assert b"".join(response.streaming_content) == full[100:]
+
+    response = api_client.get("/user/takeout/archive", HTTP_RANGE="bytes=-10")
+    assert b"".join(response.streaming_content) == full[-10:]
+
+    response = api_client.get(
+        "/user/takeout/archive", HTTP_RANGE="bytes=100-", HTTP_IF_RANGE='"stale"'
+    )
+    assert response.status_code == 200
+
+    response = api_client.get("/user/takeout/archive", HTTP_RANGE=f"bytes={len(full)}-")
+    assert response.status_code == 416
+
+
+def test_takeout_archive_not_served_as_media(api_client, account, settings) -> None:
+    """
+    Test the archive is kept out of media storage, under a name that cannot be
+    derived from the user id, and only served by the authenticated endpoint
+    """
+    user, _ = account
+    api_client.post("/user/takeout/archive")
+    run_pending()
+
+    name = archive_name(user.id)
+    assert str(user.id) not in name
+    assert storages["private"].exists(name)
+    assert not default_storage.exists(name)
+    assert not default_storage.exists(f"takeouts/{user.id}.zip")
+    with pytest.raises(ValueError):
+        storages["private"].url(name)
+    for path in (name, f"takeouts/{user.id}.zip"):
+        assert api_client.get(f"{settings.MEDIA_URL}{path}").status_code == 404
+
+    api_client.force_authenticate(None)
+    assert api_client.get("/user/takeout/archive").status_code == 401
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from taskqueue.models import Task, TaskLock
+from taskqueue.queue import claim, queue_metrics, run_pending, run_task, task
+
+pytestmark = pytest.mark.django_db
+
+calls = []
+
+
+@task(name="tests.record")
+def record(value):
+    calls.append(value)
+
+
+@task(name="tests.flaky", max_attempts=2)
+def flaky():
+    raise ValueError("boom")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_tasks_run_by_priority() -> None:
+    """
+    Test queued tasks run once each, highest priority first
+    """
+    record.enqueue(value="low", priority=-1)
+    record.enqueue(value="high", priority=5)
+    record.enqueue(value="later", delay=timedelta(hours=1))
+
+    assert run_pending() == 2
+    assert calls == ["high", "low"]
+    assert Task.objects.filter(status=Task.DONE).count() == 2
+    assert Task.objects.get(status=Task.QUEUED).kwargs == {"value": "later"}
+
+
+def test_idempotency_key_enqueues_once() -> None:
+    """
+    Test enqueueing the same idempotency key twice returns the first task
+    """
+    first = record.enqueue(value=1, idempotency_key="once")
+    second = record.enqueue(value=2, idempotency_key="once")
+    assert first.id == second.id
+    run_pending()
+    assert calls == [1]
+
+
+def test_failed_task_retried_with_backoff() -> None:
+    """
+    Test a failing task is retried later, then marked failed
+    """
+    queued = flaky.enqueue()
+    run_pending()
+    queued.refresh_from_db()
+    assert queued.status == Task.QUEUED
+    assert queued.attempts == 1
+    assert queued.run_at > timezone.now()
+    assert "ValueError: boom" in queued.last_error
+
+    Task.objects.filter(id=queued.id).update(run_at=timezone.now())
+    run_pending()
+    queued.refresh_from_db()
+    assert queued.status == Task.FAILED
+    assert queued.attempts == 2
+
+
+def test_claimed_task_not_claimed_again() -> None:
+    """
+    Test a claimed task is locked for its worker until it finishes
+    """
+    record.enqueue(value=1)
+    claimed = claim("worker-1")
+    assert claimed.status == Task.RUNNING
+    assert claim("worker-2") is None
+    assert claimed.locked_by == "worker-1"
+
+    run_task(claimed)
+    assert not TaskLock.objects.exists()
+    assert calls == [1]
+
+
+def test_queue_metrics() -> None:
+    """
+    Test queue depth and latency metrics
+    """
+    record.enqueue(value=1)
+    record.enqueue(value=2)
+    run_pending(limit=1)
+
+    metrics = queue_metrics()
+    assert metrics["depth"] == {Task.DONE: 1, Task.QUEUED: 1}
+    assert metrics["queued_by_name"] == {"tests.record": 1}
+    assert metrics["finished"] == 1
+    assert metrics["wait_p95"] >= 0
+
+    out = StringIO()
+    call_command("run_tasks", burst=True, stdout=out)
+    assert "Ran 1 tasks" in out.getvalue()
+
+
+def test_queue_metrics_nearest_rank_percentiles() -> None:
+    """
+    Test wait and run percentiles take the nearest rank, rounding it up
+    """
+    now = timezone.now()
+    for seconds in range(1, 6):
+        started_at = now - timedelta(seconds=10)
+        Task.objects.create(
+            name="tests.record",
+            status=Task.DONE,
+            run_at=started_at - timedelta(seconds=seconds),
+            started_at=started_at,
+            finished_at=started_at + timedelta(seconds=seconds),
+        )
+
+    metrics = queue_metrics()
+    assert (metrics["wait_p50"], metrics["wait_p95"]) == (3.0, 5.0)
+    assert (metrics["run_p50"], metrics["run_p95"]) == (3.0, 5.0)
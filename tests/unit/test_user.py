@@ -1,8 +1,11 @@
 import logging
 import pytest
+from django.db import connection
 
 from tests import factories as f
 from tests.utils import _test_authenticate_user
+from users.models import User
+from users.search import _prefix
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -89,3 +92,109 @@ def test_list_users(api_client) -> None:
     response = api_client.get(f"/user/", format="json")
     assert response.status_code == 200, "Failed to list users"
     assert response.data["count"] == 2
+
+
+def test_list_users_counts_in_one_query(api_client, django_assert_num_queries) -> None:
+    """
+    Test user counts are computed in the page query, and skipped when not requested
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    for i in range(3):
+        user = f.create_user(username=f"user{i}")
+        f.create_post(created_by=user)
+        f.create_follow(created_by=auth_user, following=user)
+
+    # authentication, page count and the page itself
+    with django_assert_num_queries(3):
+        response = api_client.get("/user/")
+    counts = {user["username"]: user for user in response.data["results"]}
+    assert counts["username"]["followings"] == 3
+    assert counts["username"]["posts"] == 0
+    assert all(user["posts"] == 1 for user in counts.values() if user["followers"])
+
+    with django_assert_num_queries(3) as captured:
+        response = api_client.get("/user/?fields=id,username")
+    assert set(response.data["results"][0]) == {"id", "username"}
+    assert "COUNT" not in captured.captured_queries[-1]["sql"].upper()
+
+    response = api_client.get("/user/me?omit=followers,email")
+    assert "followers" not in response.data and "email" not in response.data
+    assert response.data["followings"] == 3
+
+
+def test_batch_get_users(api_client) -> None:
+    """
+    Test users are fetched by id in request order with the profile serializer
+    """
+    auth_user = _test_authenticate_user(api_client, "username", "password123")
+    other = f.create_user(username="other")
+    f.create_follow(created_by=auth_user, following=other)
+
+    response = api_client.get(f"/user/batch?ids={other.id},{auth_user.id}")
+    assert response.status_code == 200
+    assert [user["username"] for user in response.data["results"]] == [
+        "other",
+        "username",
+    ]
+    assert response.data["results"][0]["followers"] == 1
+
+
+def test_search_users_ranks_follow_graph_first(api_client) -> None:
+    """
+    Test username autocomplete matches prefixes case-insensitively, with the
+    viewer's followings, then followers, ahead of everyone else
+    """
+    viewer = _test_authenticate_user(api_client, "username", "password123")
+    names = ["Alex", "alexandra", "al", "ALBERT", "bob", "Alfred"]
+    users = {name: f.create_user(username=name) for name in names}
+    f.create_follow(created_by=viewer, following=users["alexandra"])
+    f.create_follow(created_by=users["ALBERT"], following=viewer)
+    users["al"].is_active = False
+    users["al"].save(update_fields=["is_active"])
+
+    response = api_client.get("/user/search", {"q": "@AL"})
+    assert response.status_code == 200
+    assert [user["username"] for user in response.data["results"]] == [
+        "alexandra",
+        "ALBERT",
+        "Alex",
+        "Alfred",
+    ]
+    response = api_client.get("/user/search", {"q": "alex", "limit": 1})
+    assert [user["username"] for user in response.data["results"]] == ["alexandra"]
+    assert api_client.get("/user/search", {"q": ""}).data["results"] == []
+
+
+def test_search_users_reads_folded_username_index() -> None:
+    """
+    Test renames refold the username and prefix lookups use its index
+    """
+    user = f.create_user(username="Renamed")
+    user.username = "ÉCLAIR"
+    user.save(update_fields=["username"])
+    assert User.objects.get(pk=user.pk).username_folded == "éclair"
+
+    queryset = User.objects.filter(**_prefix("username_folded", "écl")).order_by(
+        "username_folded"
+    )
+    assert list(queryset) == [user]
+    if connection.vendor == "sqlite":
+        assert "users_user_username_folded" in queryset.explain()
+
+
+def test_search_users_finds_bulk_written_users(api_client) -> None:
+    """
+    Test users written in bulk, bypassing save() (as the seed command does),
+    are found by their folded username
+    """
+    _test_authenticate_user(api_client, "username", "password123")
+    User.objects.bulk_create([User(username="Seeded_1"), User(username="seeded_2")])
+    User.objects.filter(username="seeded_2").update(username="Renamed_2")
+    renamed = User.objects.get(username="Renamed_2")
+    renamed.username = "Moved_2"
+    User.objects.bulk_update([renamed], ["username"])
+
+    for query, username in (("seeded", "Seeded_1"), ("MOVED", "Moved_2")):
+        response = api_client.get("/user/search", {"q": query})
+        assert [user["username"] for user in response.data["results"]] == [username]
+    assert not api_client.get("/user/search", {"q": "renamed"}).data["results"]
@@ -1,20 +1,80 @@
+# Standard Library Imports
+import time
+
 # Third Party Stuff
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework import status, viewsets, permissions
+from rest_framework.exceptions import NotFound, ParseError
 
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from imageshare.models import Follow, Post
+from imageshare.tasks import warm_user_caches
+from isa.caching import cached_response, viewer_key
+from isa.serializers import SAFE_METHODS, only_fields, selected_fields
+from isa.viewsets import BatchRetrieveMixin
+from isa.sharding import sharding_enabled
 
 from .models import User
+from .search import search_users
 from .serializers import UserSerializer
+from .takeout import archive_name, ranged_file_response, streaming_takeout_response
+from .tasks import build_takeout_archive
 from .utils.pagination import UsersPagination
 
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.prefetch_related("posts", "followings", "followers").all()
+COUNTS = {
+    "posts": ("posts_count", Post, "created_by"),
+    "followings": ("followings_count", Follow, "created_by"),
+    "followers": ("followers_count", Follow, "following"),
+}
+
+
+def _count(model, column):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{column: OuterRef("pk")})
+            .order_by()
+            .values(column)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class UserViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
+    queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = UsersPagination
 
+    def get_queryset(self):
+        # Only the counts a request asks for are computed, each as an indexed
+        # subquery of the page query, instead of loading every related row
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            only, _ = only_fields(self.request, UserSerializer)
+            queryset = queryset.only(*only)
+        if sharding_enabled():
+            # Follows are spread across shards; counts are read per shard
+            return queryset
+        fields = selected_fields(self.request, UserSerializer)
+        return queryset.annotate(
+            **{
+                annotation: _count(model, column)
+                for field, (annotation, model, column) in COUNTS.items()
+                if field in fields
+            }
+        )
+
     def get_permissions(self):
         if self.action == "create":  # Allow anyone to register
             self.permission_classes = [AllowAny]
@@ -26,7 +86,98 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save()
 
     @action(methods=["GET"], detail=False)
+    @cached_response(
+        viewer_key("me"),
+        ttl=lambda: settings.PROFILE_CACHE_SECONDS,
+        stale_ttl=lambda: settings.PROFILE_CACHE_SECONDS,
+    )
     def me(self, request):
-        user = self.request.user
+        user = self.get_queryset().get(pk=self.request.user.pk)
         serializer = self.get_serializer(user)
         return Response(serializer.data)
+
+    @action(methods=["GET"], detail=False)
+    def search(self, request):
+        """
+        Autocomplete usernames starting with ?q=, the viewer's followings and
+        followers first
+        """
+        query = request.query_params.get("q", "")
+        if len(query) > 225:
+            raise ParseError("q is too long")
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            raise ParseError("limit must be a number")
+        results = [
+            {
+                "id": user.id,
+                "username": user.username,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+            }
+            for user in search_users(request.user, query, limit)
+        ]
+        return Response({"results": results})
+
+    @action(methods=["GET"], detail=False)
+    def takeout(self, request):
+        """
+        Stream a ZIP of the authenticated user's profile, posts, images,
+        likes and follows as it is being built
+        """
+        return streaming_takeout_response(self.request.user)
+
+    @action(methods=["GET", "POST"], detail=False, url_path="takeout/archive")
+    def takeout_archive(self, request):
+        """
+        POST: queue a pre-generated takeout archive (at most one per day).
+        GET: download it, resumable with Range / If-Range requests.
+        """
+        user = self.request.user
+        if request.method == "POST":
+            build_takeout_archive.enqueue(
+                user_id=user.id,
+                idempotency_key=f"takeout:{user.id}:{timezone.now():%Y-%m-%d}",
+            )
+            return Response({"status": "queued"}, status=status.HTTP_202_ACCEPTED)
+
+        storage, name = storages["private"], archive_name(user.id)
+        if not storage.exists(name):
+            raise NotFound("No takeout archive has been generated yet.")
+        return ranged_file_response(
+            request, storage, name, f"takeout-{user.username}.zip"
+        )
+
+
+def warm_after_sign_in(access_token):
+    """
+    Queue cache warming for the user of a freshly issued access token, at most
+    once per feed cache period.
+    """
+    claim = settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id")
+    user_id = AccessToken(access_token)[claim]
+    period = int(time.time() // max(settings.FEED_CACHE_SECONDS, 1))
+    warm_user_caches.enqueue(
+        user_id=user_id, idempotency_key=f"warm:{user_id}:{period}"
+    )
+
+
+class WarmCachesOnSignInMixin:
+    """
+    Warm the user's feed, suggestions and profile caches when a token is issued.
+    """
+
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            warm_after_sign_in(response.data["access"])
+        return response
+
+
+class WarmTokenObtainPairView(WarmCachesOnSignInMixin, TokenObtainPairView):
+    pass
+
+
+class WarmTokenRefreshView(WarmCachesOnSignInMixin, TokenRefreshView):
+    pass
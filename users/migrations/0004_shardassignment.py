@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_date_joined"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShardAssignment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "shard",
+                    models.CharField(
+                        help_text="Database alias of the shard", max_length=64
+                    ),
+                ),
+                ("moved_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        help_text="User whose rows are placed",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shard_assignment",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
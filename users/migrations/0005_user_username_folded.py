@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+def fold_usernames(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    users = User.objects.using(schema_editor.connection.alias)
+    batch = []
+    for user in users.only("username").iterator(chunk_size=2000):
+        user.username_folded = user.username.casefold()
+        batch.append(user)
+        if len(batch) == 2000:
+            users.bulk_update(batch, ["username_folded"])
+            batch = []
+    users.bulk_update(batch, ["username_folded"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_shardassignment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="username_folded",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=225
+            ),
+        ),
+        migrations.RunPython(fold_usernames, migrations.RunPython.noop),
+    ]
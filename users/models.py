@@ -6,11 +6,45 @@ from django.contrib.auth.models import (
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.db import models
+from django.db.models.functions import Lower
 
 from isa.models import TimeStampedUUIDModel
 
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    """
+    Keeps `username_folded` in step with `username` on the bulk writes that
+    bypass `User.save()`.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for user in objs:
+            user.username_folded = user.username.casefold()
+        update_fields = kwargs.get("update_fields") or []
+        if "username" in update_fields and "username_folded" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "username_folded"]
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if "username" in fields:
+            objs = list(objs)
+            for user in objs:
+                user.username_folded = user.username.casefold()
+            fields = [*fields, "username_folded"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if "username" in kwargs:
+            username = kwargs["username"]
+            # Expressions are folded by the database (ASCII only on SQLite)
+            kwargs["username_folded"] = (
+                username.casefold() if isinstance(username, str) else Lower(username)
+            )
+        return super().update(**kwargs)
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     use_in_migrations = True
 
     def _create_user(
@@ -46,6 +80,10 @@ class User(AbstractBaseUser, TimeStampedUUIDModel, PermissionsMixin):
     last_name = models.CharField(_("Last Name"), max_length=120, null=True, blank=True)
     email = models.EmailField(_("Email Address"), null=True, blank=True)
     username = models.CharField("Username", unique=True, max_length=225)
+    # Case-folded username: prefix searches are range scans of its index
+    username_folded = models.CharField(
+        max_length=225, db_index=True, editable=False, default=""
+    )
     is_staff = models.BooleanField(_("staff status"), default=False)
     is_active = models.BooleanField("active", default=True)
     date_joined = models.DateTimeField(_("date joined"), default=timezone.now)
@@ -66,3 +104,29 @@ class User(AbstractBaseUser, TimeStampedUUIDModel, PermissionsMixin):
 
     def __str__(self):
         return str(self.username)
+
+    def save(self, *args, **kwargs):
+        self.username_folded = self.username.casefold()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "username" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "username_folded"}
+        super().save(*args, **kwargs)
+
+
+class ShardAssignment(models.Model):
+    """
+    Model pinning a user's posts, likes and follows to a shard, overriding the
+    hash ring placement (see isa.sharding)
+    """
+
+    user = models.OneToOneField(
+        User,
+        related_name="shard_assignment",
+        on_delete=models.CASCADE,
+        help_text="User whose rows are placed",
+    )
+    shard = models.CharField(max_length=64, help_text="Database alias of the shard")
+    moved_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} on {self.shard}"
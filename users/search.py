@@ -0,0 +1,72 @@
+"""
+Username autocomplete.
+
+Usernames are stored case-folded in an indexed column, so the users whose
+name starts with a prefix are one range of that index: `prefix <= name <
+prefix + U+10FFFF`. Each lookup reads at most `limit` index entries for each
+of three tiers and ranks them, followings of the viewer first, then the
+viewer's followers, then everyone else; shorter (closer) names first within
+a tier. Users are replicated to every shard, so the follow graph tiers join
+them on the shards holding the follows.
+"""
+
+# Project-Specific Imports
+from imageshare.models import Follow
+from isa.sharding import shard_union
+
+from .models import User
+
+MAX_CHAR = chr(0x10FFFF)
+FOLLOWING, FOLLOWER, OTHER = range(3)
+
+
+def _prefix(field, prefix):
+    """
+    Lookups for `field` starting with `prefix`. The range bounds the index
+    scan; `startswith` keeps the match exact under any collation.
+    """
+    return {
+        f"{field}__gte": prefix,
+        f"{field}__lt": prefix + MAX_CHAR,
+        f"{field}__startswith": prefix,
+    }
+
+
+def search_users(viewer, query, limit=10):
+    """
+    Up to `limit` users whose username starts with `query`, ignoring case,
+    ranked by tier, then length and name.
+    """
+    prefix = query.strip().lstrip("@").casefold()
+    if not prefix:
+        return []
+    following = set(
+        viewer.followings.filter(**_prefix("following__username_folded", prefix))
+        .order_by("following__username_folded")
+        .values_list("following_id", flat=True)[:limit]
+    )
+    followers = shard_union(
+        Follow.objects.filter(
+            following=viewer, **_prefix("created_by__username_folded", prefix)
+        )
+        .order_by("created_by__username_folded")
+        .values_list("created_by_id", flat=True)[:limit]
+    )
+    others = set(
+        User.objects.filter(is_active=True, **_prefix("username_folded", prefix))
+        .order_by("username_folded")
+        .values_list("id", flat=True)[:limit]
+    )
+    users = User.objects.filter(
+        pk__in=following | followers | others, is_active=True
+    ).only("id", "username", "username_folded", "first_name", "last_name")
+
+    def tier(user):
+        if user.pk in following:
+            return FOLLOWING
+        return FOLLOWER if user.pk in followers else OTHER
+
+    ranked = sorted(
+        users, key=lambda user: (tier(user), len(user.username), user.username_folded)
+    )
+    return ranked[:limit]
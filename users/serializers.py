@@ -1,8 +1,12 @@
 from rest_framework import serializers
+
+from isa.serializers import SparseModelSerializer
+from isa.sharding import scatter, sharding_enabled
+
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseModelSerializer):
     password = serializers.CharField(write_only=True)  # Add the password field
     posts = serializers.SerializerMethodField()
     followings = serializers.SerializerMethodField()
@@ -39,11 +43,22 @@ class UserSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
+    # Views annotate the counts they were asked for; fall back to a query each
+
     def get_posts(self, obj):
+        if hasattr(obj, "posts_count"):
+            return obj.posts_count
         return obj.posts.count()
 
     def get_followers(self, obj):
+        if hasattr(obj, "followers_count"):
+            return obj.followers_count
+        if sharding_enabled():
+            # Follows are stored with the follower, on any shard
+            return sum(scatter(lambda alias: obj.followers.using(alias).count()))
         return obj.followers.count()
 
     def get_followings(self, obj):
+        if hasattr(obj, "followings_count"):
+            return obj.followings_count
         return obj.followings.count()
@@ -0,0 +1,43 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from isa.caching import bump_generation
+from isa.sharding import all_shards, sharding_enabled
+
+from .models import User
+
+# Copied so that foreign keys to users resolve on every shard
+REPLICATED_FIELDS = [
+    field.attname
+    for field in User._meta.concrete_fields
+    if not field.primary_key and not field.many_to_many
+]
+
+
+def replicate_users(users, shards=None):
+    """
+    Insert or update users on every shard.
+    """
+    for alias in shards or all_shards():
+        User.objects.using(alias).bulk_create(
+            users,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=REPLICATED_FIELDS,
+        )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, using, raw=False, **kwargs):
+    # Drops the user's cached profile, feed and suggestions
+    bump_generation(instance.pk)
+    if sharding_enabled() and using == DEFAULT_DB_ALIAS and not raw:
+        replicate_users([instance])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, using, **kwargs):
+    if sharding_enabled() and using == DEFAULT_DB_ALIAS:
+        for alias in all_shards():
+            User.objects.using(alias).filter(pk=instance.pk).delete()
@@ -0,0 +1,15 @@
+# Project-Specific Imports
+from taskqueue.queue import task
+
+from .models import User
+from .takeout import build_archive
+
+
+@task(priority=-5)
+def build_takeout_archive(user_id):
+    """
+    Pre-generate a user's takeout archive for resumable downloads.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        build_archive(user)